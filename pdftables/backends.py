@@ -0,0 +1,164 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Layout backends: where the positioned text of each page comes from. pdfminer
+is the default; when coordinates are already available (from pdftohtml -xml
+or an OCR service) a backend reads them instead, skipping PDF interpretation
+altogether.
+
+    tables = get_tables('report.xml', backend=PdfToHtmlBackend())
+    tables = get_tables('scan.json', backend=JSONLayoutBackend())
+
+A backend has a pages(file_location, password="") method yielding one
+layout per page: an LTPage, or a LayoutPage of Leafs with pdfminer class
+names. page_to_tables accepts either.
+
+The JSON layout schema is
+
+    {"pages": [{"bbox": [0, 0, 612, 792],
+                "boxes": [{"bbox": [72, 700, 120, 710],
+                           "class": "LTTextLineHorizontal",
+                           "text": "Price"}, ...]}, ...]}
+
+with bboxes as (left, bottom, right, top) in points, y upwards. class is
+one of LTTextLineHorizontal (the default), LTChar, LTLine or LTRect.
+"""
+
+import json
+import xml.etree.ElementTree as ElementTree
+
+from tree import Leaf
+
+CLASSES = ['LTTextLineHorizontal', 'LTChar', 'LTLine', 'LTRect']
+# Default zoom of pdftohtml, by which its coordinates are scaled
+PDFTOHTML_ZOOM = 1.5
+
+
+def char_leaves(bbox, text):
+    """
+    LTChar Leafs for a line of text with no glyph positions, dividing its
+    width evenly between the characters. Whitespace is added to the
+    character before it, text and box, much as pdfminer gives space
+    characters boxes of their own.
+
+    [leaf.text for leaf in char_leaves((0, 0, 40, 10), 'ab c')]
+    ['a', 'b ', 'c']
+    """
+    text = text.rstrip('\n\r')
+    if not text:
+        return []
+    left, bottom, right, top = bbox
+    width = float(right - left) / len(text)
+    leaves = []
+    for k, char in enumerate(text):
+        if char.isspace() and leaves:
+            leaves[-1][0] = leaves[-1][0][:2] + (left + (k + 1) * width, top)
+            leaves[-1][2] += char
+        elif not char.isspace():
+            leaves.append([(left + k * width, bottom,
+                            left + (k + 1) * width, top), 'LTChar', char])
+    return [Leaf(tuple(leaf)) for leaf in leaves]
+
+
+class LayoutPage(list):
+    """
+    The Leafs of one page from a backend other than pdfminer, standing in
+    for an LTPage. Text lines without LTChar boxes of their own are given
+    them by char_leaves.
+    """
+    def __init__(self, bbox, leaves):
+        super(LayoutPage, self).__init__()
+        self.bbox = tuple(float(v) for v in bbox)
+        leaves = list(leaves)
+        self.append(Leaf((self.bbox, 'LTPage', '')))
+        self.extend(leaves)
+        if not any(leaf.classname == 'LTChar' for leaf in leaves):
+            for leaf in leaves:
+                if leaf.classname == 'LTTextLineHorizontal':
+                    self.extend(char_leaves(leaf.bbox, leaf.text))
+
+    def cropped(self, rect):
+        """ A LayoutPage of the Leafs with their centre inside rect """
+        page = LayoutPage(self.bbox, [])
+        page.extend(leaf for leaf in self[1:] if leaf.is_inside(rect))
+        return page
+
+
+class PDFMinerBackend(object):
+    """ LTPages from pdfminer; get_tables uses this unless told otherwise """
+    def pages(self, file_location, password=""):
+        from pdfminer.pdfpage import PDFPage
+        from pdftables import open_pdf, initialize_pdf_miner
+        with open_pdf(file_location) as stream:
+            doc, interpreter, device = initialize_pdf_miner(stream, password)
+            for pdf_page in PDFPage.create_pages(doc):
+                interpreter.process_page(pdf_page)
+                yield device.get_result()
+
+
+def _open_text(file_location):
+    if hasattr(file_location, 'read'):
+        return file_location
+    return open(file_location, 'rb')
+
+
+class JSONLayoutBackend(object):
+    """ Pages in the JSON layout schema, from a path or file object """
+    def pages(self, file_location, password=""):
+        file_ptr = _open_text(file_location)
+        try:
+            data = file_ptr.read()
+        finally:
+            if file_ptr is not file_location:
+                file_ptr.close()
+        if isinstance(data, bytes):
+            data = data.decode('utf-8')
+        for page in json.loads(data)['pages']:
+            yield self.layout(page)
+
+    @staticmethod
+    def layout(page):
+        """ The LayoutPage of a page dict """
+        leaves = []
+        for box in page.get('boxes', []):
+            classname = box.get('class', 'LTTextLineHorizontal')
+            if classname not in CLASSES:
+                raise ValueError("unknown box class {0!r}".format(classname))
+            leaves.append(Leaf((tuple(float(v) for v in box['bbox']),
+                                classname, box.get('text', ''))))
+        return LayoutPage(page['bbox'], leaves)
+
+
+class PdfToHtmlBackend(object):
+    """
+    Pages from the XML written by pdftohtml -xml, whose coordinates are
+    measured down from the top of the page and scaled by zoom
+    """
+    def __init__(self, zoom=PDFTOHTML_ZOOM):
+        self.zoom = float(zoom)
+
+    def pages(self, file_location, password=""):
+        file_ptr = _open_text(file_location)
+        try:
+            root = ElementTree.parse(file_ptr).getroot()
+        finally:
+            if file_ptr is not file_location:
+                file_ptr.close()
+        for page in root.iter('page'):
+            yield self.layout(page)
+
+    def layout(self, page):
+        """ The LayoutPage of a <page> element """
+        zoom = self.zoom
+        height = float(page.get('height')) / zoom
+        leaves = []
+        for text in page.iter('text'):
+            left = float(text.get('left')) / zoom
+            top = height - float(text.get('top')) / zoom
+            bbox = (left, top - float(text.get('height')) / zoom,
+                    left + float(text.get('width')) / zoom, top)
+            leaves.append(Leaf((bbox, 'LTTextLineHorizontal',
+                                ''.join(text.itertext()))))
+        return LayoutPage((0, 0, float(page.get('width')) / zoom, height),
+                          leaves)
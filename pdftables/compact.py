@@ -0,0 +1,157 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Compact table storage backed by a 2-D numpy object array
+"""
+
+import collections
+
+import numpy
+
+
+def _is_empty(cell):
+    return not cell.strip()
+
+_IS_EMPTY = numpy.frompyfunc(_is_empty, 1, 1)
+
+
+def as_cell_array(content):
+    """
+    Build a 2-D object array from a list of rows, padding short rows with ''
+    as_cell_array([['a', 'b'], ['c']]).tolist()
+    [['a', 'b'], ['c', '']]
+    """
+    if isinstance(content, numpy.ndarray):
+        return content
+    rows = len(content)
+    columns = max(len(row) for row in content) if rows else 0
+    cells = numpy.empty((rows, columns), dtype=object)
+    cells.fill('')
+    for i, row in enumerate(content):
+        cells[i, :len(row)] = row
+    return cells
+
+
+def is_empty_row(row):
+    return not any(cell.strip() for cell in row)
+
+
+def rows_to_crop(rows):
+    """
+    Indices of the empty rows crop_table removes, found in linear time.
+    Empty rows are taken off the top; then, for each empty row at the
+    bottom, the first remaining row equal to it is removed, which is what
+    the original list.remove implementation did.
+    rows_to_crop([[''], ['a'], [''], ['b'], ['']])
+    [0, 2]
+    """
+    count = len(rows)
+    empty = [is_empty_row(row) for row in rows]
+    start = 0
+    while start < count and empty[start]:  # top -> bottom
+        start += 1
+    trailing = 0
+    while trailing < count - start and empty[count - 1 - trailing]:
+        trailing += 1  # bottom -> top
+
+    positions = {}
+    for i in range(start, count):
+        if empty[i]:
+            positions.setdefault(tuple(rows[i]),
+                                 collections.deque()).append(i)
+    removed = list(range(start))
+    for i in range(count - 1, count - 1 - trailing, -1):
+        removed.append(positions[tuple(rows[i])].popleft())
+    return sorted(removed)
+
+
+def _first_and_last(keep):
+    """ index of the first and one past the last True in a boolean vector """
+    indices = numpy.flatnonzero(keep)
+    if not len(indices):
+        return 0, 0
+    return indices[0], indices[-1] + 1
+
+
+class CompactTable(object):
+    """
+    Hold a table definition as a 2-D numpy object array. Iterating gives the
+    rows as lists of strings, exactly like Table.
+    """
+    def __init__(self, content, page, table):
+        self.cells = as_cell_array(content)
+        self.page_number = page["page"]
+        self.total_pages = page["page_total"]
+        self.table_number_on_page = table["table_index"]
+        self.total_tables_on_page = table["table_index_total"]
+        self.logical_table_number = table.get("logical_table")
+        self.continues_previous = table.get("continuation", False)
+
+    def __len__(self):
+        return self.cells.shape[0]
+
+    def __iter__(self):
+        for row in self.cells:
+            yield row.tolist()
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [row.tolist() for row in self.cells[index]]
+        return self.cells[index].tolist()
+
+    def __eq__(self, other):
+        return list(self) == list(other)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __repr__(self):
+        return repr(list(self))
+
+    def crop(self, rows=True, columns=False):
+        """
+        Remove empty rows (as crop_table does) and optionally empty columns
+        from the edges of the table in linear time. No strings are copied,
+        and the result is a view unless crop_table would remove a row from
+        the middle of the table.
+        """
+        if not self.cells.size:
+            return self
+        if rows:
+            removed = rows_to_crop(self.cells.tolist())
+            start = 0
+            while start < len(removed) and removed[start] == start:
+                start += 1
+            stop = len(self.cells) - (len(removed) - start)
+            if removed[start:] == list(range(stop, len(self.cells))):
+                self.cells = self.cells[start:stop]
+            else:
+                self.cells = numpy.delete(self.cells, removed, axis=0)
+        if columns and self.cells.size:
+            empty = _IS_EMPTY(self.cells).astype(bool)
+            start, stop = _first_and_last(~empty.all(axis=0))
+            self.cells = self.cells[:, start:stop]
+        return self
+
+    def to_numpy(self):
+        """ The underlying object array (a view, not a copy) """
+        return self.cells
+
+    def to_records(self, names=None):
+        """
+        A numpy record array with one field per column. The field arrays
+        reference the same string objects as the table.
+        """
+        columns = [self.cells[:, j] for j in range(self.cells.shape[1])]
+        if names is None:
+            names = ['column{}'.format(j) for j in range(len(columns))]
+        return numpy.rec.fromarrays(columns, names=names)
+
+    def to_dataframe(self, columns=None):
+        """ A pandas DataFrame over the cell array (pandas is optional) """
+        try:
+            import pandas
+        except ImportError:
+            raise ImportError("to_dataframe requires pandas")
+        return pandas.DataFrame(self.cells, columns=columns, copy=False)
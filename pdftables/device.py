@@ -0,0 +1,57 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+pdfminer device which can discard everything outside a region of interest
+before layout analysis
+"""
+
+from pdfminer.converter import PDFPageAggregator
+
+
+def crop_for_page(crop, page_number):
+    """
+    The crop rectangle (left, bottom, right, top) for a 1-indexed page. crop
+    is None, one rectangle for every page, a dict of rectangles keyed by page
+    number or a function of the page number.
+    """
+    if crop is None:
+        return None
+    if callable(crop):
+        return crop(page_number)
+    if isinstance(crop, dict):
+        return crop.get(page_number)
+    return tuple(crop)
+
+
+def centre_inside(bbox, rect):
+    """ True if the centre of bbox is inside rect """
+    x = (bbox[0] + bbox[2]) / 2.0
+    y = (bbox[1] + bbox[3]) / 2.0
+    return rect[0] <= x <= rect[2] and rect[1] <= y <= rect[3]
+
+
+class CroppingPageAggregator(PDFPageAggregator):
+    """
+    A PDFPageAggregator which drops characters and paths whose centre is
+    outside self.crop (left, bottom, right, top), so they never reach layout
+    grouping. With crop None it behaves exactly like PDFPageAggregator.
+    """
+    crop = None
+
+    def _discard_last_if_outside(self):
+        objs = self.cur_item._objs
+        if objs and not centre_inside(objs[-1].bbox, self.crop):
+            objs.pop()
+
+    def render_char(self, matrix, font, fontsize, scaling, rise, cid):
+        adv = PDFPageAggregator.render_char(self, matrix, font, fontsize,
+                                            scaling, rise, cid)
+        if self.crop is not None:
+            self._discard_last_if_outside()
+        return adv
+
+    def paint_path(self, gstate, stroke, fill, evenodd, path):
+        PDFPageAggregator.paint_path(self, gstate, stroke, fill, evenodd, path)
+        if self.crop is not None:
+            self._discard_last_if_outside()
@@ -0,0 +1,301 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+What a table was inferred from: the boxes, the row and column projections,
+their thresholds and the combs. Nothing is collected unless asked for:
+
+    table, data = page_to_tables(page, diagnostics=True)
+    open('page.json', 'w').write(data.to_json())
+    render(data, 'page.png')
+
+Rendering uses matplotlib's Agg canvas directly, never pyplot, so it needs
+no display and can run in many processes at once. From the command line,
+diagnostics for every page of a batch are written as JSON and PNG on a
+process pool, and saved JSON can be rendered again later:
+
+    python diagnostics.py -o /tmp/diagnostics bad-batch/*.pdf -j 8
+    python diagnostics.py -o /tmp/png /tmp/diagnostics/*.json
+
+Options default as in get_tables; give those the batch was extracted with
+(--atomise words, --engine fast and so on), as they change the boxes and
+combs.
+"""
+
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+
+import numpy
+
+from tree import Leaf, LeafList
+
+try:
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from mpl_toolkits.axes_grid1 import make_axes_locatable
+except ImportError:
+    Figure = None
+
+COLOURS = {'LTPage': 'black', 'LTTextBoxHorizontal': 'green',
+           'LTFigure': 'black', 'LTLine': 'red', 'LTRect': 'red',
+           'LTImage': 'black', 'LTTextLineHorizontal': 'blue',
+           'LTCurve': 'red', 'LTChar': 'red', 'LTWord': 'red',
+           'LTAnon': 'white'}
+# Size in inches and resolution of rendered pages
+FIGURE_SIZE = (8.5, 11)
+RENDER_DPI = 100
+# The atomise option of get_tables for each choice of --atomise
+ATOMISE_OPTIONS = {'chars': True, 'words': 'words', 'none': False}
+
+
+def projection_pairs(projection):
+    """
+    Sorted [coordinate, count] pairs of a projection from any engine: a
+    Counter, a dense (origin, counts), or both engines' of a verifying one
+    """
+    projection = getattr(projection, 'reference', projection)
+    if isinstance(projection, tuple):
+        origin, counts = projection
+        return [[origin + i, int(count)] for i, count in enumerate(counts)]
+    return [[key, int(count)] for key, count in sorted(projection.items())]
+
+
+def _number(value):
+    """ numpy numbers in combs are saved as numbers """
+    if isinstance(value, numpy.generic):
+        return value.item()
+    raise TypeError("{0!r} is not JSON serializable".format(value))
+
+
+class TableDiagnosticData(object):
+    """
+    How one table was found. top_plot and left_plot are the column and row
+    projections (empty when not computed, such as when the combs came from
+    a template or rulings, shown by source), bbox is (minx, maxx, miny,
+    maxy) and the thresholds are those the projections were cut at.
+    """
+    def __init__(self, box_list, top_plot, left_plot, x_comb, y_comb,
+                 column_threshold=None, row_threshold=None, bbox=None,
+                 source=None):
+        self.box_list = box_list
+        self.top_plot = top_plot
+        self.left_plot = left_plot
+        self.x_comb = x_comb
+        self.y_comb = y_comb
+        self.column_threshold = column_threshold
+        self.row_threshold = row_threshold
+        self.bbox = bbox
+        self.source = source
+
+    def to_dict(self):
+        return dict(
+            boxes=[[list(box.bbox), box.classname, box.text]
+                   for box in self.box_list],
+            column_projection=projection_pairs(self.top_plot),
+            row_projection=projection_pairs(self.left_plot),
+            x_comb=list(self.x_comb), y_comb=list(self.y_comb),
+            column_threshold=self.column_threshold,
+            row_threshold=self.row_threshold,
+            bbox=None if self.bbox is None else list(self.bbox),
+            source=self.source)
+
+    def to_json(self):
+        return json.dumps(self.to_dict(), default=_number, sort_keys=True)
+
+    @classmethod
+    def from_dict(cls, data):
+        box_list = LeafList(Leaf((tuple(bbox), classname, text))
+                            for bbox, classname, text in data['boxes'])
+        return cls(box_list,
+                   dict(map(tuple, data['column_projection'])),
+                   dict(map(tuple, data['row_projection'])),
+                   data['x_comb'], data['y_comb'],
+                   column_threshold=data.get('column_threshold'),
+                   row_threshold=data.get('row_threshold'),
+                   bbox=data.get('bbox'), source=data.get('source'))
+
+    @classmethod
+    def from_json(cls, text):
+        return cls.from_dict(json.loads(text))
+
+
+def draw(figure, data, title=None):
+    """
+    Draw the boxes and combs of a TableDiagnosticData on figure, with the
+    column projection above and the row projection to the left. Returns the
+    page's axes.
+    """
+    axes = figure.add_subplot(111)
+    axes.axis('equal')
+    for box in data.box_list:
+        left, bottom, right, top = box.bbox
+        axes.plot([left, right, right, left, left],
+                  [bottom, bottom, top, top, bottom],
+                  color=COLOURS.get(box.classname, 'black'), linewidth=0.5)
+    if title:
+        figure.suptitle(title)
+    divider = make_axes_locatable(axes)
+    axes.yaxis.set_label_position("right")
+
+    top_axes = left_axes = None
+    columns = projection_pairs(data.top_plot)
+    if columns:
+        top_axes = divider.append_axes("top", 1.2, pad=0.1, sharex=axes)
+        top_axes.plot([x for x, _ in columns], [n for _, n in columns],
+                      color='red')
+        if data.column_threshold is not None:
+            top_axes.axhline(data.column_threshold, color='grey',
+                             linestyle='--')
+    rows = projection_pairs(data.left_plot)
+    if rows:
+        left_axes = divider.append_axes("left", 1.2, pad=0.1, sharey=axes)
+        left_axes.plot([n for _, n in rows], [y for y, _ in rows],
+                       color='red')
+        if data.row_threshold is not None:
+            left_axes.axvline(data.row_threshold, color='grey',
+                              linestyle='--')
+
+    if data.x_comb and data.y_comb:
+        miny, maxy = min(data.y_comb), max(data.y_comb)
+        minx, maxx = min(data.x_comb), max(data.x_comb)
+        for x in data.x_comb:
+            axes.plot([x, x], [miny, maxy], color='black')
+            if top_axes is not None:
+                top_axes.scatter(x, 0, color='black')
+        for y in data.y_comb:
+            axes.plot([minx, maxx], [y, y], color='black')
+            if left_axes is not None:
+                left_axes.scatter(1, y, color='black')
+    return axes
+
+
+def render(data, path, title=None, dpi=RENDER_DPI):
+    """ Draw a TableDiagnosticData to an image file, PNG by default """
+    if Figure is None:
+        raise ImportError("rendering diagnostics needs matplotlib")
+    figure = Figure(figsize=FIGURE_SIZE)
+    FigureCanvasAgg(figure)
+    draw(figure, data, title)
+    figure.savefig(path, dpi=dpi)
+
+
+def _write(output_directory, name, data, png):
+    path = os.path.join(output_directory, name)
+    with open(path + '.json', 'w') as file_ptr:
+        file_ptr.write(data.to_json())
+    if png:
+        render(data, path + '.png', title=name)
+
+
+def _diagnose_unit(unit):
+    """
+    Write the diagnostics of pages start:stop of a PDF, or render a saved
+    one (start is None). Returns the number of tables written.
+    """
+    file_location, start, stop, output_directory, png, options = unit
+    stem = os.path.splitext(os.path.basename(file_location))[0]
+    if start is None:
+        with open(file_location) as file_ptr:
+            data = TableDiagnosticData.from_json(file_ptr.read())
+        render(data, os.path.join(output_directory, stem + '.png'),
+               title=stem)
+        return 1
+
+    from pdfminer.pdfpage import PDFPage
+    from pdftables import (open_pdf, initialize_pdf_miner,
+                           _page_to_table_list, _resolve_engine)
+    options = dict(options, engine=_resolve_engine(options.get('engine')))
+    written = 0
+    with open_pdf(file_location) as stream:
+        doc, interpreter, device = initialize_pdf_miner(stream)
+        pages = itertools.islice(PDFPage.create_pages(doc), start, stop)
+        for i, pdf_page in enumerate(pages, start):
+            interpreter.process_page(pdf_page)
+            # pages without tables too, since they may be what went wrong
+            captured = []
+            _page_to_table_list(device.get_result(), diagnostics=captured,
+                                **options)
+            for k, data in enumerate(captured):
+                _write(output_directory,
+                       '{0}-p{1:04d}-t{2}'.format(stem, i + 1, k + 1),
+                       data, png)
+                written += 1
+    return written
+
+
+def diagnose_batch(file_locations, output_directory, processes=None,
+                   png=True, unit_cost=None, atomise=True, extend_y=True,
+                   split_regions=False, engine=None, **options):
+    """
+    Write the diagnostics of every table in a batch of PDFs to
+    output_directory, as <name>-p<page>-t<table>.json and .png, on a pool of
+    processes; a page without tables gets one with its boxes alone.
+    Documents are split into page ranges as by scheduler.get_tables_batch.
+    .json files of saved diagnostics are rendered to PNG instead. atomise,
+    split_regions and engine are as for get_tables, with the same defaults,
+    and like get_tables the row comb is extended over the page unless
+    extend_y is False, so the diagnostics show how its tables were found.
+    Other options (rulings) are passed on to page_to_table_list.
+    Returns the number of tables written.
+    """
+    options = dict(options, atomise=atomise, extend_y=extend_y,
+                   split_regions=split_regions, engine=engine)
+    from scheduler import (page_costs, plan_units, PAGE_COST,
+                           UNITS_PER_PROCESS)
+    if png and Figure is None:
+        raise ImportError("rendering diagnostics needs matplotlib")
+    processes = processes or multiprocessing.cpu_count()
+    pdfs = [f for f in file_locations if not f.lower().endswith('.json')]
+    units = [(f, None, None, output_directory, png, options)
+             for f in file_locations if f.lower().endswith('.json')]
+    pool = multiprocessing.Pool(processes)
+    try:
+        costs = pool.map(page_costs, pdfs)
+        if unit_cost is None:
+            total = sum(sum(document_costs) for document_costs in costs)
+            unit_cost = max(total // (processes * UNITS_PER_PROCESS),
+                            PAGE_COST)
+        units.extend((pdfs[document], start, stop, output_directory, png,
+                      options)
+                     for document, start, stop in plan_units(costs,
+                                                             unit_cost))
+        return sum(pool.imap_unordered(_diagnose_unit, units))
+    finally:
+        pool.close()
+        pool.join()
+
+
+def main():
+    args = argparse.ArgumentParser(
+        description="Write table diagnostics of PDFs as JSON and PNG")
+    args.add_argument('files', nargs='+',
+                      help='PDFs, or saved diagnostics (.json) to render')
+    args.add_argument('-o', '--output', dest='output_directory',
+                      required=True)
+    args.add_argument('-j', '--processes', type=int, default=None)
+    args.add_argument('--json-only', dest='png', action='store_false',
+                      help='do not render PNGs')
+    args.add_argument('--atomise', choices=sorted(ATOMISE_OPTIONS),
+                      default='chars',
+                      help='allocate text to cells by character (as '
+                      'get_tables does), by word or by whole text line')
+    args.add_argument('--no-extend-y', dest='extend_y', action='store_false')
+    args.add_argument('--split-regions', dest='split_regions',
+                      action='store_true')
+    args.add_argument('--rulings', action='store_true')
+    args.add_argument('--engine', choices=['reference', 'fast', 'verify'],
+                      default=None)
+    options = vars(args.parse_args())
+    options['atomise'] = ATOMISE_OPTIONS[options['atomise']]
+    if not os.path.isdir(options['output_directory']):
+        os.makedirs(options['output_directory'])
+    written = diagnose_batch(options.pop('files'),
+                             options.pop('output_directory'), **options)
+    print("{0} tables written".format(written))
+
+
+if __name__ == '__main__':
+    main()
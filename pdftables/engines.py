@@ -0,0 +1,331 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Engines: interchangeable implementations of the inference stages of
+page_to_tables (projection, combs, cell allocation and the rounded
+histograms used to find table rows). The reference engine is the code in
+pdftables itself; another engine must give exactly the same tables.
+
+    tables = get_tables('report.pdf', engine='fast')
+
+A VerifyingEngine runs the reference and a candidate engine on the same
+inputs at every stage, carries on with the reference output, times both,
+and raises EngineMismatch (or logs) with a structured diff when they
+disagree, so a faster engine can be rolled out against real documents:
+
+    engine = VerifyingEngine(FAST, on_diff='log')
+    tables = get_tables('report.pdf', engine=engine)
+    engine.report()
+"""
+
+import json
+import logging
+import time
+
+import numpy
+
+from counter import Counter
+from tree import Histogram, _rounder
+from pdftables import (LEFT, RIGHT, TOP, BOTTOM, project_boxes,
+                       comb_from_projection, comb_from_dense_projection,
+                       dense_projection, apply_combs, rounded_histogram)
+
+STAGES = ['project_boxes', 'comb_from_projection', 'apply_combs',
+          'rounded_histogram']
+# Differing cells reported in a diff of two tables
+DIFF_CELLS = 20
+
+log = logging.getLogger(__name__)
+
+
+class ReferenceEngine(object):
+    """ The stages as pdftables implements them """
+    name = 'reference'
+
+    @staticmethod
+    def project_boxes(box_list, orientation, erosion=0):
+        return project_boxes(box_list, orientation, erosion)
+
+    @staticmethod
+    def comb_from_projection(projection, threshold, orientation):
+        return comb_from_projection(projection, threshold, orientation)
+
+    @staticmethod
+    def apply_combs(box_list, x_comb, y_comb):
+        return apply_combs(box_list, x_comb, y_comb)
+
+    @staticmethod
+    def rounded_histogram(box_list, dir_fun, tol):
+        return rounded_histogram(box_list, dir_fun, tol)
+
+
+def comb_indices(combarray, values):
+    """
+    comb for each of an array of values at once: the index of the interval
+    of the sorted combarray holding each value (the last one when a value
+    is on a tooth), or -1
+
+    comb_indices([0, 1, 2], [0.5, 1, 3])
+    array([ 0,  1, -1])
+    """
+    combarray = numpy.asarray(combarray, dtype=float)
+    values = numpy.asarray(values, dtype=float)
+    steps = numpy.diff(combarray)
+    if not ((steps >= 0).all() or (steps <= 0).all()):
+        raise Exception("comb: combarray is not sorted")
+    count = len(combarray)
+    index = numpy.full(len(values), -1, dtype=int)
+    if count < 2:
+        return index
+    if combarray[0] > combarray[-1]:
+        # of the intervals holding a value the last is the lowest
+        ascending = combarray[::-1]
+        lowest = numpy.maximum(
+            numpy.searchsorted(ascending, values, 'left') - 1, 0)
+        found = count - 2 - lowest
+        inside = (values <= combarray[0]) & (values >= combarray[-1])
+    else:
+        found = numpy.minimum(
+            numpy.searchsorted(combarray, values, 'right') - 1, count - 2)
+        inside = (values >= combarray[0]) & (values <= combarray[-1])
+    index[inside] = found[inside]
+    return index
+
+
+class FastEngine(object):
+    """
+    The stages on numpy arrays: projections are dense (origin, counts)
+    arrays built with a difference array, combs are derived from them
+    directly and boxes are allocated to cells by binary search.
+    """
+    name = 'fast'
+
+    @staticmethod
+    def project_boxes(box_list, orientation, erosion=0):
+        if orientation == "column":
+            upper, lower = RIGHT, LEFT
+        elif orientation == "row":
+            upper, lower = TOP, BOTTOM
+        lowers = numpy.array([box.bbox[lower] for box in box_list],
+                             dtype=float)
+        uppers = numpy.array([box.bbox[upper] for box in box_list],
+                             dtype=float)
+        # ensure some overlap
+        minv = int(round(lowers.min())) - 2
+        maxv = int(round(uppers.max())) + 2
+
+        starts = numpy.rint(lowers).astype(numpy.int64) + erosion - minv
+        stops = numpy.rint(uppers).astype(numpy.int64) - erosion - minv
+        spanning = starts < stops
+        edges = numpy.zeros(maxv - minv + 1, dtype=numpy.int64)
+        numpy.add.at(edges, starts[spanning], 1)
+        numpy.add.at(edges, stops[spanning], -1)
+        # every coordinate is counted once, as in project_boxes
+        return minv, numpy.cumsum(edges[:-1]) + 1
+
+    @staticmethod
+    def comb_from_projection(projection, threshold, orientation):
+        origin, counts = projection
+        return comb_from_dense_projection(origin, counts, threshold,
+                                          orientation)
+
+    @staticmethod
+    def apply_combs(box_list, x_comb, y_comb):
+        table_array = [[''] * (len(x_comb) - 1)
+                       for _ in range(len(y_comb) - 1)]
+        if not len(box_list):
+            return table_array
+        rows = comb_indices(y_comb, numpy.rint(
+            [box.midline for box in box_list])).tolist()
+        columns = comb_indices(x_comb, numpy.rint(
+            [box.centreline for box in box_list])).tolist()
+        for box, row, column in zip(box_list, rows, columns):
+            if row != -1 and column != -1:
+                table_array[row][column] += box.text.rstrip('\n\r')
+        return table_array
+
+    @staticmethod
+    def rounded_histogram(box_list, dir_fun, tol):
+        return Histogram(Counter(_rounder(dir_fun(box), tol)
+                                 for box in box_list))
+
+
+REFERENCE = ReferenceEngine()
+FAST = FastEngine()
+
+
+class EngineMismatch(Exception):
+    """ Engines disagreed; diff describes how """
+    def __init__(self, diff):
+        super(EngineMismatch, self).__init__(json.dumps(diff, default=str))
+        self.diff = diff
+
+
+def _dense(projection):
+    if isinstance(projection, Counter):
+        return dense_projection(projection)
+    return projection
+
+
+def _projection_diff(reference, candidate):
+    (origin, counts), (other_origin, other_counts) = (_dense(reference),
+                                                      _dense(candidate))
+    if origin == other_origin and numpy.array_equal(counts, other_counts):
+        return None
+    return dict(reference=dict(origin=origin, length=len(counts)),
+                candidate=dict(origin=other_origin,
+                               length=len(other_counts)),
+                differences=[
+                    dict(coordinate=origin + i, reference=int(a),
+                         candidate=int(b))
+                    for i, (a, b) in enumerate(zip(counts, other_counts))
+                    if a != b][:DIFF_CELLS])
+
+
+def _comb_diff(reference, candidate):
+    if list(reference) == list(candidate):
+        return None
+    return dict(reference=list(reference), candidate=list(candidate))
+
+
+def table_diff(reference, candidate):
+    """
+    None if two tables are the same, otherwise their shapes and the first
+    DIFF_CELLS differing cells
+    """
+    if reference == candidate:
+        return None
+    cells = []
+    for i, (row, other_row) in enumerate(zip(reference, candidate)):
+        for j, (cell, other_cell) in enumerate(zip(row, other_row)):
+            if cell != other_cell:
+                cells.append(dict(row=i, column=j, reference=cell,
+                                  candidate=other_cell))
+    shape = lambda table: [len(table), len(table[0]) if table else 0]
+    return dict(reference_shape=shape(reference),
+                candidate_shape=shape(candidate), cells=cells[:DIFF_CELLS],
+                differing_cells=len(cells))
+
+
+def _histogram_diff(reference, candidate):
+    if dict(reference) == dict(candidate):
+        return None
+    keys = sorted(set(reference) | set(candidate))
+    return dict(differences=[
+        dict(value=key, reference=reference.get(key, 0),
+             candidate=candidate.get(key, 0))
+        for key in keys
+        if reference.get(key, 0) != candidate.get(key, 0)][:DIFF_CELLS])
+
+
+class _Projections(object):
+    """ The reference and candidate projections of the same boxes """
+    def __init__(self, reference, candidate):
+        self.reference = reference
+        self.candidate = candidate
+
+
+class VerifyingEngine(object):
+    """
+    Run candidate alongside reference at every stage. With on_diff='raise'
+    the first difference raises EngineMismatch; with 'log' every one is
+    logged as JSON and kept in diffs. timings holds the seconds each engine
+    spent in each stage.
+    """
+    name = 'verify'
+
+    def __init__(self, candidate=FAST, reference=REFERENCE, on_diff='raise',
+                 logger=None):
+        if on_diff not in ('raise', 'log'):
+            raise ValueError("on_diff must be 'raise' or 'log'")
+        self.candidate = candidate
+        self.reference = reference
+        self.on_diff = on_diff
+        self.logger = logger or log
+        self.diffs = []
+        self.calls = Counter()
+        self.timings = dict(reference=Counter(), candidate=Counter())
+
+    def _run(self, stage, reference_args, candidate_args):
+        begin = time.time()
+        reference = getattr(self.reference, stage)(*reference_args)
+        middle = time.time()
+        candidate = getattr(self.candidate, stage)(*candidate_args)
+        end = time.time()
+        self.calls[stage] += 1
+        self.timings['reference'][stage] += middle - begin
+        self.timings['candidate'][stage] += end - middle
+        return reference, candidate
+
+    def _check(self, stage, diff, **context):
+        if diff is None:
+            return
+        diff = dict(stage=stage, reference_engine=self.reference.name,
+                    candidate_engine=self.candidate.name, **dict(diff,
+                                                                 **context))
+        self.diffs.append(diff)
+        if self.on_diff == 'raise':
+            raise EngineMismatch(diff)
+        self.logger.warning("engine mismatch %s",
+                            json.dumps(diff, default=str, sort_keys=True))
+
+    def project_boxes(self, box_list, orientation, erosion=0):
+        args = (box_list, orientation, erosion)
+        reference, candidate = self._run('project_boxes', args, args)
+        self._check('project_boxes', _projection_diff(reference, candidate),
+                    orientation=orientation, boxes=len(box_list))
+        return _Projections(reference, candidate)
+
+    def comb_from_projection(self, projection, threshold, orientation):
+        reference, candidate = self._run(
+            'comb_from_projection',
+            (projection.reference, threshold, orientation),
+            (projection.candidate, threshold, orientation))
+        self._check('comb_from_projection', _comb_diff(reference, candidate),
+                    orientation=orientation)
+        return reference
+
+    def apply_combs(self, box_list, x_comb, y_comb):
+        args = (box_list, x_comb, y_comb)
+        reference, candidate = self._run('apply_combs', args, args)
+        self._check('apply_combs', table_diff(reference, candidate),
+                    x_comb=list(x_comb), y_comb=list(y_comb))
+        return reference
+
+    def rounded_histogram(self, box_list, dir_fun, tol):
+        args = (box_list, dir_fun, tol)
+        reference, candidate = self._run('rounded_histogram', args, args)
+        self._check('rounded_histogram',
+                    _histogram_diff(reference, candidate), tol=tol)
+        return reference
+
+    def report(self):
+        """ Calls, seconds per engine and speedup for each stage run """
+        stages = []
+        for stage in STAGES:
+            if not self.calls[stage]:
+                continue
+            reference = self.timings['reference'][stage]
+            candidate = self.timings['candidate'][stage]
+            stages.append(dict(
+                stage=stage, calls=self.calls[stage],
+                reference_seconds=reference, candidate_seconds=candidate,
+                speedup=reference / candidate if candidate else None))
+        return dict(reference=self.reference.name,
+                    candidate=self.candidate.name, stages=stages,
+                    mismatches=len(self.diffs))
+
+
+ENGINES = {'reference': REFERENCE, 'fast': FAST}
+
+
+def get_engine(name):
+    """ The engine called name; 'verify' is a new VerifyingEngine of FAST """
+    if name == 'verify':
+        return VerifyingEngine()
+    try:
+        return ENGINES[name]
+    except KeyError:
+        raise ValueError("unknown engine {0!r}, use one of {1}".format(
+            name, ', '.join(sorted(ENGINES) + ['verify'])))
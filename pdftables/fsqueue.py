@@ -0,0 +1,319 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+A work queue kept in a directory on a filesystem shared by several machines
+(such as an NFS mount), so extraction can be spread over them with nothing
+but the filesystem.
+
+    queue = WorkQueue('/shared/batch')
+    queue.add_document('/shared/in/report.pdf', pages_per_task=50)
+
+then on every machine, as many times as there are cores:
+
+    WorkQueue('/shared/batch').run()
+
+and once all the tasks are done (finished() is True):
+
+    tables = WorkQueue('/shared/batch').merge()
+
+A worker claims a task by hard linking a claim file into place, which is
+atomic on NFS, and keeps the claim alive by touching it. A claim not
+touched for lease seconds is taken over, so the work of a crashed machine
+is done again elsewhere. Each task writes its own result file, and merge
+puts the documents back together.
+"""
+
+import collections
+import errno
+import hashlib
+import itertools
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+
+from pdfminer.pdfpage import PDFPage
+
+from pdftables import (open_pdf, initialize_pdf_miner, _extract_page,
+                       _TableAssembler, _PageResult)
+
+# Seconds a claim lasts without being renewed
+LEASE_SECONDS = 60
+# Seconds an idle worker waits before looking for work again
+POLL_SECONDS = 1
+
+Task = collections.namedtuple('Task', 'id file start stop password token')
+
+
+def extract_task(task):
+    """
+    Extract the pages of a task, as JSON serialisable page dicts, with the
+    number of pages in the whole document
+    """
+    with open_pdf(task.file) as stream:
+        doc, interpreter, device = initialize_pdf_miner(stream, task.password)
+        page_cache = {}
+        font_digests = {}
+        pages = []
+        page_total = 0
+        for i, pdf_page in enumerate(PDFPage.create_pages(doc)):
+            page_total = i + 1
+            if i >= task.start and (task.stop is None or i < task.stop):
+                pages.append(_extract_page(
+                    pdf_page, i, interpreter, device, page_cache,
+                    font_digests=font_digests)._asdict())
+        return dict(pages=pages, page_total=page_total)
+
+
+class WorkQueue(object):
+    """
+    Tasks (a document or a range of its pages) in the directory root, with
+    claims, results and failures in subdirectories of it. node names this
+    worker in its claims; it defaults to the host name and process id.
+    """
+    def __init__(self, root, lease=LEASE_SECONDS, node=None):
+        self.root = root
+        self.lease = lease
+        self.node = node or '{0}-{1}'.format(socket.gethostname(), os.getpid())
+        for name in ('tasks', 'claims', 'results', 'failed', 'tmp'):
+            try:
+                os.makedirs(self._path(name))
+            except OSError as error:
+                if error.errno != errno.EEXIST:
+                    raise
+
+    def _path(self, *parts):
+        return os.path.join(self.root, *parts)
+
+    def _write_tmp(self, data):
+        """ Write data to a new, uniquely named file in tmp """
+        name = self._path('tmp', '{0}-{1}'.format(self.node, uuid.uuid4().hex))
+        with open(name, 'w') as file_ptr:
+            json.dump(data, file_ptr)
+        return name
+
+    def _write(self, path, data):
+        """ Write a JSON file so that readers never see it half written """
+        os.rename(self._write_tmp(data), path)
+
+    @staticmethod
+    def _read(path):
+        with open(path) as file_ptr:
+            return json.load(file_ptr)
+
+    def add(self, file_location, start=0, stop=None, password=""):
+        """
+        Add a task for the pages start:stop of a document, returning its id.
+        Adding the same pages again does nothing.
+        """
+        file_location = os.path.abspath(file_location)
+        task_id = hashlib.sha1(json.dumps(
+            [file_location, start, stop]).encode('utf-8')).hexdigest()[:20]
+        path = self._path('tasks', task_id + '.json')
+        if not os.path.exists(path):
+            self._write(path, dict(file=file_location, start=start,
+                                   stop=stop, password=password))
+        return task_id
+
+    def add_document(self, file_location, password="", pages_per_task=None):
+        """ Add tasks covering a whole document, pages_per_task at a time """
+        if pages_per_task is None:
+            return [self.add(file_location, password=password)]
+        with open_pdf(file_location) as stream:
+            doc, _, _ = initialize_pdf_miner(stream, password)
+            page_count = sum(1 for _ in PDFPage.create_pages(doc))
+        return [self.add(file_location, start,
+                         min(start + pages_per_task, page_count), password)
+                for start in range(0, max(page_count, 1), pages_per_task)]
+
+    def task_ids(self):
+        return sorted(name[:-len('.json')]
+                      for name in os.listdir(self._path('tasks'))
+                      if name.endswith('.json'))
+
+    def _ended(self, task_id):
+        return (os.path.exists(self._path('results', task_id + '.json')) or
+                os.path.exists(self._path('failed', task_id + '.json')))
+
+    def _claim_path(self, task_id):
+        return self._path('claims', task_id + '.lease')
+
+    def _try_claim(self, task_id):
+        """ Atomically create the claim file, returning its token or None """
+        token = uuid.uuid4().hex
+        tmp = self._write_tmp(dict(node=self.node, token=token))
+        try:
+            os.link(tmp, self._claim_path(task_id))
+        except OSError as error:
+            if error.errno != errno.EEXIST:
+                raise
+            return None
+        finally:
+            os.unlink(tmp)
+        return token
+
+    def _expired(self, path):
+        try:
+            return os.stat(path).st_mtime + self.lease < time.time()
+        except OSError:  # released meanwhile
+            return False
+
+    def _take_over(self, task_id):
+        """
+        Remove an expired claim. Renaming it away is atomic, so only one
+        worker gets it; one renewed in the meantime is put back.
+        """
+        claim = self._claim_path(task_id)
+        moved = self._path('tmp', '{0}-{1}'.format(self.node,
+                                                   uuid.uuid4().hex))
+        try:
+            os.rename(claim, moved)
+        except OSError:
+            return
+        if not self._expired(moved):
+            try:
+                os.link(moved, claim)
+            except OSError:
+                pass
+        os.unlink(moved)
+
+    def claim(self):
+        """ Claim a task which is not done, or return None """
+        for task_id in self.task_ids():
+            if self._ended(task_id):
+                continue
+            if self._expired(self._claim_path(task_id)):
+                self._take_over(task_id)
+            token = self._try_claim(task_id)
+            if token is None:
+                continue
+            if self._ended(task_id):  # finished while we looked
+                self._release(task_id, token)
+                continue
+            task = self._read(self._path('tasks', task_id + '.json'))
+            return Task(task_id, task['file'], task['start'], task['stop'],
+                        task['password'], token)
+        return None
+
+    def holds(self, task):
+        """ Whether the claim on task is still this worker's """
+        try:
+            return self._read(self._claim_path(task.id))['token'] == task.token
+        except (IOError, OSError, ValueError):
+            return False
+
+    def renew(self, task):
+        """ Extend the lease on task, returning False if it was lost """
+        if not self.holds(task):
+            return False
+        os.utime(self._claim_path(task.id), None)
+        return True
+
+    def _release(self, task_id, token):
+        try:
+            if self._read(self._claim_path(task_id))['token'] == token:
+                os.unlink(self._claim_path(task_id))
+        except (IOError, OSError, ValueError):
+            pass
+
+    def complete(self, task, result):
+        """ Store the JSON serialisable result of task and release it """
+        self._write(self._path('results', task.id + '.json'),
+                    dict(file=task.file, start=task.start, result=result))
+        self._release(task.id, task.token)
+
+    def fail(self, task, error):
+        """ Record that task cannot be done, so it is not tried again """
+        self._write(self._path('failed', task.id + '.json'),
+                    dict(file=task.file, start=task.start, node=self.node,
+                         error=repr(error)))
+        self._release(task.id, task.token)
+
+    def finished(self):
+        return all(self._ended(task_id) for task_id in self.task_ids())
+
+    def failures(self):
+        """ The failure records, keyed by task id """
+        return dict((name[:-len('.json')],
+                     self._read(self._path('failed', name)))
+                    for name in os.listdir(self._path('failed'))
+                    if name.endswith('.json'))
+
+    def _keep_alive(self, task, stop):
+        while not stop.wait(self.lease / 3.0):
+            if not self.renew(task):
+                return
+
+    def run(self, process=extract_task, poll=POLL_SECONDS):
+        """
+        Claim and process tasks until every task in the queue is done or has
+        failed, waiting for those claimed by other workers. process takes a
+        Task and returns a JSON serialisable result. Returns the number of
+        tasks this worker did.
+        """
+        count = 0
+        while True:
+            task = self.claim()
+            if task is None:
+                if self.finished():
+                    return count
+                time.sleep(poll)
+                continue
+            stop = threading.Event()
+            keeper = threading.Thread(target=self._keep_alive,
+                                      args=(task, stop))
+            keeper.daemon = True
+            keeper.start()
+            try:
+                result = process(task)
+            except Exception as error:
+                self.fail(task, error)
+                continue
+            finally:
+                stop.set()
+                keeper.join()
+            self.complete(task, result)
+            count += 1
+
+    def results(self):
+        """ The result of every task done, keyed by task id """
+        return dict((name[:-len('.json')],
+                     self._read(self._path('results', name))['result'])
+                    for name in os.listdir(self._path('results'))
+                    if name.endswith('.json'))
+
+    def merge(self, compact=False, stats=None):
+        """
+        Put the results of extract_task back together, returning a dict of
+        the tables of each document, keyed by path. Only documents whose
+        tasks are all done and cover every page are merged; those with a
+        failed task (see failures) or one still to do are left out.
+        """
+        task_ids = collections.defaultdict(list)
+        for task_id in self.task_ids():
+            task = self._read(self._path('tasks', task_id + '.json'))
+            task_ids[task['file']].append(task_id)
+        tables = {}
+        for file_location, ids in sorted(task_ids.items()):
+            pages = {}  # page index: page dict
+            page_total = None
+            for task_id in ids:
+                path = self._path('results', task_id + '.json')
+                if not os.path.exists(path):
+                    break
+                shard = self._read(path)
+                page_total = shard['result']['page_total']
+                pages.update(enumerate(shard['result']['pages'],
+                                       shard['start']))
+            else:
+                if sorted(pages) != list(range(page_total)):
+                    continue
+                assembler = _TableAssembler(page_total, compact, stats=stats)
+                tables[file_location] = [
+                    table for i in range(page_total)
+                    for table in assembler.page_tables(
+                        i, _PageResult(**pages[i]))]
+        return tables
@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Multi-pattern search for hint strings (anchors) in the text of a page. All
+patterns are compiled once into an Aho-Corasick automaton, so each box's
+text is scanned once however many anchors there are.
+"""
+
+import collections
+
+HintMatch = collections.namedtuple('HintMatch', 'pattern start box')
+
+
+class HintMatcher(object):
+    """
+    Find every occurrence of a set of patterns. Build one matcher for a batch
+    of documents and scan each page with it.
+
+    matcher = HintMatcher(["% Change", "15.67%"])
+    matcher.search("Price % Change")
+    [(6, '% Change')]
+    """
+    def __init__(self, patterns):
+        self.patterns = frozenset(pattern for pattern in patterns if pattern)
+        # state 0 is the root; goto maps a character to the next state
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [()]
+        for pattern in sorted(self.patterns):
+            state = 0
+            for char in pattern:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append(())
+                    self._goto[state][char] = next_state
+                state = next_state
+            self._out[state] = (pattern,)
+        self._link()
+
+    def _link(self):
+        """ Set the failure links breadth first, merging their outputs """
+        queue = collections.deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                fail = self._goto[fail].get(char, 0)
+                self._fail[next_state] = fail
+                self._out[next_state] += self._out[fail]
+
+    def search(self, text):
+        """ (start, pattern) for each occurrence in text, in order of start """
+        found = []
+        state = 0
+        for end, char in enumerate(text):
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            for pattern in self._out[state]:
+                found.append((end - len(pattern) + 1, pattern))
+        found.sort()
+        return found
+
+    def scan(self, box_list):
+        """ A HintMatch for each occurrence, in the order of box_list """
+        return [HintMatch(pattern, start, box)
+                for box in box_list
+                for start, pattern in self.search(box.text)]
+
+
+def first_matches(matches):
+    """ The first HintMatch of each pattern """
+    first = {}
+    for match in matches:
+        first.setdefault(match.pattern, match)
+    return first
@@ -0,0 +1,138 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Incremental re-extraction of documents republished with pages added or
+changed by incremental updates. A RevisionStore remembers, for each
+document, the object id and content fingerprint of every page already
+processed along with its tables; the next run of get_tables with the store
+only extracts the pages which are new or changed.
+
+    store = RevisionStore('/var/cache/pdftables')
+    tables = get_tables('bulletin.pdf', revisions=store)
+
+A document is identified by the first (permanent) element of the /ID in its
+trailer, which incremental updates keep. Documents without one are always
+extracted in full.
+"""
+
+import binascii
+import errno
+import hashlib
+import json
+import os
+import uuid
+
+import numpy
+from pdfminer.pdftypes import resolve1
+
+from pagescan import content_fingerprint
+
+
+def document_identity(doc):
+    """ The permanent identifier of a PDFDocument, as hex, or None """
+    for xref in doc.xrefs:
+        identifier = resolve1(getattr(xref, 'trailer', {}).get('ID'))
+        if isinstance(identifier, list) and identifier:
+            permanent = resolve1(identifier[0])
+            if isinstance(permanent, str):
+                permanent = permanent.encode('latin-1')
+            if isinstance(permanent, bytes) and permanent:
+                return binascii.hexlify(permanent).decode('ascii')
+    return None
+
+
+def _scalar(value):
+    """ numpy numbers in combs are stored as numbers """
+    if isinstance(value, numpy.generic):
+        return value.item()
+    raise TypeError("{0!r} is not JSON serializable".format(value))
+
+
+class Revision(object):
+    """
+    The stored pages of one document for one set of options, and the pages
+    of the current run, which replace them when saved
+    """
+    def __init__(self, path, identity, pages):
+        self.path = path
+        self.identity = identity
+        self.stored = pages
+        self.pages = {}
+        self.reused = 0
+        # the document's fonts are each hashed once for all its pages
+        self.font_digests = {}
+
+    def page_key(self, pdf_page, crop, carried):
+        """
+        A page is reused only with the same object id, content, crop and
+        column comb carried over from the page before
+        """
+        return json.dumps([pdf_page.pageid,
+                           content_fingerprint(pdf_page, self.font_digests),
+                           crop, carried], default=_scalar)
+
+    def get(self, key):
+        """ The stored (skipped, tables, first_x_comb, x_comb) or None """
+        page = self.stored.get(key)
+        if page is not None:
+            self.pages[key] = page
+            self.reused += 1
+            return (page['skipped'], page['tables'], page['first_x_comb'],
+                    page['x_comb'])
+        return None
+
+    def put(self, key, skipped, tables, first_x_comb, x_comb):
+        self.pages[key] = dict(skipped=skipped,
+                               tables=[list(table) for table in tables],
+                               first_x_comb=first_x_comb, x_comb=x_comb)
+
+
+class RevisionStore(object):
+    """
+    Pages processed per document, one JSON file each in directory. Pages
+    are kept per set of options (rulings, split_regions, templates, atomise
+    and engine) since they change the tables found; the crop is part of
+    each page's key.
+    """
+    def __init__(self, directory):
+        self.directory = directory
+        try:
+            os.makedirs(directory)
+        except OSError as error:
+            if error.errno != errno.EEXIST:
+                raise
+
+    def _path(self, identity, options):
+        key = json.dumps([identity, options], sort_keys=True)
+        name = hashlib.sha1(key.encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, name + '.json')
+
+    def open(self, doc, options):
+        """
+        The Revision of a PDFDocument for options (a JSON serialisable
+        dict), or None if the document has no identity
+        """
+        identity = document_identity(doc)
+        if identity is None:
+            return None
+        path = self._path(identity, options)
+        try:
+            with open(path) as file_ptr:
+                pages = json.load(file_ptr)['pages']
+        except (IOError, OSError, ValueError, KeyError):
+            pages = {}
+        return Revision(path, identity, pages)
+
+    def save(self, revision):
+        """ Keep the pages of the run just done, dropping the others """
+        tmp = '{0}.{1}.tmp'.format(revision.path, uuid.uuid4().hex)
+        with open(tmp, 'w') as file_ptr:
+            json.dump(dict(identity=revision.identity, pages=revision.pages),
+                      file_ptr, default=_scalar)
+        os.rename(tmp, revision.path)
+
+    def clear(self):
+        for name in os.listdir(self.directory):
+            if name.endswith('.json'):
+                os.unlink(os.path.join(self.directory, name))
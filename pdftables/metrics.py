@@ -0,0 +1,332 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Operational metrics for pdftables running as a service or batch worker,
+in the Prometheus text format. Pass a MetricsRegistry to get_tables (or
+Extractor.get_tables) and it counts documents, pages, tables, skipped
+pages, errors and timeouts, and times every page and each stage of it.
+Without a registry nothing is measured.
+
+    registry = MetricsRegistry()
+    serve(registry, port=9464)          # http://127.0.0.1:9464/metrics
+    tables = get_tables('report.pdf', metrics=registry)
+
+or, for node-exporter's textfile collector:
+
+    with TextfileExporter(registry, '/var/lib/node_exporter/pdftables.prom'):
+        for file_name in batch:
+            get_tables(file_name, metrics=registry)
+
+The stages of a page are prescan (fingerprint and text checks), interpret
+(pdfminer, including the check for tables), layout (Leaf extraction) and
+inference; a duplicate page only has the page latency. Resident memory is
+read when the metrics are rendered, and cache sizes are set by the calls
+which use the caches.
+"""
+
+import bisect
+import os
+import socket
+import sys
+import threading
+import time
+
+from counter import Counter
+
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+except ImportError:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+try:
+    TIMEOUT_ERRORS = (TimeoutError, socket.timeout)
+except NameError:
+    TIMEOUT_ERRORS = (socket.timeout,)
+
+PREFIX = 'pdftables_'
+# Upper bounds, in seconds, of the latency histogram buckets
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0, 30.0)
+METRICS_PORT = 9464
+# Seconds between writes of a TextfileExporter
+TEXTFILE_SECONDS = 15
+
+COUNTERS = [
+    ('documents', "Documents processed"),
+    ('pages', "Pages processed"),
+    ('tables', "Tables found"),
+    ('skipped_pages', "Pages skipped without interpretation"),
+    ('errors', "Documents which failed, timeouts included"),
+    ('timeouts', "Documents which failed by timing out"),
+]
+HISTOGRAMS = {
+    'stage_seconds': "Time taken by each stage of a page",
+    'page_seconds': "Time taken by each page",
+}
+GAUGES = {
+    'resident_memory_bytes': "Resident memory of this process",
+    'cache_entries': "Entries in each cache",
+}
+
+
+def resident_memory():
+    """ This process's resident set size in bytes, or its peak if unknown """
+    try:
+        with open('/proc/self/statm') as file_ptr:
+            pages = int(file_ptr.read().split()[1])
+        return pages * os.sysconf('SC_PAGE_SIZE')
+    except (IOError, OSError, ValueError, IndexError):
+        pass
+    if resource is None:
+        return None
+    # kilobytes on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def _labels(labels, **extra):
+    """
+    Prometheus label text of a sorted tuple of (name, value) pairs
+
+    _labels((('stage', 'layout'),), le='0.5')
+    '{stage="layout",le="0.5"}'
+    """
+    pairs = list(labels) + sorted(extra.items())
+    if not pairs:
+        return ''
+    return '{' + ','.join(
+        '{0}="{1}"'.format(name, str(value).replace('\\', '\\\\')
+                           .replace('"', '\\"').replace('\n', '\\n'))
+        for name, value in pairs) + '}'
+
+
+def _number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _PageTimer(object):
+    """ Times the stages of one page as they finish, then the page """
+    __slots__ = ('registry', 'start', 'last')
+
+    def __init__(self, registry):
+        self.registry = registry
+        self.start = self.last = time.time()
+
+    def lap(self, stage):
+        now = time.time()
+        self.registry.observe('stage_seconds', now - self.last, stage=stage)
+        self.last = now
+
+    def resume(self):
+        """ Time the next stage from now, leaving out a wait in a queue """
+        self.last = time.time()
+
+    def done(self):
+        self.registry.observe('page_seconds', time.time() - self.start)
+
+
+class _NullTimer(object):
+    """ The timer of a page when there is no registry """
+    __slots__ = ()
+
+    def lap(self, stage):
+        pass
+
+    def resume(self):
+        pass
+
+    def done(self):
+        pass
+
+
+NULL_TIMER = _NullTimer()
+
+
+class MetricsRegistry(object):
+    """
+    Counters, latency histograms and gauges, safe to update from several
+    threads. Counters are named as in COUNTERS and exported with a _total
+    suffix; histograms and gauges may have labels.
+    """
+    def __init__(self, prefix=PREFIX, buckets=LATENCY_BUCKETS):
+        self.prefix = prefix
+        self.buckets = tuple(float(bound) for bound in buckets)
+        self.counters = Counter()
+        self.histograms = {}  # (name, labels): [bucket counts, sum, count]
+        self.gauges = {}  # (name, labels): value
+        self.gauge_functions = {}  # (name, labels): function giving value
+        self._lock = threading.Lock()
+        self.register_gauge('resident_memory_bytes', resident_memory)
+
+    def incr(self, name, value=1):
+        with self._lock:
+            self.counters[name] += value
+
+    def observe(self, name, seconds, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        bucket = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = [
+                    [0] * (len(self.buckets) + 1), 0.0, 0]
+            histogram[0][bucket] += 1
+            histogram[1] += seconds
+            histogram[2] += 1
+
+    def set_gauge(self, name, value, **labels):
+        with self._lock:
+            self.gauges[(name, tuple(sorted(labels.items())))] = value
+
+    def register_gauge(self, name, function, **labels):
+        """ A gauge whose value is function(), called when rendering """
+        with self._lock:
+            self.gauge_functions[(name, tuple(sorted(labels.items())))] = \
+                function
+
+    def page_timer(self):
+        return _PageTimer(self)
+
+    def record_error(self, error):
+        self.incr('errors')
+        if isinstance(error, TIMEOUT_ERRORS):
+            self.incr('timeouts')
+
+    def render(self):
+        """ Every metric in the Prometheus text exposition format """
+        with self._lock:
+            counters = dict(self.counters)
+            histograms = dict((key, (list(counts), total, count))
+                              for key, (counts, total, count)
+                              in self.histograms.items())
+            gauges = dict(self.gauges)
+            functions = list(self.gauge_functions.items())
+        for key, function in functions:
+            value = function()
+            if value is not None:
+                gauges[key] = value
+
+        lines = []
+
+        def header(name, kind, text):
+            lines.append('# HELP {0}{1} {2}'.format(self.prefix, name, text))
+            lines.append('# TYPE {0}{1} {2}'.format(self.prefix, name, kind))
+
+        for name, text in COUNTERS:
+            header(name + '_total', 'counter', text)
+            lines.append('{0}{1}_total {2}'.format(
+                self.prefix, name, _number(counters.get(name, 0))))
+
+        for name in sorted(set(key[0] for key in histograms)):
+            header(name, 'histogram', HISTOGRAMS.get(name, name))
+            for key in sorted(key for key in histograms if key[0] == name):
+                counts, total, count = histograms[key]
+                labels = key[1]
+                cumulative = 0
+                for bound, bucket in zip(self.buckets + (float('inf'),),
+                                         counts):
+                    cumulative += bucket
+                    lines.append('{0}{1}_bucket{2} {3}'.format(
+                        self.prefix, name,
+                        _labels(labels, le=_number(bound)), cumulative))
+                lines.append('{0}{1}_sum{2} {3}'.format(
+                    self.prefix, name, _labels(labels), _number(total)))
+                lines.append('{0}{1}_count{2} {3}'.format(
+                    self.prefix, name, _labels(labels), count))
+
+        for name in sorted(set(key[0] for key in gauges)):
+            header(name, 'gauge', GAUGES.get(name, name))
+            for key in sorted(key for key in gauges if key[0] == name):
+                lines.append('{0}{1}{2} {3}'.format(
+                    self.prefix, name, _labels(key[1]),
+                    _number(gauges[key])))
+        return '\n'.join(lines) + '\n'
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] not in ('/', '/metrics'):
+            self.send_error(404)
+            return
+        body = self.server.registry.render().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type',
+                         'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class _MetricsServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+def serve(registry, port=METRICS_PORT, address='127.0.0.1'):
+    """
+    Serve registry at /metrics on a daemon thread. Returns the server; call
+    its shutdown() to stop. Port 0 picks a free port, in server_address.
+    """
+    server = _MetricsServer((address, port), _MetricsHandler)
+    server.registry = registry
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    return server
+
+
+class TextfileExporter(object):
+    """
+    Write registry to path every interval seconds, for node-exporter's
+    textfile collector, and once more when stopped. Each write replaces
+    the file atomically so the collector never reads half of one.
+    """
+    def __init__(self, registry, path, interval=TEXTFILE_SECONDS):
+        self.registry = registry
+        self.path = path
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def write(self):
+        # not ending in .prom, so the collector ignores it until renamed
+        tmp = '{0}.{1}.tmp'.format(self.path, os.getpid())
+        with open(tmp, 'w') as file_ptr:
+            file_ptr.write(self.registry.render())
+        os.rename(tmp, self.path)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.write()
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.write()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
@@ -0,0 +1,232 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Cheap inspection of a PDFPage before it goes through the interpreter
+"""
+
+import hashlib
+import re
+
+from pdfminer.pdfinterp import LITERAL_FORM, LITERAL_IMAGE
+from pdfminer.pdftypes import PDFObjRef, PDFStream, resolve1
+
+# How deep to follow form XObjects drawn inside each other
+FORM_DEPTH = 8
+
+# Text showing operators as content stream tokens, ended by whitespace or
+# any PDF delimiter. A match inside a string or image data only means the
+# page is interpreted as usual.
+_TEXT_OPERATOR = re.compile(
+    br"""(?:^|(?<=[\s)\]>]))(?:Tj|TJ|'|")(?=[\s()<>\[\]{}/%]|$)""")
+_INLINE_IMAGE = re.compile(br"(?:^|(?<=\s))BI(?=\s)")
+
+
+def page_content(pdf_page):
+    """ The decoded content stream bytes of a page, concatenated """
+    data = []
+    for stream in pdf_page.contents:
+        stream = resolve1(stream)
+        if isinstance(stream, PDFStream):
+            data.append(stream.get_data())
+    return b'\n'.join(data)
+
+
+def content_length(pdf_page):
+    """
+    The stored (usually compressed) length of a page's content streams, a
+    cheap estimate of how long the page takes to interpret
+    """
+    length = 0
+    for stream in pdf_page.contents:
+        stream = resolve1(stream)
+        if isinstance(stream, PDFStream):
+            data = stream.get_rawdata()
+            if data is None:
+                data = stream.get_data()  # already decoded
+            length += len(data)
+    return length
+
+
+def _digest_object(digest, obj, seen, font_digests=None):
+    """
+    Feed a PDF object into a hash. References are followed, not hashed by
+    object number, so identical pages in different files hash the same;
+    seen is as for _digest_font. Form XObjects contain text so their
+    content is included, and fonts decide the text read from it, so they
+    are hashed whole (see _digest_fonts). Other stream data (images) is
+    represented by the stream dictionary.
+    """
+    if isinstance(obj, PDFObjRef):
+        if obj.objid in seen:
+            digest.update('@{0}'.format(seen[obj.objid]).encode('utf-8'))
+            return
+        seen[obj.objid] = len(seen)
+        obj = resolve1(obj)
+    if isinstance(obj, PDFStream):
+        _digest_object(digest, obj.attrs, seen, font_digests)
+        if obj.get('Subtype') is LITERAL_FORM:
+            digest.update(obj.get_data())
+    elif isinstance(obj, dict):
+        digest.update(b'<<')
+        for key in sorted(obj):
+            digest.update(repr(key).encode('utf-8'))
+            if key == 'Font':
+                _digest_fonts(digest, obj[key], font_digests)
+            else:
+                _digest_object(digest, obj[key], seen, font_digests)
+        digest.update(b'>>')
+    elif isinstance(obj, (list, tuple)):
+        digest.update(b'[')
+        for item in obj:
+            _digest_object(digest, item, seen, font_digests)
+        digest.update(b']')
+    else:
+        digest.update(repr(obj).encode('utf-8'))
+
+
+def _digest_fonts(digest, fonts, font_digests=None):
+    """
+    Feed a Font resource dictionary into a hash, with the digest of each
+    font from _digest_font. font_digests maps the object ids of the fonts
+    of one document to their digests, so a font used on many pages is only
+    hashed once.
+    """
+    fonts = resolve1(fonts)
+    if not isinstance(fonts, dict):
+        _digest_font(digest, fonts, {})
+        return
+    digest.update(b'<<')
+    for name in sorted(fonts):
+        digest.update(repr(name).encode('utf-8'))
+        font = fonts[name]
+        objid = font.objid if isinstance(font, PDFObjRef) else None
+        font_digest = None
+        if font_digests is not None and objid is not None:
+            font_digest = font_digests.get(objid)
+        if font_digest is None:
+            font_hash = hashlib.sha1()
+            _digest_font(font_hash, font, {})
+            font_digest = font_hash.digest()
+            if font_digests is not None and objid is not None:
+                font_digests[objid] = font_digest
+        digest.update(font_digest)
+    digest.update(b'>>')
+
+
+def _digest_font(digest, obj, seen):
+    """
+    Feed a font object into a hash with the whole of its subtree, stream
+    data included: descendant fonts, descriptors, embedded programs, widths,
+    encodings and ToUnicode maps. seen maps the object numbers met so far to
+    the order they were met in, which is hashed for an object met again.
+    """
+    if isinstance(obj, PDFObjRef):
+        if obj.objid in seen:
+            digest.update('@{0}'.format(seen[obj.objid]).encode('utf-8'))
+            return
+        seen[obj.objid] = len(seen)
+        obj = resolve1(obj)
+    if isinstance(obj, PDFStream):
+        _digest_font(digest, obj.attrs, seen)
+        digest.update(obj.get_data())
+    elif isinstance(obj, dict):
+        digest.update(b'<<')
+        for key in sorted(obj):
+            digest.update(repr(key).encode('utf-8'))
+            _digest_font(digest, obj[key], seen)
+        digest.update(b'>>')
+    elif isinstance(obj, (list, tuple)):
+        digest.update(b'[')
+        for item in obj:
+            _digest_font(digest, item, seen)
+        digest.update(b']')
+    else:
+        digest.update(repr(obj).encode('utf-8'))
+
+
+def content_fingerprint(pdf_page, font_digests=None):
+    """
+    Fingerprint a page from its content stream bytes, its resources and its
+    geometry. Pages with the same fingerprint give the same tables. Pass
+    the same font_digests dict for every page of one document, and only
+    that document, to hash each of its fonts once.
+    """
+    digest = hashlib.sha1()
+    digest.update(page_content(pdf_page))
+    _digest_object(digest, pdf_page.resources, {}, font_digests)
+    _digest_object(digest, [pdf_page.mediabox, pdf_page.cropbox,
+                            pdf_page.rotate], {})
+    return digest.hexdigest()
+
+
+def font_fingerprint(spec):
+    """
+    Fingerprint a font dictionary together with everything it refers to,
+    so the same font embedded in different documents can share one parsed
+    font object.
+    """
+    digest = hashlib.sha1()
+    _digest_font(digest, spec, {})
+    return digest.hexdigest()
+
+
+def _xobjects(resources):
+    """ The XObject streams in a resource dictionary """
+    resources = resolve1(resources)
+    if not isinstance(resources, dict):
+        return
+    xobjects = resolve1(resources.get('XObject'))
+    if not isinstance(xobjects, dict):
+        return
+    for xobject in xobjects.values():
+        xobject = resolve1(xobject)
+        if isinstance(xobject, PDFStream):
+            yield xobject
+
+
+def _content_kinds(content, resources, depth, seen):
+    """
+    The kinds of content ('text', 'image', 'graphics') in a content stream
+    and the form XObjects it can draw. Anything too deeply nested to look
+    at is assumed to be text.
+    """
+    if depth <= 0 or _TEXT_OPERATOR.search(content):
+        return set(['text'])
+    kinds = set()
+    if content.strip():
+        kinds.add('graphics')
+    if _INLINE_IMAGE.search(content):
+        kinds.add('image')
+    for xobject in _xobjects(resources):
+        if id(xobject) in seen:
+            continue
+        seen.add(id(xobject))
+        subtype = xobject.get('Subtype')
+        if subtype is LITERAL_IMAGE:
+            kinds.add('image')
+        elif subtype is LITERAL_FORM:
+            kinds |= _content_kinds(xobject.get_data(),
+                                    xobject.get('Resources', resources),
+                                    depth - 1, seen)
+    return kinds
+
+
+def text_free_reason(pdf_page):
+    """
+    Check the content stream tokens and resources of a page, without
+    interpreting it, for text showing operators. Returns None if the page
+    may contain text, otherwise why it cannot hold a text table: 'empty',
+    'image_only' (scanned pages) or 'no_text' (figures and rules only).
+    Font resources are not used, as pages often share a resource dictionary
+    which lists fonts they never show.
+    """
+    kinds = _content_kinds(page_content(pdf_page), pdf_page.resources,
+                           FORM_DEPTH, set())
+    if 'text' in kinds:
+        return None
+    if 'image' in kinds:
+        return 'image_only'
+    if 'graphics' in kinds:
+        return 'no_text'
+    return 'empty'
@@ -11,7 +11,14 @@ http://denis.papathanasiou.org/2010/08/04/extracting-text-images-from-pdf-files
 """
 
 import argparse
+import bisect
+import collections
+import contextlib
+import io
 import math
+import mmap
+import os
+import threading
 import numpy
 
 from display import to_string
@@ -20,21 +27,54 @@ from pdfminer.pdfdocument import PDFDocument
 from pdfminer.pdfpage import PDFPage
 
 from pdfminer.pdfinterp import PDFResourceManager, PDFPageInterpreter
-from pdfminer.pdfdevice import PDFDevice
 from pdfminer.layout import LAParams, LTPage
-from pdfminer.converter import PDFPageAggregator
 
 
 from tree import Leaf, LeafList
 from counter import Counter
+from compact import CompactTable, rows_to_crop
+from templates import (page_fingerprint, column_comb_fit, FIT_THRESHOLD,
+                       FIT_TOLERANCE)
+from pagescan import content_fingerprint, text_free_reason
+from device import CroppingPageAggregator, crop_for_page
+from rulings import ruling_grid, RULING_CLASSES
+from hints import HintMatcher, first_matches
+from backends import LayoutPage
+from diagnostics import TableDiagnosticData
+from metrics import NULL_TIMER
 
 IS_TABLE_COLUMN_COUNT_THRESHOLD = 3
 IS_TABLE_ROW_COUNT_THRESHOLD = 3
+# Table rows further apart than this many row spacings start a new region
+REGION_GAP_FACTOR = 3
+# Regions with fewer table rows are dropped when a page has several
+REGION_MIN_ROWS = 2
+# Boxes text is allocated to cells from when atomising: characters, or words
+# with atomise='words'
+ATOM_CLASSES = ['LTChar', 'LTWord']
+# With atomise='words' characters further apart than this fraction of the
+# modal character width start a new word
+WORD_GAP_FACTOR = 0.3
+# Projection counts above which a coordinate is inside a column or a row; for
+# LTTextLineHorizontal column and row thresholds of 3 work ok
+COLUMN_THRESHOLD = 5
+ROW_THRESHOLD = 3
 LEFT = 0
 TOP = 3
 RIGHT = 2
 BOTTOM = 1
 
+try:
+    STRING_TYPES = (basestring,)
+except NameError:
+    STRING_TYPES = (str, bytes)
+PATH_TYPES = (os.PathLike,) if hasattr(os, 'PathLike') else ()
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
 class Table(list):
     """ Hold a table definition """
     def __init__(self, content, page, table):
@@ -43,61 +83,510 @@ class Table(list):
         self.total_pages = page["page_total"]
         self.table_number_on_page = table["table_index"]
         self.total_tables_on_page = table["table_index_total"]
-
-def get_tables(file_location, password):
+        self.logical_table_number = table.get("logical_table")
+        self.continues_previous = table.get("continuation", False)
+
+def get_tables(file_location, password="", compact=False, templates=None,
+               carry_comb=False, page_cache=None, stats=None, crop=None,
+               rulings=False, split_regions=False, threads=1,
+               revisions=None, backend=None, atomise=True, engine=None,
+               metrics=None):
+    """
+    Return a list of 'tables' from the given file handle or path, where a
+    table is a list of rows, and a row is a list of strings. A path is read
+    through a read-only memory map. With compact=True the tables are
+    CompactTable objects backed by a numpy array. templates is an optional
+    TemplateStore shared between documents with the same layout.
+    With carry_comb=True each page first tries the column comb of the page
+    before, and only infers its own columns if that comb does not fit;
+    tables on consecutive pages sharing a comb are tagged as continuations
+    of the same logical table.
+
+    With a page_cache dict, pages are fingerprinted from their content
+    streams and resources before interpretation, and a page seen before, in
+    this document or an earlier call given the same dict, is not processed
+    again. Without one no page is fingerprinted. Pass an ExtractionStats to
+    collect page counts and duplicate hits.
+
+    crop limits each page to a rectangle (left, bottom, right, top): one for
+    every page, a dict keyed by page number or a function of the page
+    number. Anything outside is dropped by the device before layout.
+    With rulings=True bordered tables take their combs from their ruling
+    lines, falling back to projections when there is no consistent grid.
+    With split_regions=True a page can hold several tables, found from the
+    gaps between table rows, and each is numbered in the table metadata.
+
+    With threads > 1 pages are extracted by a pool of threads, each parsing
+    the document with its own interpreter and device; the tables are the
+    same as with one thread, but identical pages extracted at the same time
+    are not counted as duplicates. get_tables keeps no state between calls,
+    so calls may also run concurrently, sharing templates, page_cache and
+    stats. carry_comb needs the pages in order and cannot be threaded.
+
+    revisions is an optional incremental.RevisionStore: pages already
+    extracted from an earlier revision of the same document, unchanged, are
+    taken from it, and only new or changed pages are extracted. It is not
+    used with threads.
+
+    backend takes the page layouts from somewhere other than pdfminer, such
+    as backends.PdfToHtmlBackend or backends.JSONLayoutBackend reading
+    coordinates produced elsewhere; file_location is then the backend's
+    input. page_cache, revisions and threads are pdfminer's alone.
+
+    atomise='words' allocates text to cells word by word rather than
+    character by character (see page_to_tables); atomise=False uses whole
+    text lines. engine selects the implementation of the inference stages,
+    as for page_to_tables; the tables of every engine should be the same.
+
+    metrics is an optional metrics.MetricsRegistry counting documents,
+    pages, tables and errors and timing each page and its stages, for
+    export to Prometheus.
     """
-    Return a list of 'tables' from the given file handle, where a table is a
-    list of rows, and a row is a list of strings.
+    engine = _resolve_engine(engine)
+    with _measured(metrics, page_cache, templates):
+        if backend is not None:
+            if threads > 1 or revisions is not None:
+                raise ValueError("threads and revisions need the pdfminer "
+                                 "backend")
+            return _get_tables_from_layouts(
+                backend.pages(file_location, password), compact=compact,
+                templates=templates, carry_comb=carry_comb, stats=stats,
+                crop=crop, rulings=rulings, split_regions=split_regions,
+                atomise=atomise, engine=engine, metrics=metrics)
+
+        options = dict(templates=templates, page_cache=page_cache, crop=crop,
+                       rulings=rulings, split_regions=split_regions,
+                       atomise=atomise, engine=engine, metrics=metrics)
+        if threads > 1:
+            if carry_comb:
+                raise ValueError("carry_comb follows the pages in order, "
+                                 "it cannot be used with threads")
+            if revisions is not None:
+                raise ValueError("revisions cannot be used with threads")
+            results = _extract_pages_threaded(file_location, password,
+                                              threads, **options)
+            return _assemble_tables(results, compact=compact, stats=stats,
+                                    metrics=metrics)
+
+        with open_pdf(file_location) as stream:
+            doc, interpreter, device = initialize_pdf_miner(stream, password)
+            return _get_tables(doc, interpreter, device, compact=compact,
+                               carry_comb=carry_comb, stats=stats,
+                               revisions=revisions, **options)
+
+
+@contextlib.contextmanager
+def _measured(metrics, page_cache=None, templates=None):
     """
-    result = []
-    doc, interpreter, device = initialize_pdf_miner(file_location, password)
+    Count an exception leaving the block in metrics, if given, and set the
+    sizes of the caches given
+    """
+    if metrics is None:
+        yield
+        return
+    try:
+        yield
+    except Exception as error:
+        metrics.record_error(error)
+        raise
+    finally:
+        if page_cache is not None:
+            metrics.set_gauge('cache_entries', len(page_cache), cache='pages')
+        if templates is not None:
+            metrics.set_gauge('cache_entries', len(templates),
+                              cache='templates')
+
+
+def _get_tables(doc, interpreter, device, compact=False, templates=None,
+                carry_comb=False, page_cache=None, stats=None, crop=None,
+                rulings=False, split_regions=False, revisions=None,
+                atomise=True, engine=None, metrics=None):
+    """ get_tables for an open PDFDocument and a pdfminer interpreter """
+    font_digests = {}
+    revision = None
+    if revisions is not None:
+        # crop is part of each page's key, the rest apply to every page
+        revision = revisions.open(doc, dict(
+            rulings=bool(rulings), split_regions=bool(split_regions),
+            templates=templates is not None, atomise=atomise,
+            engine=getattr(engine, 'name', engine)))
+    results = []
+    previous = None  # (page index, x_comb) of the last table
     pages = [page for page in PDFPage.create_pages(doc)]
-    doc_length = len(pages)
-    for i, pdf_page in enumerate(pages):
-        if not page_contains_tables(pdf_page, interpreter, device):
-            continue
-
+    try:
+        for i, pdf_page in enumerate(pages):
+            carried = None
+            if carry_comb and previous is not None and previous[0] == i - 1:
+                carried = previous[1]
+            stored = None
+            if revision is not None:
+                key = revision.page_key(pdf_page,
+                                        crop_for_page(crop, i + 1), carried)
+                stored = revision.get(key)
+            if stored is not None:
+                result = _PageResult(False, *stored)
+            else:
+                result = _extract_page(pdf_page, i, interpreter, device,
+                                       page_cache, carried,
+                                       templates=templates,
+                                       crop=crop, rulings=rulings,
+                                       split_regions=split_regions,
+                                       atomise=atomise, engine=engine,
+                                       metrics=metrics,
+                                       font_digests=font_digests)
+                if revision is not None:
+                    revision.put(key, *result[1:])
+            results.append(result)
+            if result.x_comb is not None:
+                previous = (i, result.x_comb)
+    finally:
+        # the device may be used for other documents
+        device.crop = None
+
+    if revision is not None:
+        revisions.save(revision)
+        if stats is not None:
+            stats.incr("reused_pages", revision.reused)
+    return _assemble_tables(results, compact=compact, carry_comb=carry_comb,
+                            stats=stats, metrics=metrics)
+
+
+def _get_tables_from_layouts(layouts, compact=False, templates=None,
+                             carry_comb=False, stats=None, crop=None,
+                             rulings=False, split_regions=False,
+                             atomise=True, engine=None, metrics=None):
+    """ get_tables for the page layouts (LTPage or LayoutPage) of a backend """
+    results = []
+    previous = None  # (page index, x_comb) of the last table
+    for i, layout in enumerate(layouts):
+        timer = NULL_TIMER if metrics is None else metrics.page_timer()
+        carried = None
+        if carry_comb and previous is not None and previous[0] == i - 1:
+            carried = previous[1]
+        page_crop = crop_for_page(crop, i + 1)
+        if page_crop is not None and isinstance(layout, LayoutPage):
+            layout, page_crop = layout.cropped(page_crop), None
+        tables, first_x_comb, x_comb = [], None, None
+        if layout_contains_tables(layout):
+            timer.lap('prescan')
+            box_list, ruling_list = _page_boxes(layout, atomise, page_crop,
+                                                rulings)
+            timer.lap('layout')
+            found = _tables_from_boxes(
+                layout, box_list, ruling_list, extend_y=True, hints=[],
+                atomise=atomise, templates=templates, x_comb=carried,
+                split_regions=split_regions, engine=engine)
+            timer.lap('inference')
+            tables, first_x_comb, x_comb = _found_tables(found, split_regions)
+        timer.done()
+        results.append(_PageResult(False, None, tables, first_x_comb, x_comb))
+        if x_comb is not None:
+            previous = (i, x_comb)
+    return _assemble_tables(results, compact=compact, carry_comb=carry_comb,
+                            stats=stats, metrics=metrics)
+
+
+def _resolve_engine(engine):
+    """ The engine object for an engine name (see engines) """
+    if isinstance(engine, STRING_TYPES):
+        # engines builds on this module
+        from engines import get_engine
+        return get_engine(engine)
+    return engine
+
+
+_PageResult = collections.namedtuple(
+    '_PageResult', 'duplicate skipped tables first_x_comb x_comb')
+
+
+def _extract_page(pdf_page, i, interpreter, device, page_cache, carried=None,
+                  templates=None, crop=None, rulings=False,
+                  split_regions=False, atomise=True, engine=None,
+                  metrics=None, font_digests=None):
+    """
+    Find the tables on page i, or take them from page_cache if it is not
+    None; without one the page is not fingerprinted. font_digests is as for
+    content_fingerprint. Only the interpreter and device are changed, so
+    pages can be extracted in any order by threads each owning one.
+    """
+    timer = NULL_TIMER if metrics is None else metrics.page_timer()
+    device.crop = crop_for_page(crop, i + 1)
+    if page_cache is not None:
+        fingerprint = _page_cache_key(pdf_page, device.crop, carried,
+                                     templates, rulings, split_regions,
+                                     atomise, engine, font_digests)
+        cached = page_cache.get(fingerprint)
+        if cached is not None:
+            timer.done()
+            return _cached_page(cached)
+
+    skipped = text_free_reason(pdf_page)
+    timer.lap('prescan')
+    if skipped is not None:
+        # no text to interpret, so no tables
+        tables, first_x_comb, x_comb = [], None, None
+    elif not page_contains_tables(pdf_page, interpreter, device):
+        timer.lap('interpret')
+        tables, first_x_comb, x_comb = [], None, None
+    else:
         # receive the LTPage object for the page.
         interpreter.process_page(pdf_page)
         processed_page = device.get_result()
-        table = page_to_tables(processed_page, extend_y=True, hints=[], atomise=True)
-        crop_table(table)
-        result.append(
-            Table(
+        timer.lap('interpret')
+        box_list, ruling_list = _page_boxes(processed_page, atomise,
+                                            rulings=rulings)
+        timer.lap('layout')
+        found = _tables_from_boxes(
+            processed_page, box_list, ruling_list, extend_y=True, hints=[],
+            atomise=atomise, templates=templates, x_comb=carried,
+            split_regions=split_regions, engine=engine)
+        timer.lap('inference')
+        tables, first_x_comb, x_comb = _found_tables(found, split_regions)
+    timer.done()
+    if page_cache is not None:
+        page_cache[fingerprint] = (_copy_tables(tables), first_x_comb,
+                                   x_comb)
+    return _PageResult(False, skipped, tables, first_x_comb, x_comb)
+
+
+def _page_cache_key(pdf_page, crop=None, carried=None, templates=None,
+                   rulings=False, split_regions=False, atomise=True,
+                   engine=None, font_digests=None):
+    """
+    The key of a page in a page_cache: the fingerprint of its content and
+    every option which changes the tables found on it
+    """
+    return (content_fingerprint(pdf_page, font_digests),
+            None if crop is None else tuple(crop),
+            None if carried is None else tuple(carried),
+            None if templates is None else id(templates),
+            bool(rulings), bool(split_regions), atomise,
+            getattr(engine, 'name', None))
+
+
+def _copy_tables(tables):
+    """ tables with their rows copied, so no two tables share a row """
+    return [[list(row) for row in table] for table in tables]
+
+
+def _cached_page(cached):
+    """ The _PageResult of a duplicate page from its page_cache entry """
+    tables, first_x_comb, x_comb = cached
+    return _PageResult(True, None, _copy_tables(tables), first_x_comb,
+                       x_comb)
+
+
+def _found_tables(found, split_regions=False):
+    """
+    (tables, first x_comb, last x_comb) from the (table, x_comb, y_comb)
+    list of _page_to_table_list
+    """
+    # the first table may continue the last page, the last table
+    # may continue on the next
+    tables = [table for table, _, _ in found]
+    if split_regions:
+        tables = [table for table in tables if table]
+    return tables, found[0][1], found[-1][1]
+
+
+def _assemble_tables(results, compact=False, carry_comb=False, stats=None,
+                     metrics=None):
+    """
+    Number, tag and crop the tables of each page's _PageResult, in page
+    order, and count them in stats and metrics
+    """
+    assembler = _TableAssembler(len(results), compact, carry_comb, stats,
+                                metrics)
+    tables = []
+    for i, page in enumerate(results):
+        tables.extend(assembler.page_tables(i, page))
+    return tables
+
+
+class _TableAssembler(object):
+    """ _assemble_tables for _PageResults handed over one at a time """
+    def __init__(self, doc_length, compact=False, carry_comb=False,
+                 stats=None, metrics=None):
+        self.doc_length = doc_length
+        self.table_class = CompactTable if compact else Table
+        self.carry_comb = carry_comb
+        self.stats = stats
+        self.metrics = metrics
+        self.previous = None  # (page index, x_comb) of the last table
+        self.logical_table = 0
+        if stats is not None:
+            stats.incr("documents")
+        if metrics is not None:
+            metrics.incr("documents")
+
+    def page_tables(self, i, page):
+        """ The tables of page i, which must follow page i - 1 """
+        stats = self.stats
+        previous = self.previous
+        if stats is not None:
+            stats.incr("pages")
+            stats.add_page(i + 1, duplicate=page.duplicate,
+                           skipped=page.skipped)
+            if page.duplicate:
+                stats.incr("duplicate_pages")
+            if page.skipped is not None:
+                stats.incr("skipped_pages")
+                stats.incr("skipped_" + page.skipped)
+        metrics = self.metrics
+        if metrics is not None:
+            metrics.incr("pages")
+            if page.skipped is not None:
+                metrics.incr("skipped_pages")
+            metrics.incr("tables", len(page.tables))
+
+        tables = []
+        for k, table in enumerate(page.tables):
+            continuation = (k == 0 and self.carry_comb and
+                            previous is not None and previous[0] == i - 1 and
+                            page.first_x_comb is not None and
+                            page.first_x_comb[1:-1] == previous[1][1:-1])
+            if not continuation:
+                self.logical_table += 1
+            table = self.table_class(
                 table,
                 {
                     "page": i+1,
-                    "page_total":doc_length
+                    "page_total": self.doc_length
                 },
                 {
-                    "table_index": 1,
-                    "table_index_total": 1
+                    "table_index": k + 1,
+                    "table_index_total": len(page.tables),
+                    "logical_table": self.logical_table,
+                    "continuation": continuation
                 }
             )
-        )
+            crop_table(table)
+            if stats is not None:
+                stats.incr("tables")
+            tables.append(table)
+        if page.x_comb is not None:
+            self.previous = (i, page.x_comb)
+        return tables
+
+
+def _source_opener(file_location):
+    """
+    A function opening a new stream on the document each time it is called,
+    for parsers in several threads. A path is memory mapped by each; a file
+    object is read once and each stream is a view of the bytes, as pdfminer
+    parsers seek.
+    """
+    if isinstance(file_location, STRING_TYPES + PATH_TYPES):
+        return lambda: open_pdf(file_location)
+    data = file_location.read()
+    return lambda: contextlib.closing(io.BytesIO(data))
 
-    return result
+
+def _extract_pages_threaded(file_location, password, threads, page_cache=None,
+                            **options):
+    """
+    _extract_page for every page of a document on a pool of threads, each
+    parsing the document itself
+    """
+    open_source = _source_opener(file_location)
+    # every thread reads the same document, so object ids agree
+    font_digests = {}
+
+    tasks = queue.Queue()
+    errors = []
+
+    def extract(pages):
+        """ Take pages off the queue until it is empty """
+        interpreter, device = initialize_interpreter(PDFResourceManager())
+        while not errors:
+            try:
+                i = tasks.get_nowait()
+            except queue.Empty:
+                return
+            results[i] = _extract_page(pages[i], i, interpreter, device,
+                                       page_cache, font_digests=font_digests,
+                                       **options)
+
+    def work():
+        try:
+            with open_source() as stream:
+                doc = open_document(stream, password)
+                extract(list(PDFPage.create_pages(doc)))
+        except Exception as error:
+            errors.append(error)
+
+    with open_source() as stream:
+        doc = open_document(stream, password)
+        pages = list(PDFPage.create_pages(doc))
+        results = [None] * len(pages)
+        for i in range(len(pages)):
+            tasks.put(i)
+        workers = [threading.Thread(target=work)
+                   for _ in range(min(threads, len(pages)) - 1)]
+        for worker in workers:
+            worker.start()
+        try:
+            extract(pages)  # this thread is a worker too
+        except Exception as error:
+            errors.append(error)
+        for worker in workers:
+            worker.join()
+    if errors:
+        raise errors[0]
+    return results
 
 
 def crop_table(table):
     """
     Remove empty rows from the top and bottom of the table.
     """
-    for row in list(table):  # top -> bottom
-        if not any(cell.strip() for cell in row):
-            table.remove(row)
-        else:
-            break
+    if isinstance(table, CompactTable):
+        table.crop()
+        return
+
+    removed = rows_to_crop(table)
+    if removed:
+        removed = set(removed)
+        table[:] = [row for i, row in enumerate(table) if i not in removed]
 
-    for row in list(reversed(table)):  # bottom -> top
-        if not any(cell.strip() for cell in row):
-            table.remove(row)
-        else:
-            break
+
+@contextlib.contextmanager
+def open_pdf(file_location):
+    """
+    Yield a stream for the parser. A path is opened and memory mapped
+    read-only, so processes reading the same file share the page cache; an
+    open file object is passed through untouched.
+    """
+    if not isinstance(file_location, STRING_TYPES + PATH_TYPES):
+        yield file_location
+        return
+
+    with open(file_location, 'rb') as file_ptr:
+        try:
+            stream = mmap.mmap(file_ptr.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # empty files cannot be mapped, let the parser complain instead
+            yield file_ptr
+            return
+        try:
+            yield stream
+        finally:
+            stream.close()
 
 
 def initialize_pdf_miner(file_location, password=""):
-    """ Setup PDF Miner """
+    """
+    Setup PDF Miner. file_location is an open file object (or a memory map
+    from open_pdf).
+    """
+    doc = open_document(file_location, password)
+    # Create a PDF resource manager object that stores shared resources.
+    rsrcmgr = PDFResourceManager()
+    interpreter, device = initialize_interpreter(rsrcmgr)
+    return doc, interpreter, device
+
+def open_document(file_location, password=""):
+    """ Parse the document structure of an open file object """
     # Create a PDF parser object associated with the file object.
     pdf_parser = PDFParser(file_location)
     # Supply the password for initialization.
@@ -109,29 +598,40 @@ def initialize_pdf_miner(file_location, password=""):
     # Check if the document allows text extraction. If not, abort.
     if not doc.is_extractable:
         raise ValueError("PDFDocument is_extractable was False.")
-    # Create a PDF resource manager object that stores shared resources.
-    rsrcmgr = PDFResourceManager()
-    # Create a PDF device object.
-    device = PDFDevice(rsrcmgr)
-    # Create a PDF interpreter object.
-    interpreter = PDFPageInterpreter(rsrcmgr, device)
-    # Process each page contained in the document.
-    # for page in doc.get_pages():
-    #    interpreter.process_page(page)
+    return doc
 
+def get_pdf_page(file_location, page_number, password=""):
+    """
+    The LTPage of one page of a document, numbered from 1, to pass to
+    page_to_tables
+    """
+    with open_pdf(file_location) as stream:
+        doc, interpreter, device = initialize_pdf_miner(stream, password)
+        for i, pdf_page in enumerate(PDFPage.create_pages(doc)):
+            if i + 1 == page_number:
+                interpreter.process_page(pdf_page)
+                return device.get_result()
+    raise IndexError("no page {0} in the document".format(page_number))
+
+def initialize_interpreter(rsrcmgr):
+    """ Create the page interpreter and aggregating device for a resource
+    manager """
     # Set parameters for analysis.
     laparams = LAParams()
     laparams.word_margin = 0.0
-    # Create a PDF page aggregator object.
-    device = PDFPageAggregator(rsrcmgr, laparams=laparams)
+    # Create a PDF page aggregator object, which can crop the page.
+    device = CroppingPageAggregator(rsrcmgr, laparams=laparams)
     interpreter = PDFPageInterpreter(rsrcmgr, device)
-    return doc, interpreter, device
+    return interpreter, device
 
 def page_contains_tables(pdf_page, interpreter, device):
     """ check if page contains table """
     interpreter.process_page(pdf_page)
     # receive the LTPage object for the page.
-    layout = device.get_result()
+    return layout_contains_tables(device.get_result())
+
+def layout_contains_tables(layout):
+    """ check if an interpreted page (LTPage) contains table """
     box_list = LeafList().populate(layout)
     """
     for item in box_list:
@@ -142,6 +642,11 @@ def page_contains_tables(pdf_page, interpreter, device):
     return len(test) > IS_TABLE_ROW_COUNT_THRESHOLD
 
 
+def rounded_histogram(box_list, dir_fun, tol):
+    """ Histogram of dir_fun of the boxes, rounded to tol """
+    return box_list.histogram(dir_fun).rounder(tol)
+
+
 def threshold_above(hist, threshold_value):
     """
     threshold_above(Counter({518: 10, 520: 20, 530: 20, \
@@ -198,36 +703,141 @@ def comb_from_projection(projection, threshold, orientation):
     """Calculates the boundaries between cells from the projection of the boxes
     onto either the y axis (for rows) or the x-axis (for columns). These
     boundaries are known as the comb
+
+    The projection is made dense once and the runs above threshold, the gaps
+    between them and the minimum of each gap are found with array
+    operations. The comb is the same as comb_from_uppers_and_lowers with
+    find_minima would give: the lowest point of each gap wider than the
+    tolerance, the first such point when there are several.
+    """
+    if not isinstance(projection, Counter):
+        raise ValueError("requires Counter")
+    origin, counts = dense_projection(projection)
+    return comb_from_dense_projection(origin, counts, threshold, orientation)
+
+
+def comb_from_dense_projection(origin, counts, threshold, orientation):
+    """ comb_from_projection for a projection from dense_projection """
+    above, gap_lowers, gap_uppers = _dense_gaps(counts, threshold,
+                                                orientation)
+    teeth = [above[0]] + _gap_minima(counts, gap_lowers, gap_uppers) + [
+        above[-1]]
+    return [int(tooth) + origin for tooth in teeth]
+
+
+def _dense_gaps(counts, threshold, orientation):
+    """
+    The indices of counts above threshold, and the lower and upper edges of
+    the gaps between the runs of them which are wide enough to hold a tooth
     """
     if orientation == "row":
         tol = 1
     elif orientation == "column":
         tol = 3
 
-    projection_threshold = threshold_above(projection, threshold)
-
-    projection_threshold = sorted(projection_threshold)
-    # need to generate a list of uppers (right or top edges)
-    # and a list of lowers (left or bottom edges)
+    above = numpy.flatnonzero(counts > threshold)
+    # the lower (left or bottom) and upper (right or top) edges of the runs
+    # of the thresholded projection, ascending
+    breaks = numpy.flatnonzero(numpy.diff(above) > 1)
+    lowers = numpy.concatenate((above[:1], above[breaks + 1]))
+    uppers = numpy.concatenate((above[breaks], above[-1:]))
 
-    # uppers = [k for k, v in yhisttop.items() if v > yThreshold]
-    # lowers = [k for k, v in yhistbottom.items() if v > yThreshold]
-    uppers = []
-    lowers = []
+    # the gap between each run and the next, where wide enough
+    gap_lowers = uppers[:-1]
+    gap_uppers = lowers[1:]
+    wide = gap_uppers - gap_lowers > tol
+    return above, gap_lowers[wide], gap_uppers[wide]
 
-    lowers.append(projection_threshold[0])
-    for i in range(1, len(projection_threshold)):
-        if projection_threshold[i] > (
-                projection_threshold[i-1] + 1):
-            uppers.append(projection_threshold[i - 1])
-            lowers.append(projection_threshold[i])
-    uppers.append(projection_threshold[-1])
 
-    comb_over = comb_from_uppers_and_lowers(uppers, lowers, tol=tol,
-                                            projection=projection)
-    comb_over.reverse()
+def comb_covers_gaps(x_comb, column_projection):
+    """
+    True if every gap of the column projection which would get a tooth of
+    its own has an interior tooth of x_comb in it. Used to check a column
+    comb carried over from a previous page, which may have fewer columns.
+    The projection may be from any engine.
+    """
+    column_projection = getattr(column_projection, 'reference',
+                                column_projection)
+    if isinstance(column_projection, Counter):
+        column_projection = dense_projection(column_projection)
+    origin, counts = column_projection
+    _, gap_lowers, gap_uppers = _dense_gaps(counts, COLUMN_THRESHOLD,
+                                            "column")
+    x_teeth = x_comb[1:-1]
+    for lower, upper in zip(gap_lowers + origin, gap_uppers + origin):
+        if not any(lower - FIT_TOLERANCE <= tooth <= upper + FIT_TOLERANCE
+                   for tooth in x_teeth):
+            return False
+    return True
+
+
+def carried_comb_fits(x_comb, box_list, bbox):
+    """
+    Check a column comb carried over from a previous page against the boxes
+    of the table in bbox (minx, maxx, miny, maxy): it must pass
+    column_comb_fit, and have a tooth in every gap of the column projection,
+    which is taken from the box edges alone. Returns that projection, as
+    (origin, counts), if the comb fits, otherwise None.
+    """
+    # engines builds on this module
+    from engines import FAST
+    (minx, maxx, miny, maxy) = bbox
+    table_box_list = box_list.spatial_index().query((minx, miny, maxx, maxy))
+    if (not table_box_list or column_comb_fit(
+            x_comb, table_box_list, miny, maxy) < FIT_THRESHOLD):
+        return None
+    column_projection = FAST.project_boxes(table_box_list, "column")
+    if not comb_covers_gaps(x_comb, column_projection):
+        return None
+    return column_projection
+
+
+def dense_projection(projection):
+    """
+    (origin, counts) for a projection Counter keyed by integer coordinates:
+    counts[i] is the count at coordinate origin + i, 0 where there is none
 
-    return comb_over
+    dense_projection(Counter({3: 2, 5: 1}))
+    (3, array([2, 0, 1]))
+    """
+    coords = numpy.fromiter(projection.keys(), dtype=numpy.int64,
+                            count=len(projection))
+    values = numpy.fromiter(projection.values(), dtype=numpy.int64,
+                            count=len(projection))
+    if not len(coords):
+        return 0, values
+    origin = int(coords.min())
+    counts = numpy.zeros(int(coords.max()) - origin + 1, dtype=numpy.int64)
+    counts[coords - origin] = values
+    return origin, counts
+
+
+def _gap_minima(counts, lowers, uppers):
+    """
+    The index of the first minimum of counts[lower:upper] for each of a
+    sorted list of disjoint, non-empty gaps
+    """
+    if not len(lowers):
+        return []
+    # minimum of each gap, from reducing over [lower, upper) and skipping
+    # the stretches between gaps
+    bounds = numpy.empty(2 * len(lowers), dtype=numpy.int64)
+    bounds[0::2] = lowers
+    bounds[1::2] = uppers
+    minima = numpy.minimum.reduceat(counts, bounds)[0::2]
+
+    # gap number of each index, -1 outside the gaps
+    edges = numpy.zeros(len(counts) + 1, dtype=numpy.int64)
+    edges[lowers] += 1
+    edges[uppers] -= 1
+    inside = numpy.cumsum(edges[:-1]) > 0
+    gap = numpy.cumsum(numpy.bincount(lowers, minlength=len(counts))) - 1
+    gap[~inside] = -1
+
+    candidates = numpy.flatnonzero(inside)
+    candidates = candidates[counts[candidates] == minima[gap[candidates]]]
+    _, first = numpy.unique(gap[candidates], return_index=True)
+    return list(candidates[first])
 
 
 def comb_from_uppers_and_lowers(uppers, lowers, tol=1, projection=None):
@@ -322,40 +932,55 @@ def project_boxes(box_list, orientation, erosion=0):
 
     return Counter(projection)
 
-def get_min_and_max_y_from_hints(box_list, top_string, bottom_string):
-    """ Get min and max from hints """
+def get_min_and_max_y_from_hints(box_list, top_string, bottom_string,
+                                 matches=None):
+    """
+    Get min and max from hints, using the first box containing each. matches
+    are the HintMatches of a HintMatcher already run over box_list.
+    """
+    if matches is None:
+        matches = HintMatcher([top_string, bottom_string]).scan(box_list)
+    first = first_matches(matches)
     miny = None
     maxy = None
-    if top_string:
-        top_box = [box for box in box_list if top_string in box.text]
-        if top_box:
-            maxy = top_box[0].top
-    if bottom_string:
-        bottom_box = [box for box in box_list if bottom_string in box.text]
-        if bottom_box:
-            miny = bottom_box[0].bottom
+    if top_string in first:
+        maxy = first[top_string].box.top
+    if bottom_string in first:
+        miny = first[bottom_string].box.bottom
     return miny, maxy
 
-def init_comb(row_projection, column_projection, minx, maxx):
-    """ init our x and y comb for page_to_tables """
-    # For LTTextLine horizontal column and row thresholds of 3 work ok
-    column_threshold = 5
-    row_threshold = 3
-
-    y_comb = comb_from_projection(row_projection, row_threshold, "row")
+def init_comb(row_projection, column_projection, minx, maxx, x_comb=None,
+              engine=None):
+    """
+    init our x and y comb for page_to_tables. If x_comb is given (carried
+    from another page) it is used instead of the column projection.
+    """
+    make_comb = (comb_from_projection if engine is None
+                 else engine.comb_from_projection)
+    y_comb = make_comb(row_projection, ROW_THRESHOLD, "row")
     y_comb.reverse()
 
     # column_threshold = max(len(y_comb)*0.75,5)
-    x_comb = comb_from_projection(column_projection, column_threshold, "column")
+    if x_comb is None:
+        x_comb = make_comb(column_projection, COLUMN_THRESHOLD, "column")
+    else:
+        x_comb = list(x_comb)
 
     x_comb[0] = minx
     x_comb[-1] = maxx
 
     return x_comb, y_comb
 
-def apply_the_combs(box_list, x_comb, y_comb, atomise):
+def apply_the_combs(box_list, x_comb, y_comb, atomise, engine=None):
     """ Applying the combs """
-    table_array = apply_combs(box_list, x_comb, y_comb)
+    # only boxes inside the combs get a cell; box centres are rounded
+    box_list = LeafList(box_list.spatial_index().query(
+        (min(x_comb) - 0.5, min(y_comb) - 0.5,
+         max(x_comb) + 0.5, max(y_comb) + 0.5)))
+    if engine is None:
+        table_array = apply_combs(box_list, x_comb, y_comb)
+    else:
+        table_array = engine.apply_combs(box_list, x_comb, y_comb)
     # Strip out leading and trailing spaces when atomise true
     if atomise:
         tmp_table = []
@@ -365,56 +990,261 @@ def apply_the_combs(box_list, x_comb, y_comb, atomise):
         table_array = tmp_table
     return table_array
 
-def get_projection(leaf, box_list, min_max_y, min_max_x):
-    """ get row and column projection """
-    filtered_box_list = filter_box_list_by_position(
-        filter_box_list_by_position(
-            box_list,
-            min_max_y["min"],
-            min_max_y["max"],
-            leaf.midline),
-        min_max_x["min"],
-        min_max_x["max"],
-        leaf.centreline)
+def get_projection(leaf, box_list, min_max_y, min_max_x, columns=True,
+                   engine=None):
+    """
+    get row and column projection, the column projection is None if columns
+    is False
+    """
+    project = project_boxes if engine is None else engine.project_boxes
+    # boxes with their centre inside the table, from the page's grid index
+    filtered_box_list = LeafList(box_list.spatial_index().query(
+        (min_max_x["min"], min_max_y["min"],
+         min_max_x["max"], min_max_y["max"])))
 
     # Project boxes onto horizontal axis
-    column_projection = project_boxes(filtered_box_list, "column")
+    column_projection = None
+    if columns:
+        column_projection = project(filtered_box_list, "column")
 
     # Project boxes onto vertical axis
     # Erode row height by a fraction of the modal text box height
     erodelevel = int(math.floor(calculate_modal_height(filtered_box_list) / 4))
-    row_projection = project_boxes(filtered_box_list, "row", erosion=erodelevel)
+    row_projection = project(filtered_box_list, "row", erosion=erodelevel)
     return row_projection, column_projection
 
-def page_to_tables(page, extend_y=False, hints=None, atomise=False):
+def page_to_tables(page, extend_y=False, hints=None, atomise=False,
+                   templates=None, x_comb=None, crop=None, rulings=False,
+                   matcher=None, engine=None, diagnostics=False):
+    """
+    Get a rectangular list of list of strings from one page of a document.
+    With atomise=True text is allocated to cells character by character, and
+    with atomise='words' word by word (see word_boxes), which separates
+    columns as well for far fewer boxes.
+    If a TemplateStore is given, a stored layout matching the page is applied
+    directly and newly inferred layouts are added to the store. x_comb is a
+    column comb from another page, used instead of the column projection if
+    it still fits the boxes on this page. crop is a rectangle (left, bottom,
+    right, top); boxes with their centre outside it are ignored. With
+    rulings=True the combs are taken from the ruling lines of a bordered
+    table when they form a consistent grid. matcher is a HintMatcher
+    compiled once for a batch, with the hints among its patterns.
+    engine selects the implementation of the inference stages (see
+    engines): None or 'reference' for this module's, 'fast', 'verify' to
+    run both and compare, or an engine object.
+    With diagnostics=True (table, TableDiagnosticData) is returned, holding
+    the boxes, projections, thresholds and combs the table came from.
+    """
+    captured = [] if diagnostics else None
+    tables = _page_to_table_list(page, extend_y, hints, atomise, templates,
+                                 x_comb, crop, rulings, matcher=matcher,
+                                 engine=_resolve_engine(engine),
+                                 diagnostics=captured)
+    if diagnostics:
+        return tables[0][0], captured[0]
+    return tables[0][0]
+
+def page_to_table_list(page, extend_y=False, hints=None, atomise=False,
+                       templates=None, x_comb=None, crop=None, rulings=False,
+                       matcher=None, engine=None, diagnostics=False):
+    """
+    Like page_to_tables, but the page is split into table regions and a list
+    with one table per region is returned (empty if there are no tables).
+    With diagnostics=True (tables, diagnostics) is returned, with the
+    TableDiagnosticData of each table.
     """
-    Get a rectangular list of list of strings from one page of a document
+    captured = [] if diagnostics else None
+    tables = _page_to_table_list(page, extend_y, hints, atomise, templates,
+                                 x_comb, crop, rulings, split_regions=True,
+                                 matcher=matcher,
+                                 engine=_resolve_engine(engine),
+                                 diagnostics=captured)
+    if diagnostics:
+        found = [(table, data)
+                 for (table, _, _), data in zip(tables, captured) if table]
+        return [table for table, _ in found], [data for _, data in found]
+    return [table for table, _, _ in tables if table]
+
+def _page_to_table_list(page, extend_y=False, hints=None, atomise=False,
+                        templates=None, x_comb=None, crop=None, rulings=False,
+                        split_regions=False, matcher=None, engine=None,
+                        diagnostics=None):
     """
-    if not isinstance(page, LTPage):
-        raise TypeError("page must be LTPage, not {}".format(page.__class__))
+    page_to_tables returning a list of (table, x_comb, y_comb), one for each
+    table region, or [([], None, None)] if no table was found. Only one
+    region is used unless split_regions is True. If diagnostics is a list a
+    TableDiagnosticData is appended to it for each item returned.
+    """
+    box_list, ruling_list = _page_boxes(page, atomise, crop, rulings)
+    return _tables_from_boxes(page, box_list, ruling_list, extend_y, hints,
+                              atomise, templates, x_comb, split_regions,
+                              matcher, engine, diagnostics)
+
+def _page_boxes(page, atomise=False, crop=None, rulings=False):
+    """
+    The Leafs of a page which tables are made from, and its ruling lines
+    (None unless rulings is True)
+    """
+    if not isinstance(page, (LTPage, LayoutPage)):
+        raise TypeError("page must be LTPage or LayoutPage, not {}".format(
+            page.__class__))
 
     if atomise:
         flt = ['LTPage', 'LTTextLineHorizontal', 'LTChar']
     else:
         flt = ['LTPage', 'LTTextLineHorizontal']
-    box_list = LeafList().populate(page, flt).purge_empty_text()
+    ruling_list = None
+    if rulings:
+        box_list = LeafList().populate(page, flt + RULING_CLASSES, region=crop)
+        ruling_list = box_list.filterByType(RULING_CLASSES)
+        box_list = box_list.filterByType(flt).purge_empty_text()
+    else:
+        box_list = LeafList().populate(page, flt, region=crop)
+        box_list = box_list.purge_empty_text()
+    if atomise == 'words':
+        box_list = word_boxes(box_list)
+    return box_list, ruling_list
+
+def word_boxes(box_list, gap_factor=WORD_GAP_FACTOR):
+    """
+    Replace each run of LTChar boxes in box_list by an LTWord box. A run ends
+    at whitespace, at a gap wider than gap_factor times the modal character
+    width, and where the next character is not beside the last one (a new
+    line). A word keeps the whitespace after it, in its text and its box,
+    as its characters would, so cells read the same as from characters.
+    """
+    widths = Counter(int(round(box.width)) for box in box_list
+                     if box.classname == 'LTChar' and box.text.strip())
+    if not widths:
+        return box_list.filterByType(['LTPage', 'LTTextLineHorizontal'])
+    max_gap = gap_factor * widths.most_common(1)[0][0]
+
+    words = LeafList()
+    word = None  # [left, bottom, right, top, text] of the current word
 
-    (minx, maxx, miny, maxy) = find_table_bounding_box(box_list, hints=hints)
+    def flush():
+        if word is not None:
+            words.append(Leaf((tuple(word[:4]), 'LTWord', word[4])))
+
+    for box in box_list:
+        if box.classname != 'LTChar':
+            flush()
+            word = None
+            words.append(box)
+        elif not box.text.strip():
+            if word is not None:
+                word[2] = max(word[2], box.right)
+                word[4] += box.text
+            flush()
+            word = None
+        elif (word is None or box.left - word[2] > max_gap or
+              box.left < word[0] or
+              not word[1] <= box.midline <= word[3]):
+            flush()
+            word = [box.left, box.bottom, box.right, box.top, box.text]
+        else:
+            word[1] = min(word[1], box.bottom)
+            word[2] = max(word[2], box.right)
+            word[3] = max(word[3], box.top)
+            word[4] += box.text
+    flush()
+    return words
+
+def _tables_from_boxes(page, box_list, ruling_list=None, extend_y=False,
+                       hints=None, atomise=False, templates=None, x_comb=None,
+                       split_regions=False, matcher=None, engine=None,
+                       diagnostics=None):
+    """ _page_to_table_list for the boxes and rulings from _page_boxes """
+    # built once for the page, the lists filtered from it share it
+    box_list.spatial_index()
+    if ruling_list is not None:
+        ruled_x_comb, ruled_y_comb = ruling_grid(ruling_list, box_list)
+        if ruled_x_comb is not None:
+            if atomise:
+                box_list = box_list.filterByType(['LTPage'] + ATOM_CLASSES)
+            table_array = apply_the_combs(box_list, ruled_x_comb,
+                                          ruled_y_comb, atomise, engine)
+            if diagnostics is not None:
+                diagnostics.append(TableDiagnosticData(
+                    box_list, {}, {}, ruled_x_comb, ruled_y_comb,
+                    source='rulings'))
+            return [(table_array, ruled_x_comb, ruled_y_comb)]
+
+    # Hints describe a single table, so they turn region splitting off
+    if split_regions and not hints:
+        regions = find_table_regions(box_list, engine)
+        if len(regions) > 1:
+            return [_table_from_box_list(band, region, extend_y, atomise,
+                                         x_comb if k == 0 else None, engine,
+                                         diagnostics)
+                    for k, (band, region) in enumerate(
+                        zip(split_box_list(box_list, regions), regions))]
+
+    if templates is not None:
+        fingerprint = page_fingerprint(page, box_list, atomise, extend_y)
+        cell_box_list = box_list
+        if atomise:
+            cell_box_list = box_list.filterByType(['LTPage'] + ATOM_CLASSES)
+        template = templates.match(fingerprint, cell_box_list)
+        if template is not None:
+            table_array = apply_the_combs(cell_box_list, template.x_comb,
+                                          template.y_comb, atomise, engine)
+            if diagnostics is not None:
+                diagnostics.append(TableDiagnosticData(
+                    cell_box_list, {}, {}, template.x_comb, template.y_comb,
+                    bbox=template.bbox, source='template'))
+            return [(table_array, template.x_comb, template.y_comb)]
+
+    bbox = find_table_bounding_box(box_list, hints=hints, matcher=matcher,
+                                   engine=engine)
 
     # If miny and maxy are None then we found no tables and should exit
-    if miny is None and maxy is None:
-        return list([])
+    if bbox[2] is None and bbox[3] is None:
+        if diagnostics is not None:
+            diagnostics.append(TableDiagnosticData(box_list, {}, {}, [], []))
+        return [(list([]), None, None)]
 
-    if atomise:
-        box_list = box_list.filterByType(['LTPage', 'LTChar'])
+    table_array, x_comb, y_comb = _table_from_box_list(
+        box_list, bbox, extend_y, atomise, x_comb, engine, diagnostics)
+
+    if templates is not None:
+        templates.add(fingerprint, bbox, x_comb, y_comb)
+
+    return [(table_array, x_comb, y_comb)]
 
-    row_projection, column_projection = get_projection(
+def _table_from_box_list(box_list, bbox, extend_y, atomise, x_comb=None,
+                         engine=None, diagnostics=None):
+    """
+    Infer the combs for the table in bbox (minx, maxx, miny, maxy) and
+    allocate the boxes to its cells. Returns (table, x_comb, y_comb), and
+    appends the TableDiagnosticData of the table if diagnostics is a list.
+    """
+    (minx, maxx, miny, maxy) = bbox
+
+    if atomise:
+        box_list = box_list.filterByType(['LTPage'] + ATOM_CLASSES)
+
+    # A carried comb is only used if it still fits this page, and then the
+    # column projection is not needed
+    column_projection = None
+    if x_comb is not None:
+        column_projection = carried_comb_fits(x_comb, box_list, bbox)
+        if column_projection is None:
+            x_comb = None
+    source = 'projection' if x_comb is None else 'carried'
+
+    row_projection, projection = get_projection(
         Leaf,
         box_list,
         {"min": miny, "max": maxy},
-        {"min": minx, "max": maxx})
-
-    x_comb, y_comb = init_comb(row_projection, column_projection, minx, maxx)
+        {"min": minx, "max": maxx},
+        columns=x_comb is None,
+        engine=engine)
+    if x_comb is None:
+        column_projection = projection
+
+    x_comb, y_comb = init_comb(row_projection, column_projection, minx, maxx,
+                               x_comb, engine)
     # Extend y_comb to page size if extend_y is true
     if extend_y:
         y_comb = comb_extend(
@@ -422,11 +1252,80 @@ def page_to_tables(page, extend_y=False, hints=None, atomise=False):
             min([box.bottom for box in box_list]),
             max([box.top for box in box_list]))
 
-    return apply_the_combs(box_list, x_comb, y_comb, atomise)
+    table_array = apply_the_combs(box_list, x_comb, y_comb, atomise, engine)
+    if diagnostics is not None:
+        diagnostics.append(TableDiagnosticData(
+            box_list,
+            {} if column_projection is None else column_projection,
+            row_projection, x_comb, y_comb,
+            column_threshold=COLUMN_THRESHOLD, row_threshold=ROW_THRESHOLD,
+            bbox=bbox, source=source))
+    return table_array, x_comb, y_comb
+
+def find_table_regions(box_list, engine=None):
+    """
+    Returns a bounding box (minx, maxx, miny, maxy) for each table on the
+    page, top to bottom. Table rows are found as in find_table_bounding_box
+    and split into regions wherever the gap between consecutive table rows
+    is much larger than the usual row spacing.
+    """
+    minx = min([box.left for box in box_list])
+    maxx = max([box.right for box in box_list])
+
+    text_line_boxlist = box_list.filterByType('LTTextLineHorizontal')
+    histogram = (rounded_histogram if engine is None
+                 else engine.rounded_histogram)
+    yhisttop = histogram(text_line_boxlist, Leaf.top, 2)
+    yhistbottom = histogram(text_line_boxlist, Leaf.bottom, 2)
+    tops = sorted(threshold_above(yhisttop, IS_TABLE_COLUMN_COUNT_THRESHOLD),
+                  reverse=True)
+    bottoms = sorted(threshold_above(yhistbottom,
+                                     IS_TABLE_COLUMN_COUNT_THRESHOLD))
+    if not tops or not bottoms:
+        return []
+
+    spacings = sorted(a - b for a, b in zip(tops, tops[1:]))
+    if spacings:
+        spacing = spacings[len(spacings) // 2]
+    else:
+        spacing = max(tops[0] - bottoms[0], 1)
+
+    groups = [[tops[0]]]
+    for top in tops[1:]:
+        if groups[-1][-1] - top > REGION_GAP_FACTOR * spacing:
+            groups.append([])
+        groups[-1].append(top)
+
+    regions = []
+    for group in groups:
+        if len(group) < REGION_MIN_ROWS and len(groups) > 1:
+            continue
+        below = [b for b in bottoms
+                 if group[-1] - REGION_GAP_FACTOR * spacing < b < group[-1]]
+        miny = min(below) if below else group[-1] - spacing
+        regions.append((minx, maxx, miny, group[0]))
+    return regions
+
+def split_box_list(box_list, regions):
+    """
+    Split the boxes into one band per region (regions ordered top to bottom),
+    dividing the page half way between neighbouring regions. Page boxes are
+    kept in every band.
+    """
+    # descending y boundaries between the bands, negated for bisect
+    boundaries = [-(upper[2] + lower[3]) / 2.0
+                  for upper, lower in zip(regions, regions[1:])]
+
+    def in_band(k):
+        return lambda box: (box.classname == 'LTPage' or
+                            bisect.bisect_left(boundaries, -box.midline) == k)
+
+    return [box_list.filter(in_band(k)) for k in range(len(regions))]
 
-def find_table_bounding_box(box_list, hints=None):
+def find_table_bounding_box(box_list, hints=None, matcher=None, engine=None):
     """ Returns one bounding box (minx, maxx, miny, maxy) for tables based
-    on a boxlist
+    on a boxlist. The hints (top string, bottom string) are found with
+    matcher if given, otherwise a HintMatcher is compiled for them.
     """
 
     miny = min([box.bottom for box in box_list])
@@ -438,8 +1337,10 @@ def find_table_bounding_box(box_list, hints=None):
     text_line_boxlist = box_list.filterByType('LTTextLineHorizontal')
 
     # Try to reduce the y range with a threshold, wouldn't work for x"""
-    yhisttop = text_line_boxlist.histogram(Leaf.top).rounder(2)
-    yhistbottom = text_line_boxlist.histogram(Leaf.bottom).rounder(2)
+    histogram = (rounded_histogram if engine is None
+                 else engine.rounded_histogram)
+    yhisttop = histogram(text_line_boxlist, Leaf.top, 2)
+    yhistbottom = histogram(text_line_boxlist, Leaf.bottom, 2)
 
     try:
         miny = min(threshold_above(yhistbottom, IS_TABLE_COLUMN_COUNT_THRESHOLD))
@@ -455,8 +1356,11 @@ def find_table_bounding_box(box_list, hints=None):
     if hints:
         top_string = hints[0]  # "% Change"
         bottom_string = hints[1]  # "15.67%"
+        if matcher is None:
+            matcher = HintMatcher([top_string, bottom_string])
         hintedminy, hintedmaxy = get_min_and_max_y_from_hints(
-            text_line_boxlist, top_string, bottom_string)
+            text_line_boxlist, top_string, bottom_string,
+            matches=matcher.scan(text_line_boxlist))
         if hintedminy:
             miny = hintedminy
         if hintedmaxy:
@@ -479,7 +1383,7 @@ def calculate_modal_height(box_list):
     """ calculate the modal's height """
     height_list = []
     for box in box_list:
-        if box.classname in ('LTTextLineHorizontal', 'LTChar'):
+        if box.classname in ['LTTextLineHorizontal'] + ATOM_CLASSES:
             height_list.append(round(box.bbox[TOP] - box.bbox[BOTTOM]))
 
     modal_height = Counter(height_list).most_common(1)
@@ -487,11 +1391,10 @@ def calculate_modal_height(box_list):
 
 def main(file_name, password):
     """ main function """
-    with open(file_name, 'rb') as file_ptr:
-        tables = get_tables(file_ptr, password)
-        for i, table in enumerate(tables):
-            print("---- TABLE {} ----".format(i + 1))
-            print(to_string(table))
+    tables = get_tables(file_name, password)
+    for i, table in enumerate(tables):
+        print("---- TABLE {} ----".format(i + 1))
+        print(to_string(table))
 
 if __name__ == '__main__':
     ARGS = argparse.ArgumentParser(description="Parse out tables from PDF")
@@ -0,0 +1,347 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+A staged executor for get_tables. pdfminer interpretation, Leaf extraction,
+table inference and output run concurrently, joined by bounded queues, and
+each stage has its own number of worker threads. Every stage reports how
+busy its workers were and how full its input queue got, which shows the
+stage holding the others up.
+"""
+
+import contextlib
+import threading
+import time
+
+from pdfminer.pdfinterp import PDFResourceManager
+from pdfminer.pdfpage import PDFPage
+
+from device import crop_for_page
+from metrics import NULL_TIMER
+from pagescan import text_free_reason
+from pdftables import (open_document, initialize_interpreter,
+                       layout_contains_tables, _page_boxes, _tables_from_boxes,
+                       _found_tables, _source_opener, _PageResult,
+                       _TableAssembler, _page_cache_key, _copy_tables,
+                       _cached_page, _measured, _resolve_engine)
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+STAGES = ['interpret', 'layout', 'inference', 'output']
+# Pages each queue between two stages holds before the stage feeding it waits
+QUEUE_SIZE = 8
+# get_tables options a Pipeline cannot use, with the defaults it allows
+UNSUPPORTED_OPTIONS = dict(carry_comb=False, threads=1, revisions=None,
+                           backend=None)
+
+_DONE = object()
+
+
+class StageStats(object):
+    """ Work done by the workers of one stage, and the depth of its queue """
+    def __init__(self, name, workers):
+        self.name = name
+        self.workers = workers
+        self.items = 0
+        self.busy = 0.0
+        self.elapsed = 0.0
+        self.max_depth = 0
+        self._depth_total = 0
+        self._lock = threading.Lock()
+
+    def record(self, busy, depth):
+        with self._lock:
+            self.items += 1
+            self.busy += busy
+            self.max_depth = max(self.max_depth, depth)
+            self._depth_total += depth
+
+    @property
+    def mean_depth(self):
+        """ Mean number of pages waiting when a worker took one """
+        if not self.items:
+            return 0.0
+        return self._depth_total / float(self.items)
+
+    @property
+    def utilisation(self):
+        """ Fraction of the workers' time spent working """
+        if not self.elapsed:
+            return 0.0
+        return self.busy / (self.workers * self.elapsed)
+
+    def to_dict(self):
+        return dict(stage=self.name, workers=self.workers, items=self.items,
+                    busy=self.busy, elapsed=self.elapsed,
+                    utilisation=self.utilisation, max_depth=self.max_depth,
+                    mean_depth=self.mean_depth)
+
+    def __repr__(self):
+        return ('StageStats({0.name!r}, workers={0.workers}, '
+                'utilisation={0.utilisation:.2f}, '
+                'mean_depth={0.mean_depth:.1f})'.format(self))
+
+
+class _PageWork(object):
+    """ A page on its way through the stages """
+    def __init__(self, index, fingerprint, timer):
+        self.index = index
+        self.fingerprint = fingerprint
+        self.timer = timer
+        self.layout = None
+        self.boxes = None
+        self.result = None  # a _PageResult once the tables are known
+
+
+class Pipeline(object):
+    """
+    Run get_tables as concurrent stages with the given numbers of workers.
+    Interpretation workers each parse the document themselves; output has
+    one worker, which puts the pages back in order.
+
+    pipeline = Pipeline(interpret=2, inference=2)
+    tables = pipeline.get_tables("report.pdf")
+    pipeline.report()
+    """
+    def __init__(self, interpret=1, layout=1, inference=1,
+                 queue_size=QUEUE_SIZE):
+        self.workers = dict(interpret=interpret, layout=layout,
+                            inference=inference, output=1)
+        self.queue_size = queue_size
+        self.stage_stats = {}
+
+    def report(self):
+        """ StageStats.to_dict() for each stage of the last run, in order """
+        return [self.stage_stats[name].to_dict() for name in STAGES
+                if name in self.stage_stats]
+
+    def get_tables(self, file_location, password="", compact=False,
+                   templates=None, page_cache=None, stats=None, crop=None,
+                   rulings=False, split_regions=False, atomise=True,
+                   engine=None, metrics=None, output=None, **options):
+        """
+        Same as pdftables.get_tables, taking its keyword options compact,
+        templates, page_cache, stats, crop, rulings, split_regions, atomise,
+        engine and metrics. carry_comb, threads, revisions and backend
+        need the pages one at a time, in order, so they are refused with a
+        ValueError. output is called with each table, in order, as soon as
+        it is ready.
+        """
+        for name, default in UNSUPPORTED_OPTIONS.items():
+            if options.pop(name, default) != default:
+                raise ValueError("Pipeline.get_tables cannot use {0}; "
+                                 "use pdftables.get_tables".format(name))
+        if options:
+            raise TypeError("get_tables() got an unexpected keyword "
+                            "argument {0!r}".format(sorted(options)[0]))
+        run = _PipelineRun(self, _source_opener(file_location), password,
+                           compact=compact, templates=templates,
+                           page_cache=page_cache, stats=stats, crop=crop,
+                           rulings=rulings, split_regions=split_regions,
+                           atomise=atomise, engine=_resolve_engine(engine),
+                           metrics=metrics, output=output)
+        with _measured(metrics, page_cache, templates):
+            return run.run()
+
+
+class _PipelineRun(object):
+    """ The state of one Pipeline.get_tables call """
+    def __init__(self, pipeline, open_source, password, compact, templates,
+                 page_cache, stats, crop, rulings, split_regions, atomise,
+                 engine, metrics, output):
+        self.pipeline = pipeline
+        self.open_source = open_source
+        self.password = password
+        self.compact = compact
+        self.templates = templates
+        self.page_cache = page_cache
+        self.font_digests = {}
+        self.stats = stats
+        self.crop = crop
+        self.rulings = rulings
+        self.split_regions = split_regions
+        self.atomise = atomise
+        self.engine = engine
+        self.metrics = metrics
+        self.output = output
+        self.tables = []
+        self.errors = []
+        self.lock = threading.Lock()
+
+    def run(self):
+        pipeline = self.pipeline
+        stage_stats = dict((name, StageStats(name, pipeline.workers[name]))
+                           for name in STAGES)
+        pipeline.stage_stats = stage_stats
+        with self.open_source() as stream:
+            pages = list(PDFPage.create_pages(
+                open_document(stream, self.password)))
+        page_count = len(pages)
+        del pages
+
+        # pages to interpret are queued up front, everything else is bounded
+        inboxes = [queue.Queue()] + [queue.Queue(pipeline.queue_size)
+                                     for _ in STAGES[1:]]
+        for i in range(page_count):
+            inboxes[0].put(i)
+        for _ in range(pipeline.workers['interpret']):
+            inboxes[0].put(_DONE)
+
+        self.assembler = _TableAssembler(page_count, self.compact,
+                                         stats=self.stats,
+                                         metrics=self.metrics)
+        self.pending = {}
+        self.next_page = 0
+        contexts = [self.interpreter, self.simple(self.layout),
+                    self.simple(self.inference), self.simple(self.collect)]
+        started = time.time()
+        threads = []
+        for k, name in enumerate(STAGES):
+            outbox = inboxes[k + 1] if k + 1 < len(STAGES) else None
+            downstream = (pipeline.workers[STAGES[k + 1]]
+                          if outbox is not None else 0)
+            remaining = [pipeline.workers[name]]
+            for _ in range(pipeline.workers[name]):
+                thread = threading.Thread(
+                    target=self.worker,
+                    args=(contexts[k], inboxes[k], outbox, downstream,
+                          stage_stats[name], remaining, started))
+                thread.start()
+                threads.append(thread)
+        for thread in threads:
+            thread.join()
+        if self.errors:
+            raise self.errors[0]
+        return self.tables
+
+    def worker(self, context, inbox, outbox, downstream, stage_stats,
+               remaining, started):
+        """
+        Take items off inbox until _DONE. After an error the rest are
+        drained, so no stage is left waiting on a full queue.
+        """
+        try:
+            with context() as function:
+                while True:
+                    item = inbox.get()
+                    if item is _DONE:
+                        break
+                    if self.errors:
+                        continue
+                    depth = inbox.qsize()
+                    begin = time.time()
+                    item = function(item)
+                    stage_stats.record(time.time() - begin, depth)
+                    if outbox is not None:
+                        outbox.put(item)
+        except Exception as error:
+            self.errors.append(error)
+            while inbox.get() is not _DONE:
+                pass
+        finally:
+            with self.lock:
+                remaining[0] -= 1
+                last = not remaining[0]
+            if last:
+                stage_stats.elapsed = time.time() - started
+                for _ in range(downstream):
+                    outbox.put(_DONE)
+
+    @staticmethod
+    def simple(function):
+        """ A worker context for a stage with no state of its own """
+        @contextlib.contextmanager
+        def context():
+            yield function
+        return context
+
+    @contextlib.contextmanager
+    def interpreter(self):
+        """ Each interpretation worker parses the document itself """
+        with self.open_source() as stream:
+            pages = list(PDFPage.create_pages(
+                open_document(stream, self.password)))
+            interpreter, device = initialize_interpreter(PDFResourceManager())
+
+            def interpret(i):
+                return self.interpret(pages[i], i, interpreter, device)
+
+            yield interpret
+
+    def finish(self, work, skipped=None, tables=(), first_x_comb=None,
+               x_comb=None):
+        tables = list(tables)
+        if self.page_cache is not None:
+            self.page_cache[work.fingerprint] = (_copy_tables(tables),
+                                                 first_x_comb, x_comb)
+        work.result = _PageResult(False, skipped, tables, first_x_comb,
+                                  x_comb)
+        work.layout = work.boxes = None
+        work.timer.done()
+        return work
+
+    def interpret(self, pdf_page, i, interpreter, device):
+        timer = (NULL_TIMER if self.metrics is None
+                 else self.metrics.page_timer())
+        device.crop = crop_for_page(self.crop, i + 1)
+        work = _PageWork(i, None, timer)
+        if self.page_cache is not None:
+            work.fingerprint = _page_cache_key(
+                pdf_page, device.crop, templates=self.templates,
+                rulings=self.rulings, split_regions=self.split_regions,
+                atomise=self.atomise, engine=self.engine,
+                font_digests=self.font_digests)
+            cached = self.page_cache.get(work.fingerprint)
+            if cached is not None:
+                timer.done()
+                work.result = _cached_page(cached)
+                return work
+        skipped = text_free_reason(pdf_page)
+        timer.lap('prescan')
+        if skipped is not None:
+            return self.finish(work, skipped)
+        interpreter.process_page(pdf_page)
+        work.layout = device.get_result()
+        timer.lap('interpret')
+        return work
+
+    def layout(self, work):
+        if work.result is not None:
+            return work
+        work.timer.resume()
+        if not layout_contains_tables(work.layout):
+            return self.finish(work)
+        work.boxes = _page_boxes(work.layout, atomise=self.atomise,
+                                 rulings=self.rulings)
+        work.timer.lap('layout')
+        return work
+
+    def inference(self, work):
+        if work.result is not None:
+            return work
+        work.timer.resume()
+        box_list, ruling_list = work.boxes
+        found = _tables_from_boxes(work.layout, box_list, ruling_list,
+                                   extend_y=True, hints=[],
+                                   atomise=self.atomise,
+                                   templates=self.templates,
+                                   split_regions=self.split_regions,
+                                   engine=self.engine)
+        work.timer.lap('inference')
+        return self.finish(work, None,
+                           *_found_tables(found, self.split_regions))
+
+    def collect(self, work):
+        """ Assemble the tables of each page once those before it are in """
+        self.pending[work.index] = work.result
+        while self.next_page in self.pending:
+            page = self.pending.pop(self.next_page)
+            for table in self.assembler.page_tables(self.next_page, page):
+                if self.output is not None:
+                    self.output(table)
+                self.tables.append(table)
+            self.next_page += 1
+        return work
@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Find the cell grid of a bordered table from its ruling lines (LTLine and
+LTRect objects) so the combs need not be inferred from text projections
+"""
+
+RULING_CLASSES = ['LTLine', 'LTRect']
+# Lines closer than this (in points) are snapped to the same grid line
+RULING_TOLERANCE = 2
+# A grid line must cover this fraction of the grid to be consistent
+RULING_COVERAGE = 0.5
+# The grid must hold at least this fraction of the text boxes on the page
+RULING_TEXT_COVERAGE = 0.5
+
+
+def _segments(ruling_list):
+    """
+    Split ruling boxes into vertical segments (x, bottom, top) and horizontal
+    segments (y, left, right). A rectangle contributes its four edges unless
+    it is thin enough to be a line itself.
+    """
+    verticals = []
+    horizontals = []
+    for box in ruling_list:
+        thin_x = box.right - box.left <= RULING_TOLERANCE
+        thin_y = box.top - box.bottom <= RULING_TOLERANCE
+        if thin_x and thin_y:
+            continue
+        if thin_x:
+            verticals.append((box.centreline, box.bottom, box.top))
+        elif thin_y:
+            horizontals.append((box.midline, box.left, box.right))
+        else:
+            verticals.append((box.left, box.bottom, box.top))
+            verticals.append((box.right, box.bottom, box.top))
+            horizontals.append((box.bottom, box.left, box.right))
+            horizontals.append((box.top, box.left, box.right))
+    return verticals, horizontals
+
+
+def _snap(segments):
+    """
+    Cluster segments at (nearly) the same position, returning a list of
+    (position, total covered length) ordered by position
+    """
+    clusters = []
+    for position, lower, upper in sorted(segments):
+        if clusters and position - clusters[-1][2] <= RULING_TOLERANCE:
+            cluster = clusters[-1]
+            cluster[0] += position
+            cluster[1] += 1
+            cluster[2] = position
+            cluster[3] += upper - lower
+        else:
+            # [sum of positions, count, last position, covered length]
+            clusters.append([position, 1, position, upper - lower])
+    return [(total / count, length)
+            for total, count, _, length in clusters]
+
+
+def ruling_grid(ruling_list, box_list=None):
+    """
+    Returns (x_comb, y_comb) for apply_combs from the ruling lines, x_comb
+    ascending and y_comb descending, or (None, None) if they do not make a
+    consistent grid of at least two rows or two columns. If the page's
+    box_list is given the grid must also hold most of its text, so a page
+    border or a shaded box is not taken for a table.
+    """
+    verticals, horizontals = _segments(ruling_list)
+    xs = _snap(verticals)
+    ys = _snap(horizontals)
+    if len(xs) < 2 or len(ys) < 2:
+        return None, None
+
+    width = xs[-1][0] - xs[0][0]
+    height = ys[-1][0] - ys[0][0]
+    x_comb = [x for x, length in xs if length >= RULING_COVERAGE * height]
+    y_comb = [y for y, length in ys if length >= RULING_COVERAGE * width]
+    if len(x_comb) < 2 or len(y_comb) < 2:
+        return None, None
+    if len(x_comb) < 3 and len(y_comb) < 3:
+        return None, None
+
+    if box_list is not None:
+        grid = (x_comb[0], y_comb[0], x_comb[-1], y_comb[-1])
+        text = [box for box in box_list if box.classname != 'LTPage']
+        inside = sum(1 for box in text if box.is_inside(grid))
+        if not text or inside < RULING_TEXT_COVERAGE * len(text):
+            return None, None
+
+    y_comb.reverse()
+    return x_comb, y_comb
@@ -3,7 +3,7 @@
 # Ian Hopkinson, 2013-06-21
 # -*- coding: utf-8 -*-
 
-from __future__ import unicode_literals
+from __future__ import print_function, unicode_literals
 #import sys
 #import codecs
 # sys.stdout = codecs.getwriter('utf-8')(sys.stdout)
@@ -14,9 +14,9 @@ Tell us what this does
 import os
 from pdftables import get_pdf_page, page_to_tables
 from os.path import join, dirname
-import pdftables_analysis as pta
+from diagnostics import render
 from display import to_string, get_dimensions
-from cStringIO import StringIO
+from io import StringIO
 
 
 PDF_TEST_FILES = os.path.join(os.pardir, 'fixtures\sample_data')
@@ -85,15 +85,16 @@ fh = open(filepath, 'rb')
 
 pdf_page = get_pdf_page(fh, pagenumber)
 
-table, diagnosticData = page_to_tables(pdf_page, extend_y=False, hints=hints, atomise=False)
+table, diagnosticData = page_to_tables(pdf_page, extend_y=False, hints=hints,
+                                       atomise=False, diagnostics=True)
 
-fig, ax1 = pta.plotpage(diagnosticData)
+render(diagnosticData, "page%d.png" % pagenumber)
 
 result = StringIO()
 (columns, rows) = get_dimensions(table)
 result.write("     {} columns, {} rows\n".format(columns, rows))
 
-print to_string(table)
+print(to_string(table))
 
 
 
@@ -0,0 +1,159 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Extract tables from a batch of documents on a process pool. Every document
+is split into page ranges of similar estimated cost, so one long document
+is shared between all the workers instead of holding up the batch.
+"""
+
+import itertools
+import multiprocessing
+
+from pdfminer.pdfpage import PDFPage
+
+from pagescan import content_length
+from pdftables import (open_pdf, initialize_pdf_miner, _extract_page,
+                       _assemble_tables, _PageResult)
+from transfer import (encode_tables, share_buffer, receive_buffer,
+                      track_blocks)
+
+# Cost of a page beyond its content stream length, in bytes of content
+PAGE_COST = 2048
+# Work units made for each process when the unit cost is not given
+UNITS_PER_PROCESS = 8
+
+
+def page_costs(file_location, password=""):
+    """ Estimated cost of each page of a document, from a quick pre-scan """
+    with open_pdf(file_location) as stream:
+        doc, _, _ = initialize_pdf_miner(stream, password)
+        return [PAGE_COST + content_length(pdf_page)
+                for pdf_page in PDFPage.create_pages(doc)]
+
+
+def plan_units(costs, unit_cost):
+    """
+    Split the pages of each document into ranges costing about unit_cost.
+    costs holds the page costs of each document. Returns (document, start,
+    stop) for each unit, the most costly first, so the longest units do not
+    start last.
+
+    plan_units([[5, 5, 5], [20]], 10)
+    [(1, 0, 1), (0, 0, 2), (0, 2, 3)]
+    """
+    units = []
+    for document, document_costs in enumerate(costs):
+        start = 0
+        total = 0
+        for i, cost in enumerate(document_costs):
+            total += cost
+            if total >= unit_cost:
+                units.append((total, document, start, i + 1))
+                start = i + 1
+                total = 0
+        if start < len(document_costs):
+            units.append((total, document, start, len(document_costs)))
+    units.sort(key=lambda unit: -unit[0])
+    return [unit[1:] for unit in units]
+
+
+def _page_costs(args):
+    return page_costs(*args)
+
+
+def share_results(results):
+    """ Put _PageResults in shared memory, returning the handle """
+    tables = [table for result in results for table in result.tables]
+    metadata = [dict(duplicate=result.duplicate, skipped=result.skipped,
+                     tables=len(result.tables),
+                     first_x_comb=result.first_x_comb, x_comb=result.x_comb)
+                for result in results]
+    return share_buffer(encode_tables(tables, metadata))
+
+
+def receive_results(handle):
+    """ The _PageResults from share_results """
+    tables, metadata = receive_buffer(handle)
+    results = []
+    for entry in metadata:
+        page_tables = tables[:entry['tables']]
+        del tables[:entry['tables']]
+        results.append(_PageResult(entry['duplicate'], entry['skipped'],
+                                   page_tables, entry['first_x_comb'],
+                                   entry['x_comb']))
+    return results
+
+
+def _extract_unit(unit):
+    """
+    (document, start, _PageResults) for the pages start:stop, with the
+    results in shared memory if shared is True
+    """
+    document, file_location, password, start, stop, shared, options = unit
+    with open_pdf(file_location) as stream:
+        doc, interpreter, device = initialize_pdf_miner(stream, password)
+        pages = itertools.islice(PDFPage.create_pages(doc), start, stop)
+        page_cache = {}
+        font_digests = {}
+        results = [_extract_page(pdf_page, i, interpreter, device,
+                                 page_cache, font_digests=font_digests,
+                                 **options)
+                   for i, pdf_page in enumerate(pages, start)]
+    if shared:
+        return document, start, share_results(results)
+    return document, start, results
+
+
+def get_tables_batch(file_locations, password="", processes=None,
+                     unit_cost=None, compact=False, templates=None,
+                     stats=None, crop=None, rulings=False,
+                     split_regions=False, shared=False):
+    """
+    get_tables for each path in file_locations, run on a pool of processes.
+    Returns a list with the tables of each document, in the order given.
+
+    Page costs are estimated from content stream lengths, and documents are
+    split into units of about unit_cost (by default a share of the batch
+    giving each process several units). Idle workers take the next unit
+    from the pool's queue, largest first, and the results are put back in
+    page order. A unit does not know the page before it, so carry_comb is
+    not available, and duplicate pages are only found within a unit.
+
+    With shared=True workers return their tables through shared memory
+    (see transfer, python 3.8 or later) rather than pickling them.
+    """
+    file_locations = list(file_locations)
+    processes = processes or multiprocessing.cpu_count()
+    options = dict(templates=templates, crop=crop, rulings=rulings,
+                   split_regions=split_regions)
+    if shared:
+        track_blocks()
+    pool = multiprocessing.Pool(processes)
+    try:
+        costs = pool.map(_page_costs,
+                         [(file_location, password)
+                          for file_location in file_locations])
+        if unit_cost is None:
+            total = sum(sum(document_costs) for document_costs in costs)
+            unit_cost = max(total // (processes * UNITS_PER_PROCESS),
+                            PAGE_COST)
+        units = [(document, file_locations[document], password, start, stop,
+                  shared, options)
+                 for document, start, stop in plan_units(costs, unit_cost)]
+
+        results = [[None] * len(document_costs) for document_costs in costs]
+        for document, start, pages in pool.imap_unordered(_extract_unit,
+                                                          units):
+            if shared:
+                pages = receive_results(pages)
+            results[document][start:start + len(pages)] = pages
+        pool.close()
+    except:
+        pool.terminate()
+        raise
+    finally:
+        pool.join()
+
+    return [_assemble_tables(document_results, compact=compact, stats=stats)
+            for document_results in results]
@@ -0,0 +1,171 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+A worker-level extraction session which keeps pdfminer's resource manager,
+interpreter and device alive across documents, so fonts embedded in many
+documents are only parsed once.
+"""
+
+import collections
+
+from pdfminer.cmapdb import CMapDB
+from pdfminer.pdfinterp import PDFResourceManager
+
+from pagescan import font_fingerprint
+from pdftables import (open_pdf, open_document, initialize_interpreter,
+                       _get_tables, _measured, _resolve_engine)
+
+# Parsed fonts kept by an Extractor, least recently used are evicted first
+FONT_CACHE_SIZE = 256
+# Predefined CMaps pdfminer keeps loaded for the whole process once an
+# Extractor is made, the first loaded are evicted first
+CMAP_CACHE_SIZE = 16
+# get_tables options an Extractor cannot use, beyond their defaults
+UNSUPPORTED_OPTIONS = ('threads', 'backend')
+
+
+class FontCache(collections.OrderedDict):
+    """ A least recently used mapping holding at most maxsize fonts """
+    def __init__(self, maxsize=FONT_CACHE_SIZE):
+        super(FontCache, self).__init__()
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def lookup(self, key):
+        """ Return the font for key, or None, counting hits and misses """
+        font = self.get(key)
+        if font is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        # mark as most recently used
+        del self[key]
+        self[key] = font
+        return font
+
+    def store(self, key, font):
+        self[key] = font
+        while len(self) > self.maxsize:
+            self.popitem(last=False)
+            self.evictions += 1
+
+
+class CMapCache(collections.OrderedDict):
+    """
+    A mapping holding at most maxsize of the CMaps last stored, put in
+    place of pdfminer's CMapDB caches, which otherwise keep every CMap
+    loaded until the process exits
+    """
+    def __init__(self, items=(), maxsize=CMAP_CACHE_SIZE):
+        super(CMapCache, self).__init__()
+        self.maxsize = maxsize
+        self.evictions = 0
+        for key, value in items:
+            self[key] = value
+
+    def __setitem__(self, key, value):
+        super(CMapCache, self).__setitem__(key, value)
+        while len(self) > self.maxsize:
+            self.popitem(last=False)
+            self.evictions += 1
+
+
+def bound_cmap_cache(maxsize=CMAP_CACHE_SIZE):
+    """
+    Bound pdfminer's caches of predefined CMaps and their Unicode maps to
+    maxsize each. They belong to the CMapDB class, so this holds for the
+    whole process.
+    """
+    for name in ('_cmap_cache', '_umap_cache'):
+        cache = getattr(CMapDB, name)
+        if isinstance(cache, CMapCache):
+            cache.maxsize = maxsize
+            while len(cache) > maxsize:
+                cache.popitem(last=False)
+                cache.evictions += 1
+        else:
+            setattr(CMapDB, name, CMapCache(list(cache.items()), maxsize))
+
+
+class CachingResourceManager(PDFResourceManager):
+    """
+    A PDFResourceManager which can be shared between documents. Fonts are
+    cached by the fingerprint of their dictionary and embedded streams
+    rather than by object id, which is only unique within one document.
+    At most max_fonts are kept, and pdfminer's process-wide cache of
+    predefined CMaps is bounded to max_cmaps by bound_cmap_cache.
+    """
+    def __init__(self, max_fonts=FONT_CACHE_SIZE, max_cmaps=CMAP_CACHE_SIZE):
+        PDFResourceManager.__init__(self, caching=True)
+        bound_cmap_cache(max_cmaps)
+        self._cached_fonts = FontCache(max_fonts)
+        # spec dicts are shared by every page of a document, so remember
+        # their fingerprints rather than hashing the font program each page.
+        # Holding the spec keeps its id from being reused.
+        self._font_keys = FontCache(max_fonts)
+
+    def font_key(self, spec):
+        entry = self._font_keys.get(id(spec))
+        if entry is not None and entry[0] is spec:
+            return entry[1]
+        key = font_fingerprint(spec)
+        self._font_keys.store(id(spec), (spec, key))
+        return key
+
+    def get_font(self, objid, spec):
+        if not objid:
+            # descendant fonts of Type0 fonts are cached with their parent
+            return PDFResourceManager.get_font(self, None, spec)
+        key = self.font_key(spec)
+        font = self._cached_fonts.lookup(key)
+        if font is None:
+            font = PDFResourceManager.get_font(self, None, spec)
+            self._cached_fonts.store(key, font)
+        return font
+
+
+class Extractor(object):
+    """
+    Keep one resource manager, interpreter and device for many documents.
+    Use one Extractor per worker; it is not safe to share between threads.
+
+    extractor = Extractor()
+    for file_name in batch:
+        tables = extractor.get_tables(file_name)
+    """
+    def __init__(self, max_fonts=FONT_CACHE_SIZE, max_cmaps=CMAP_CACHE_SIZE):
+        self.rsrcmgr = CachingResourceManager(max_fonts, max_cmaps)
+        self.interpreter, self.device = initialize_interpreter(self.rsrcmgr)
+
+    @property
+    def font_cache(self):
+        return self.rsrcmgr._cached_fonts
+
+    def get_tables(self, file_location, password="", **options):
+        """
+        Same as pdftables.get_tables, but reusing this session's parsed
+        fonts. It takes the same keyword options except threads and
+        backend, since the session's one interpreter and device read every
+        page. With metrics the size of the font cache is reported too.
+        """
+        for name in UNSUPPORTED_OPTIONS:
+            if options.pop(name, None) not in (None, 1):
+                raise ValueError("Extractor.get_tables cannot use {0}; "
+                                 "use pdftables.get_tables".format(name))
+        if 'engine' in options:
+            options['engine'] = _resolve_engine(options['engine'])
+        metrics = options.get('metrics')
+        try:
+            with _measured(metrics, options.get('page_cache'),
+                           options.get('templates')):
+                with open_pdf(file_location) as stream:
+                    doc = open_document(stream, password)
+                    return _get_tables(doc, self.interpreter, self.device,
+                                       **options)
+        finally:
+            if metrics is not None:
+                metrics.set_gauge('cache_entries', len(self.font_cache),
+                                  cache='fonts')
@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Uniform grid index over the boxes of a page, for rectangle queries. It is
+built once for a page's boxes and shared, restricted, by the lists
+filtered from them.
+"""
+
+import copy
+import math
+
+# Width and height of a grid cell in points
+CELL_SIZE = 32
+NEGATIVE_INFINITY = float('-inf')
+
+
+class GridIndex(object):
+    """
+    Index a list of boxes (Leaf objects) by the centre of each box. Queries
+    return boxes in the order of the original list. A restricted index
+    leaves out the boxes its keep function rejects.
+    """
+    def __init__(self, box_list, cell_size=CELL_SIZE):
+        self.box_list = box_list
+        self.size = len(box_list)
+        self.cell_size = float(cell_size)
+        self.keep = None
+        self.cells = {}
+        for i, box in enumerate(box_list):
+            self.cells.setdefault(self._cell(box.centreline, box.midline),
+                                  []).append(i)
+
+    def restricted(self, keep, size):
+        """
+        This index for the size boxes for which keep(box) is true, a list
+        filtered from the indexed one in order
+        """
+        view = copy.copy(self)
+        view.size = size
+        outer = self.keep
+        if outer is None:
+            view.keep = keep
+        else:
+            view.keep = lambda box: outer(box) and keep(box)
+        return view
+
+    def _cell(self, x, y):
+        return (int(math.floor(x / self.cell_size)),
+                int(math.floor(y / self.cell_size)))
+
+    def _indices(self, rect):
+        """ Indices of the boxes with their centre in rect, in order """
+        # a bound of None is below every position, as it compares in python 2
+        (left, bottom, right, top) = [NEGATIVE_INFINITY if v is None else v
+                                      for v in rect]
+        if left > right or bottom > top:
+            return []
+        if NEGATIVE_INFINITY in (left, bottom):
+            # unbounded below, so every box is a candidate
+            candidates = range(len(self.box_list))
+        else:
+            (x0, y0) = self._cell(left, bottom)
+            (x1, y1) = self._cell(right, top)
+            if (x1 - x0 + 1) * (y1 - y0 + 1) > len(self.cells):
+                candidates = [i for cell in self.cells.values() for i in cell]
+            else:
+                candidates = [i for x in range(x0, x1 + 1)
+                              for y in range(y0, y1 + 1)
+                              for i in self.cells.get((x, y), ())]
+        keep = self.keep
+        found = []
+        for i in candidates:
+            box = self.box_list[i]
+            if (left <= box.centreline <= right and
+                    bottom <= box.midline <= top and
+                    (keep is None or keep(box))):
+                found.append(i)
+        found.sort()
+        return found
+
+    def query(self, rect):
+        """ Boxes with their centre inside rect (left, bottom, right, top) """
+        return [self.box_list[i] for i in self._indices(rect)]
@@ -0,0 +1,37 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Counters and per-page records collected while extracting tables
+"""
+
+import threading
+
+from counter import Counter
+
+
+class ExtractionStats(object):
+    """
+    Pass one of these to get_tables (or several calls of it, for a batch).
+    counts holds totals such as "pages", "tables", "duplicate_pages" and
+    "skipped_pages"; pages holds one dict per page processed, with the
+    reason a page was skipped without interpreting it (or None).
+    """
+    def __init__(self):
+        self.counts = Counter()
+        self.pages = []
+        self._lock = threading.Lock()
+
+    def incr(self, name, value=1):
+        with self._lock:
+            self.counts[name] += value
+
+    def add_page(self, page_number, **details):
+        """ Record one page and return its dict for further details """
+        record = dict(page=page_number, **details)
+        with self._lock:
+            self.pages.append(record)
+        return record
+
+    def __repr__(self):
+        return 'ExtractionStats({!r})'.format(dict(self.counts))
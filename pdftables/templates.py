@@ -0,0 +1,269 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Reusable layout templates for recurring report formats. A template holds the
+table bounding box and the x and y combs found for one layout, keyed by a
+coarse page fingerprint, so later pages with the same layout can go straight
+to apply_combs.
+"""
+
+import bisect
+import hashlib
+import json
+import threading
+
+import numpy
+
+from counter import Counter
+
+# Text line left edges are rounded to this many points for the fingerprint
+FINGERPRINT_TOLERANCE = 10
+# A left edge must be shared by more than this many lines to count
+FINGERPRINT_COUNT_THRESHOLD = 3
+# Boxes may overlap a comb tooth by this many points and still fit
+FIT_TOLERANCE = 1
+# Box midlines are rounded to this many points to identify text lines
+FIT_LINE_TOLERANCE = 2
+# Fraction of boxes which must sit cleanly inside the cells
+FIT_THRESHOLD = 0.95
+# Runs on one line of a column further apart than this many times their
+# height are separate cells, so the column comb is too coarse
+FIT_RUN_GAP_FACTOR = 1
+
+
+def page_fingerprint(page, box_list, atomise=False, extend_y=False):
+    """
+    Fingerprint a page layout from the page size and the left edges shared
+    by several text lines. Options that change the combs are part of the key.
+    """
+    lefts = Counter(
+        int(round(box.left / FINGERPRINT_TOLERANCE))
+        for box in box_list if box.classname == 'LTTextLineHorizontal')
+    signature = (
+        [int(round(v)) for v in page.bbox],
+        sorted(k for k, v in lefts.items() if v > FINGERPRINT_COUNT_THRESHOLD),
+        bool(atomise),
+        bool(extend_y))
+    return hashlib.sha1(repr(signature).encode('utf-8')).hexdigest()
+
+
+def _straddles(lower, upper, teeth):
+    """ True if the interval crosses an interior tooth of the comb """
+    for tooth in teeth:
+        if lower + FIT_TOLERANCE < tooth < upper - FIT_TOLERANCE:
+            return True
+    return False
+
+
+def _row_index(y_comb, value):
+    """ Interval of a descending comb holding value, or -1 """
+    index = bisect.bisect_left([-y for y in y_comb], -value)
+    if 0 < index < len(y_comb) or (index == 0 and value == y_comb[0]):
+        return max(index - 1, 0)
+    return -1
+
+
+def _runs(box_list, bbox, y_comb=None):
+    """
+    Group boxes whose centres are inside bbox into runs of touching boxes on
+    the same text line (words, when atomised). Returns the runs as
+    [left, right, line, [(box, row), ...]] and, if a y_comb is given, a
+    Counter of the lines falling in each of its rows.
+    """
+    (minx, maxx, miny, maxy) = bbox
+    runs = []
+    lines_by_row = {}
+    for box in box_list:
+        if box.classname == 'LTPage':
+            continue
+        if not (minx <= box.centreline <= maxx and
+                miny <= box.midline <= maxy):
+            continue
+        row = -1
+        line = int(round(box.midline / FIT_LINE_TOLERANCE))
+        if y_comb is not None:
+            row = _row_index(y_comb, box.midline)
+            lines_by_row.setdefault(row, Counter()).update([line])
+        if (runs and runs[-1][2] == line and
+                0 <= box.left - runs[-1][1] <= FIT_TOLERANCE):
+            runs[-1][1] = box.right
+            runs[-1][3].append((box, row))
+        else:
+            runs.append([box.left, box.right, line, [(box, row)]])
+    return runs, lines_by_row
+
+
+def column_comb_fit(x_comb, box_list, miny, maxy):
+    """
+    Fraction of the boxes between miny and maxy whose runs do not straddle a
+    column boundary of x_comb, or 0 if any column is left empty or holds
+    runs on one line far enough apart to be separate columns. Used to check
+    a column comb carried over from a previous page, so it works on arrays
+    rather than box by box as _runs does.
+    """
+    bboxes = numpy.array([box.bbox for box in box_list
+                          if box.classname != 'LTPage'],
+                         dtype=float).reshape(-1, 4)
+    lefts, bottoms, rights, tops = bboxes.T
+    centres = (lefts + rights) / 2.0
+    middles = (bottoms + tops) / 2.0
+    inside = ((x_comb[0] <= centres) & (centres <= x_comb[-1]) &
+              (miny <= middles) & (middles <= maxy))
+    if not inside.any():
+        return 0.0
+    lefts, rights = lefts[inside], rights[inside]
+    heights = (tops - bottoms)[inside]
+    lines = numpy.rint(middles[inside] / FIT_LINE_TOLERANCE)
+
+    # runs of touching boxes on the same line, as in _runs
+    gaps = lefts[1:] - rights[:-1]
+    starts = numpy.ones(len(lefts), dtype=bool)
+    starts[1:] = ((lines[1:] != lines[:-1]) | (gaps < 0) |
+                  (gaps > FIT_TOLERANCE))
+    firsts = numpy.flatnonzero(starts)
+    lasts = numpy.append(firsts[1:] - 1, len(lefts) - 1)
+    sizes = lasts - firsts + 1
+    run_lefts, run_rights = lefts[firsts], rights[lasts]
+    run_heights = numpy.maximum.reduceat(heights, firsts)
+    run_lines = lines[firsts]
+
+    x_teeth = numpy.asarray(x_comb[1:-1], dtype=float)
+    straddles = (numpy.searchsorted(x_teeth, run_rights - FIT_TOLERANCE) >
+                 numpy.searchsorted(x_teeth, run_lefts + FIT_TOLERANCE,
+                                    'right'))
+    clean = ~straddles
+    columns = numpy.searchsorted(x_teeth,
+                                 (run_lefts + run_rights)[clean] / 2.0)
+    if len(numpy.unique(columns)) < len(x_comb) - 1:
+        return 0.0
+
+    # runs in each cell from left to right, far apart on one line
+    run_lefts, run_rights = run_lefts[clean], run_rights[clean]
+    run_heights, run_lines = run_heights[clean], run_lines[clean]
+    order = numpy.lexsort((run_heights, run_rights, run_lefts, run_lines,
+                           columns))
+    same_cell = ((columns[order][1:] == columns[order][:-1]) &
+                 (run_lines[order][1:] == run_lines[order][:-1]))
+    apart = (run_lefts[order][1:] - run_rights[order][:-1] >
+             FIT_RUN_GAP_FACTOR * numpy.maximum(run_heights[order][1:],
+                                                run_heights[order][:-1]))
+    if (same_cell & apart).any():
+        return 0.0
+    return float(sizes[clean].sum()) / len(lefts)
+
+
+class LayoutTemplate(object):
+    """ The bounding box and combs of one table layout """
+    def __init__(self, bbox, x_comb, y_comb):
+        self.bbox = tuple(float(v) for v in bbox)
+        self.x_comb = [float(v) for v in x_comb]
+        self.y_comb = [float(v) for v in y_comb]
+
+    def fit(self, box_list):
+        """
+        Fraction of the boxes inside the template bounding box which land
+        cleanly in a cell, or 0 if there are no such boxes. A box is not clean
+        if it shares its row with boxes from a different text line, or if it
+        is part of a run of touching boxes (a word, when atomised) which
+        straddles a column boundary. Boxes on lines above or below the
+        template which fill several of its columns are rows it lacks, so they
+        count against it too.
+        """
+        runs, lines_by_row = _runs(box_list, self.bbox, self.y_comb)
+        if not runs:
+            return 0.0
+
+        x_teeth = self.x_comb[1:-1]
+        inside = 0
+        clean = 0
+        for left, right, line, boxes in runs:
+            inside += len(boxes)
+            if _straddles(left, right, x_teeth):
+                continue
+            for box, row in boxes:
+                if row != -1 and lines_by_row[row].most_common(1)[0][0] == line:
+                    clean += 1
+        return float(clean) / (inside + self._extra_rows(box_list))
+
+    def _extra_rows(self, box_list):
+        """
+        The number of boxes on text lines outside the template's rows, but
+        within its columns, which have runs in more than one column
+        """
+        (minx, maxx, miny, maxy) = self.bbox
+        outside = [box for box in box_list
+                   if minx <= box.centreline <= maxx and
+                   not miny <= box.midline <= maxy]
+        x_teeth = self.x_comb[1:-1]
+        columns = {}  # line: set of columns
+        sizes = Counter()
+        for left, right, line, boxes in _runs(
+                outside, (minx, maxx, float('-inf'), float('inf')))[0]:
+            columns.setdefault(line, set()).add(
+                bisect.bisect_left(x_teeth, (left + right) / 2.0))
+            sizes[line] += len(boxes)
+        return sum(sizes[line] for line, used in columns.items()
+                   if len(used) > 1)
+
+    def to_dict(self):
+        return {"bbox": self.bbox, "x_comb": self.x_comb,
+                "y_comb": self.y_comb}
+
+    @classmethod
+    def from_dict(cls, d):
+        return cls(d["bbox"], d["x_comb"], d["y_comb"])
+
+
+class TemplateStore(dict):
+    """
+    LayoutTemplates keyed by page fingerprint, with match counts. Pass one to
+    page_to_tables or get_tables to reuse combs across recurring documents.
+    A store may be shared between threads.
+    """
+    def __init__(self, templates=None, threshold=FIT_THRESHOLD):
+        super(TemplateStore, self).__init__(templates or {})
+        self.threshold = threshold
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def match(self, fingerprint, box_list):
+        """
+        Return the template for the fingerprint if it fits the boxes well
+        enough, otherwise None (and the caller should do full inference)
+        """
+        template = self.get(fingerprint)
+        if template is not None and template.fit(box_list) >= self.threshold:
+            with self._lock:
+                self.hits += 1
+            return template
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def __getstate__(self):
+        # sent to worker processes without the lock
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def add(self, fingerprint, bbox, x_comb, y_comb):
+        self[fingerprint] = LayoutTemplate(bbox, x_comb, y_comb)
+
+    def save(self, file_name):
+        with open(file_name, 'w') as file_ptr:
+            items = list(self.items())
+            json.dump(dict((k, v.to_dict()) for k, v in items),
+                      file_ptr, indent=1, sort_keys=True)
+
+    @classmethod
+    def load(cls, file_name, threshold=FIT_THRESHOLD):
+        with open(file_name) as file_ptr:
+            data = json.load(file_ptr)
+        return cls(dict((k, LayoutTemplate.from_dict(v))
+                        for k, v in data.items()), threshold=threshold)
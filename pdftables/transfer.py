@@ -0,0 +1,229 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Pass tables between processes in multiprocessing.shared_memory blocks
+instead of pickling them. Each table is stored as a UTF-8 blob of its cells
+with their character offsets, after a JSON header holding the metadata, so
+a table is decoded in one go and then cut into cells.
+
+In the parent, before starting the workers:
+
+    track_blocks()
+
+in a worker process:
+
+    handle = share_tables(get_tables(file_name))
+
+and in the parent, which owns and frees the block:
+
+    tables = receive_tables(handle)
+"""
+
+import codecs
+import json
+import struct
+
+import numpy
+
+try:
+    from multiprocessing import resource_tracker, shared_memory
+except ImportError:  # python < 3.8
+    shared_memory = None
+
+from compact import CompactTable
+from pdftables import Table
+
+_LENGTH = struct.Struct('<Q')
+_OFFSET = numpy.dtype('<u4')
+_ALIGN = 8
+
+
+def _aligned(position):
+    return -(-position // _ALIGN) * _ALIGN
+
+
+def _scalar(value):
+    """ numpy numbers in the metadata (as in combs) are stored as numbers """
+    if isinstance(value, numpy.generic):
+        return value.item()
+    raise TypeError("{0!r} is not JSON serializable".format(value))
+
+
+def encode_tables(tables, metadata=None):
+    """
+    Encode tables (lists of rows of strings, all rows the same length) and
+    JSON serialisable metadata into one bytearray
+    """
+    layout = []
+    blobs = []
+    position = 0
+    for table in tables:
+        cells = [cell for row in table for cell in row]
+        offsets = numpy.zeros(len(cells) + 1, dtype=_OFFSET)
+        offsets[1:] = numpy.cumsum([len(cell) for cell in cells])
+        blob = u''.join(cells).encode('utf-8')
+        shape = [len(table), len(table[0]) if len(table) else 0]
+        layout.append(dict(shape=shape, offsets=position,
+                           blob=position + offsets.nbytes,
+                           length=len(blob)))
+        blobs.append((offsets.tobytes(), blob))
+        position = _aligned(position + offsets.nbytes + len(blob))
+
+    header = json.dumps(dict(tables=layout, metadata=metadata),
+                        separators=(',', ':'),
+                        default=_scalar).encode('utf-8')
+    start = _aligned(_LENGTH.size + len(header))
+    buffer = bytearray(start + position)
+    _LENGTH.pack_into(buffer, 0, len(header))
+    buffer[_LENGTH.size:_LENGTH.size + len(header)] = header
+    for entry, (offsets, blob) in zip(layout, blobs):
+        at = start + entry['offsets']
+        buffer[at:at + len(offsets)] = offsets
+        at = start + entry['blob']
+        buffer[at:at + len(blob)] = blob
+    return buffer
+
+
+class TableView(object):
+    """
+    A table read from an encoded buffer without copying; its text is only
+    decoded when a cell is first asked for.
+    """
+    def __init__(self, shape, offsets, blob):
+        self.shape = tuple(shape)
+        self._offsets = offsets
+        self._blob = blob
+        self._text = None
+
+    @property
+    def text(self):
+        if self._text is None:
+            self._text = codecs.utf_8_decode(self._blob)[0]
+        return self._text
+
+    def cell(self, i, j):
+        k = i * self.shape[1] + j
+        return self.text[self._offsets[k]:self._offsets[k + 1]]
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __getitem__(self, i):
+        if not -self.shape[0] <= i < self.shape[0]:
+            raise IndexError("row index out of range")
+        i %= self.shape[0]
+        return [self.cell(i, j) for j in range(self.shape[1])]
+
+    def __iter__(self):
+        for i in range(self.shape[0]):
+            yield self[i]
+
+    def to_list(self):
+        text = self.text
+        offsets = self._offsets
+        cells = [text[start:stop]
+                 for start, stop in zip(offsets, offsets[1:])]
+        columns = self.shape[1]
+        if not columns:
+            return [[] for _ in range(self.shape[0])]
+        return [cells[k:k + columns] for k in range(0, len(cells), columns)]
+
+    def __repr__(self):
+        return 'TableView(shape={0})'.format(self.shape)
+
+
+def decode_tables(buffer, views=False):
+    """
+    (tables, metadata) from encode_tables. The tables are lists of rows, or
+    TableViews on buffer if views is True.
+    """
+    buffer = memoryview(buffer)
+    (header_length,) = _LENGTH.unpack_from(buffer, 0)
+    header = json.loads(codecs.utf_8_decode(
+        buffer[_LENGTH.size:_LENGTH.size + header_length])[0])
+    start = _aligned(_LENGTH.size + header_length)
+    tables = []
+    for entry in header['tables']:
+        rows, columns = entry['shape']
+        offsets = numpy.frombuffer(buffer, dtype=_OFFSET,
+                                   count=rows * columns + 1,
+                                   offset=start + entry['offsets'])
+        at = start + entry['blob']
+        view = TableView(entry['shape'], offsets.tolist(),
+                         buffer[at:at + entry['length']])
+        tables.append(view if views else view.to_list())
+    return tables, header['metadata']
+
+
+def track_blocks():
+    """
+    Start the resource tracker in this process, before starting the workers
+    which share buffers with it, so that they all use the same one. A block
+    is registered with it until received, and one never received (because
+    this process failed or was killed) is freed when they have all exited.
+    """
+    if shared_memory is None:
+        raise RuntimeError("multiprocessing.shared_memory needs python 3.8")
+    resource_tracker.ensure_running()
+
+
+def share_buffer(buffer):
+    """
+    Copy an encoded buffer into a new shared memory block and return its
+    handle. The block is left for the receiving process to free; see
+    track_blocks.
+    """
+    if shared_memory is None:
+        raise RuntimeError("multiprocessing.shared_memory needs python 3.8")
+    block = shared_memory.SharedMemory(create=True,
+                                       size=max(len(buffer), 1))
+    try:
+        block.buf[:len(buffer)] = buffer
+    finally:
+        block.close()
+    return (block.name, len(buffer))
+
+
+def receive_buffer(handle, views=False):
+    """
+    decode_tables for a shared memory block from share_buffer, freeing it.
+    With views the block is copied once, as a whole, for the TableViews.
+    """
+    name, size = handle
+    block = shared_memory.SharedMemory(name=name)
+    try:
+        if views:
+            return decode_tables(bytes(block.buf[:size]), views=True)
+        data = block.buf[:size]
+        try:
+            return decode_tables(data)
+        finally:
+            data.release()
+    finally:
+        block.close()
+        block.unlink()
+
+
+def table_metadata(table):
+    """ The page and table dicts a Table was made from """
+    return dict(
+        page={"page": table.page_number, "page_total": table.total_pages},
+        table={"table_index": table.table_number_on_page,
+               "table_index_total": table.total_tables_on_page,
+               "logical_table": table.logical_table_number,
+               "continuation": table.continues_previous})
+
+
+def share_tables(tables):
+    """ Put Table (or CompactTable) objects in shared memory """
+    return share_buffer(encode_tables(
+        tables, [table_metadata(table) for table in tables]))
+
+
+def receive_tables(handle, compact=False):
+    """ The Table (or CompactTable) objects from share_tables """
+    table_class = CompactTable if compact else Table
+    tables, metadata = receive_buffer(handle)
+    return [table_class(table, entry['page'], entry['table'])
+            for table, entry in zip(tables, metadata)]
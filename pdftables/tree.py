@@ -10,6 +10,7 @@ tree classes which hold the parsed PDF document data
 
 import collections
 from counter import Counter
+from spatial import GridIndex
 
 def _rounder(val,tol):
      """
@@ -73,6 +74,12 @@ class Leaf(object):
     def get_bbox(self):
         return self.bbox
 
+    def is_inside(self, rect):
+        """ True if the centre of the box is inside rect (left, bottom,
+        right, top) """
+        return (rect[0] <= self.centreline <= rect[2] and
+                rect[1] <= self.midline <= rect[3])
+
 def children(obj):
     """get all descendants of nested iterables"""
     if isinstance(obj, collections.Iterable):
@@ -82,13 +89,32 @@ def children(obj):
     yield obj
 
 class LeafList(list):
+    _index = None
+
+    def spatial_index(self):
+        """ A GridIndex over the boxes, built on first use """
+        if self._index is None or self._index.size != len(self):
+            self._index = GridIndex(self)
+        return self._index
+
+    def filter(self, keep):
+        """
+        The boxes for which keep(box) is true. If this list is indexed the
+        new one shares the index, restricted to them, rather than building
+        its own.
+        """
+        kept = LeafList(box for box in self if keep(box))
+        if self._index is not None and self._index.size == len(self):
+            kept._index = self._index.restricted(keep, len(kept))
+        return kept
+
     def purge_empty_text(self):
-        return LeafList(box for box in self if box.text.strip()
-                            or box.classname != 'LTTextLineHorizontal')
+        return self.filter(lambda box: box.text.strip()
+                           or box.classname != 'LTTextLineHorizontal')
 
     def filterByType(self, flt=None):
         if not flt: return self
-        return LeafList(box for box in self if box.classname in flt)
+        return self.filter(lambda box: box.classname in flt)
 
     def histogram(self, dir_fun):
         # index 0 = left, 1 = top, 2 = right, 3 = bottom
@@ -98,10 +124,20 @@ class LeafList(list):
         """
         return Histogram(dir_fun(box) for box in self)
 
-    def populate(self, pdfpage, interested=['LTPage','LTTextLineHorizontal']):
+    def populate(self, pdfpage, interested=['LTPage','LTTextLineHorizontal'],
+                 region=None):
+        """ Add a Leaf for each object on the page, keeping only those with
+        their centre in region (left, bottom, right, top) if it is given """
+        self._index = None
         for obj in children(pdfpage):
-            if not interested or obj.__class__.__name__ in interested:
-                self.append(Leaf(obj))
+            # a backends.LayoutPage holds Leafs already
+            classname = (obj.classname if isinstance(obj, Leaf)
+                         else obj.__class__.__name__)
+            if not interested or classname in interested:
+                leaf = obj if isinstance(obj, Leaf) else Leaf(obj)
+                if (region is None or leaf.classname == 'LTPage' or
+                        leaf.is_inside(region)):
+                    self.append(leaf)
         return self
 
     def count(self):
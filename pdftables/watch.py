@@ -0,0 +1,382 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+A daemon extracting the tables of PDFs as they are dropped in a directory,
+rather than in periodic batches.
+
+    watcher = FolderWatcher('/srv/drop', output_directory='/srv/tables')
+    watcher.run()
+
+or from the command line:
+
+    python watch.py /srv/drop --output /srv/tables --processes 4
+
+The directory is polled, or watched with inotify when inotify_simple is
+installed. A file is taken once it has been closed after writing (inotify)
+or has not changed for settle seconds. It is handed to a pool of worker
+processes kept running between files, each with its own session.Extractor,
+so imports and parsed fonts stay warm. The tables are written atomically
+to the output directory (by default next to the input), the input is moved
+to done (or failed, with the error), and the latency of each file is
+recorded in metrics.
+"""
+
+import argparse
+import collections
+import csv
+import io
+import json
+import multiprocessing
+import os
+import sys
+import time
+import uuid
+
+from display import to_string
+from session import Extractor
+from transfer import table_metadata
+
+try:
+    import inotify_simple
+except ImportError:
+    inotify_simple = None
+
+# Seconds between looks at the directory when inotify is not used
+POLL_SECONDS = 0.5
+# Seconds a file must stay the same size and age to be taken as written
+SETTLE_SECONDS = 2.0
+FORMATS = {'json': '.json', 'csv': '.csv', 'text': '.txt'}
+# Per-file metrics kept in memory
+METRICS_KEPT = 10000
+
+_WORKER = []  # the Extractor and get_tables options of a worker process
+
+
+def write_atomically(path, write):
+    """
+    Call write with a file object on a temporary file beside path, then
+    rename it into place, so readers never see a partial file
+    """
+    directory, name = os.path.split(path)
+    tmp = os.path.join(directory, '.{0}.{1}.tmp'.format(name,
+                                                         uuid.uuid4().hex))
+    try:
+        if sys.version_info[0] < 3:
+            file_ptr = open(tmp, 'wb')
+        else:
+            file_ptr = io.open(tmp, 'w', encoding='utf-8', newline='')
+        with file_ptr:
+            write(file_ptr)
+        os.rename(tmp, path)
+    except:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+
+def _write_json(tables):
+    def write(file_ptr):
+        document = [dict(rows=[list(row) for row in table],
+                         **table_metadata(table)) for table in tables]
+        file_ptr.write(json.dumps(document, indent=1, sort_keys=True))
+    return write
+
+
+def _write_csv(tables):
+    """ Every table, with a blank row after each """
+    def write(file_ptr):
+        writer = csv.writer(file_ptr)
+        for table in tables:
+            for row in table:
+                if sys.version_info[0] < 3:
+                    row = [cell.encode('utf-8') for cell in row]
+                writer.writerow(row)
+            writer.writerow([])
+    return write
+
+
+def _write_text(tables):
+    def write(file_ptr):
+        for i, table in enumerate(tables):
+            text = u"---- TABLE {0} ----\n{1}\n".format(i + 1,
+                                                       to_string(table))
+            if sys.version_info[0] < 3:
+                text = text.encode('utf-8')
+            file_ptr.write(text)
+    return write
+
+
+_WRITERS = {'json': _write_json, 'csv': _write_csv, 'text': _write_text}
+
+
+def _start_worker(warmup, options):
+    """ Pool initializer: make this worker's Extractor and warm it up """
+    extractor = Extractor()
+    _WORKER[:] = [extractor, options]
+    for file_location in warmup:
+        try:
+            extractor.get_tables(file_location, **options)
+        except Exception:
+            pass
+
+
+def _extract_file(job):
+    """
+    Extract one file in a worker and write its output. Returns (start,
+    seconds, pages, tables).
+    """
+    file_location, output, output_format = job
+    extractor, options = _WORKER
+    start = time.time()
+    tables = extractor.get_tables(file_location, **options)
+    write_atomically(output, _WRITERS[output_format](tables))
+    pages = tables[0].total_pages if tables else 0
+    return start, time.time() - start, pages, len(tables)
+
+
+class _Pending(object):
+    """ A file seen in the directory and not yet handed out """
+    def __init__(self, now, signature):
+        self.detected = now
+        self.signature = signature
+        self.since = now  # when the signature was last seen to change
+        self.closed = False
+
+
+class FolderWatcher(object):
+    """
+    Watch directory for new PDFs and extract their tables on a pool of
+    processes workers. Keyword options not listed here are passed on to
+    get_tables.
+
+    output_directory: where outputs go; the input's directory by default
+    done_directory, failed_directory: where inputs are moved to; done and
+        failed inside directory by default
+    output_format: 'json', 'csv' or 'text'
+    warmup: PDFs each worker extracts when it starts, to warm it up
+    max_tasks: files a worker does before it is replaced; None keeps
+        workers (and their caches) for as long as the watcher runs
+    metrics_file: a file to append each file's metrics to, as JSON lines
+    """
+    def __init__(self, directory, output_directory=None, done_directory=None,
+                 failed_directory=None, output_format='json', processes=None,
+                 warmup=(), max_tasks=None, poll=POLL_SECONDS,
+                 settle=SETTLE_SECONDS, use_inotify=True, metrics_file=None,
+                 **options):
+        if output_format not in FORMATS:
+            raise ValueError("output_format must be one of {0}".format(
+                ', '.join(sorted(FORMATS))))
+        self.directory = directory
+        self.output_directory = output_directory or directory
+        self.done_directory = done_directory or os.path.join(directory,
+                                                             'done')
+        self.failed_directory = failed_directory or os.path.join(directory,
+                                                                 'failed')
+        for path in (self.output_directory, self.done_directory,
+                     self.failed_directory):
+            if not os.path.isdir(path):
+                os.makedirs(path)
+        self.output_format = output_format
+        self.processes = processes or multiprocessing.cpu_count()
+        self.poll = poll
+        self.settle = settle
+        self.metrics_file = metrics_file
+        self.metrics = collections.deque(maxlen=METRICS_KEPT)
+        self.pending = {}
+        self.running = {}
+        self.closed = set()  # names inotify saw closed after writing
+        self.pool = multiprocessing.Pool(
+            self.processes, _start_worker, (list(warmup), options),
+            max_tasks)
+        self.inotify = None
+        if use_inotify and inotify_simple is not None:
+            flags = inotify_simple.flags
+            self.inotify = inotify_simple.INotify()
+            self.inotify.add_watch(directory, flags.CLOSE_WRITE |
+                                   flags.MOVED_TO)
+
+    def close(self):
+        """ Finish the files handed out and stop the workers """
+        while self.running:
+            self.collect(wait=True)
+        self.pool.close()
+        self.pool.join()
+        if self.inotify is not None:
+            self.inotify.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def output_path(self, path):
+        name = os.path.splitext(os.path.basename(path))[0]
+        return os.path.join(self.output_directory,
+                            name + FORMATS[self.output_format])
+
+    def _wait(self):
+        """ Sleep until the next look, noting files inotify saw closed """
+        if self.inotify is None:
+            time.sleep(self.poll)
+            return
+        for event in self.inotify.read(timeout=int(self.poll * 1000)):
+            self.closed.add(event.name)
+
+    def scan(self):
+        """ Return the files ready to be extracted, in order of arrival """
+        now = time.time()
+        names = set()
+        for name in os.listdir(self.directory):
+            if name.startswith('.') or not name.lower().endswith('.pdf'):
+                continue
+            path = os.path.join(self.directory, name)
+            if path in self.running:
+                continue
+            try:
+                status = os.stat(path)
+            except OSError:  # moved away meanwhile
+                continue
+            names.add(path)
+            signature = (status.st_size, status.st_mtime)
+            pending = self.pending.get(path)
+            if pending is None:
+                pending = self.pending[path] = _Pending(now, signature)
+            elif pending.signature != signature:
+                pending.signature = signature
+                pending.since = now
+                pending.closed = False
+            if name in self.closed:
+                self.closed.discard(name)
+                pending.closed = True
+        for path in set(self.pending) - names:
+            del self.pending[path]
+        ready = [(pending.detected, path)
+                 for path, pending in self.pending.items()
+                 if pending.closed or now - pending.since >= self.settle]
+        return [path for _, path in sorted(ready)]
+
+    def submit(self):
+        """ Hand ready files to the pool, keeping every worker fed """
+        for path in self.scan():
+            if len(self.running) >= 2 * self.processes:
+                break
+            pending = self.pending.pop(path)
+            result = self.pool.apply_async(
+                _extract_file,
+                ((path, self.output_path(path), self.output_format),))
+            self.running[path] = (pending.detected, time.time(), result)
+
+    def collect(self, wait=False):
+        """ Move aside the inputs of finished files, recording metrics """
+        finished = 0
+        for path, (detected, submitted, result) in list(self.running.items()):
+            if not wait and not result.ready():
+                continue
+            record = dict(file=os.path.basename(path), detected=detected,
+                          pages=0, tables=0)
+            try:
+                start, seconds, record['pages'], record['tables'] = \
+                    result.get()
+                record.update(status='done', wait=start - submitted,
+                              extract=seconds)
+                destination = self.done_directory
+            except Exception as error:
+                record.update(status='failed', error=repr(error))
+                destination = self.failed_directory
+                self._write_error(path, error)
+            del self.running[path]
+            self._move(path, destination)
+            record['latency'] = time.time() - detected
+            self._record(record)
+            finished += 1
+            if wait:
+                break
+        return finished
+
+    def _write_error(self, path, error):
+        error_path = os.path.join(self.failed_directory,
+                                  os.path.basename(path) + '.error')
+        write_atomically(error_path,
+                         lambda file_ptr: file_ptr.write(repr(error)))
+
+    @staticmethod
+    def _move(path, directory):
+        """ Move path into directory, not replacing a file of that name """
+        destination = os.path.join(directory, os.path.basename(path))
+        if os.path.exists(destination):
+            root, extension = os.path.splitext(destination)
+            destination = '{0}-{1}{2}'.format(root, int(time.time() * 1000),
+                                              extension)
+        os.rename(path, destination)
+
+    def _record(self, record):
+        self.metrics.append(record)
+        if self.metrics_file is not None:
+            with open(self.metrics_file, 'a') as file_ptr:
+                file_ptr.write(json.dumps(record, sort_keys=True) + '\n')
+
+    def latency_summary(self):
+        """ Count, mean, median, 95th percentile and max latency, seconds """
+        latencies = sorted(record['latency'] for record in self.metrics)
+        if not latencies:
+            return dict(count=0)
+        count = len(latencies)
+        return dict(count=count, mean=sum(latencies) / count,
+                    p50=latencies[(count - 1) // 2],
+                    p95=latencies[int(round(0.95 * (count - 1)))],
+                    max=latencies[-1])
+
+    def step(self):
+        """ One look at the directory; returns the number of files finished """
+        self.submit()
+        return self.collect()
+
+    def run(self, files=None, stop=None):
+        """
+        Watch until stop (a threading.Event) is set or, if files is given,
+        until that many files are finished
+        """
+        finished = 0
+        while not (stop is not None and stop.is_set()):
+            finished += self.step()
+            if files is not None and finished >= files:
+                return finished
+            self._wait()
+        return finished
+
+
+def main():
+    args = argparse.ArgumentParser(
+        description="Extract tables from PDFs dropped in a directory")
+    args.add_argument('directory', help='directory to watch')
+    args.add_argument('-o', '--output', dest='output_directory',
+                      help='directory for the outputs (default: beside '
+                           'the inputs)')
+    args.add_argument('--done', dest='done_directory',
+                      help='directory finished inputs are moved to')
+    args.add_argument('--failed', dest='failed_directory',
+                      help='directory failed inputs are moved to')
+    args.add_argument('-f', '--format', dest='output_format', default='json',
+                      choices=sorted(FORMATS))
+    args.add_argument('-j', '--processes', type=int, default=None)
+    args.add_argument('--warmup', action='append', default=[],
+                      help='PDF each worker extracts when it starts')
+    args.add_argument('--max-tasks', type=int, default=None,
+                      help='files a worker does before it is replaced')
+    args.add_argument('--poll', type=float, default=POLL_SECONDS)
+    args.add_argument('--settle', type=float, default=SETTLE_SECONDS)
+    args.add_argument('--metrics', dest='metrics_file',
+                      help='file to append per-file metrics to')
+    options = vars(args.parse_args())
+    directory = options.pop('directory')
+    with FolderWatcher(directory, **options) as watcher:
+        try:
+            watcher.run()
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Layout backend tests
+"""
+
+import sys
+sys.path.append('code')
+
+import io
+import json
+
+from pdftables import get_tables, page_to_tables
+from pdftables.backends import (JSONLayoutBackend, PdfToHtmlBackend,
+                                PDFMinerBackend, char_leaves)
+
+from nose.tools import assert_equals
+
+SAMPLE = 'fixtures/sample_data/AnimalExampleTables.pdf'
+
+ROWS = [['Name', 'Qty', 'Price', 'Total']] + [
+    ['Item{0}'.format(i), str(3 * i + 1), '{0}.0{1}'.format(i + 2, i),
+     str((3 * i + 1) * (i + 2))] for i in range(8)]
+
+
+def json_layout():
+    boxes = []
+    for r, row in enumerate(ROWS):
+        for c, cell in enumerate(row):
+            left, bottom = 76 + 110 * c, 697 - 16 * r
+            boxes.append({"bbox": [left, bottom, left + 6 * len(cell),
+                                   bottom + 10], "text": cell})
+    return {"pages": [{"bbox": [0, 0, 612, 792], "boxes": boxes}]}
+
+
+def xml_layout(zoom=1.5):
+    texts = []
+    for page in json_layout()["pages"]:
+        for box in page["boxes"]:
+            left, bottom, right, top = [v * zoom for v in box["bbox"]]
+            texts.append('<text top="{0}" left="{1}" width="{2}" '
+                         'height="{3}" font="0">{4}</text>'.format(
+                             792 * zoom - top, left, right - left,
+                             top - bottom, box["text"]))
+    return ('<?xml version="1.0" encoding="UTF-8"?><pdf2xml>'
+            '<page number="1" top="0" left="0" height="{0}" width="{1}">'
+            '{2}</page></pdf2xml>'.format(792 * zoom, 612 * zoom,
+                                          ''.join(texts)))
+
+
+def test_char_leaves_keep_spaces_with_the_character_before():
+    leaves = char_leaves((0, 0, 40, 10), 'ab c')
+    assert_equals(['a', 'b ', 'c'], [leaf.text for leaf in leaves])
+    assert_equals((30.0, 0, 40.0, 10), leaves[2].bbox)
+
+
+def test_a_json_layout_gives_its_table():
+    stream = io.BytesIO(json.dumps(json_layout()).encode('utf-8'))
+    [table] = get_tables(stream, backend=JSONLayoutBackend())
+    assert_equals(ROWS, table)
+
+
+def test_pdftohtml_xml_gives_the_same_table_as_json():
+    stream = io.BytesIO(xml_layout().encode('utf-8'))
+    [table] = get_tables(stream, backend=PdfToHtmlBackend())
+    assert_equals(ROWS, table)
+
+
+def test_page_to_tables_takes_a_layout_page():
+    [page] = JSONLayoutBackend().pages(
+        io.BytesIO(json.dumps(json_layout()).encode('utf-8')))
+    assert_equals(ROWS, page_to_tables(page, atomise=True))
+
+
+def test_the_pdfminer_backend_gives_the_default_tables():
+    assert_equals(get_tables(SAMPLE),
+                  get_tables(SAMPLE, backend=PDFMinerBackend()))
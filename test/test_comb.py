@@ -12,7 +12,8 @@ sys.path.append('code')
 
 from pdftables import (comb, comb_extend, 
                        comb_from_uppers_and_lowers,
-                       find_minima)
+                       find_minima, comb_from_projection, dense_projection)
+from pdftables.counter import Counter
 
 from nose.tools import assert_equals, raises
 
@@ -70,3 +71,19 @@ def test_comb_correctly_created_from_uppers_and_lowers():
 def test_raises_an_exception_for_an_unsorted_combarray():
     combarray = [5, 3, 4, 2, 1, 0]
     comb(combarray, 0.5)
+
+
+def test_dense_projection_fills_missing_coordinates_with_zero():
+    origin, counts = dense_projection(Counter({3: 2, 5: 1}))
+    assert_equals(3, origin)
+    assert_equals([2, 0, 1], list(counts))
+
+
+def test_comb_from_projection_puts_teeth_at_the_first_minimum_of_each_gap():
+    # runs above 1 at 10-12 and 20-21, a gap too narrow at 23, run 25-26
+    projection = Counter(dict(enumerate([0] * 30)))
+    for coord in (10, 11, 12, 20, 21, 22, 25, 26):
+        projection[coord] = 5
+    projection.update({13: 1, 14: 1, 15: 0, 16: 0, 17: 1, 24: 1})
+    assert_equals([10, 15, 26], comb_from_projection(projection, 1, "column"))
+    assert_equals([10, 15, 23, 26], comb_from_projection(projection, 1, "row"))
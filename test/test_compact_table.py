@@ -0,0 +1,65 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+CompactTable tests
+"""
+
+import sys
+sys.path.append('code')
+
+from pdftables import crop_table, Table
+from pdftables.compact import CompactTable
+
+from nose.tools import assert_equals, assert_true
+
+PAGE = {"page": 1, "page_total": 1}
+TABLE = {"table_index": 1, "table_index_total": 1}
+ROWS = [['', '', ''],
+        ['', 'a', 'b'],
+        ['', 'c', ''],
+        [' ', '', '']]
+
+
+def test_it_iterates_like_a_table():
+    compact = CompactTable(ROWS, PAGE, TABLE)
+    assert_equals(list(Table(ROWS, PAGE, TABLE)), list(compact))
+    assert_equals(['', 'a', 'b'], compact[1])
+    assert_equals(4, len(compact))
+    assert_equals(ROWS, compact)
+
+
+def test_crop_table_gives_the_same_rows_for_both_storages():
+    table = Table(ROWS, PAGE, TABLE)
+    compact = CompactTable(ROWS, PAGE, TABLE)
+    crop_table(table)
+    crop_table(compact)
+    assert_equals([['', 'a', 'b'], ['', 'c', '']], table)
+    assert_equals(table, compact)
+
+
+def test_it_crops_columns():
+    compact = CompactTable(ROWS, PAGE, TABLE).crop(columns=True)
+    assert_equals([['a', 'b'], ['c', '']], list(compact))
+
+
+def test_crop_of_an_empty_table_is_empty():
+    compact = CompactTable([['', ' ']], PAGE, TABLE).crop(columns=True)
+    assert_equals([], list(compact))
+
+
+def test_exports_share_the_cell_array():
+    compact = CompactTable(ROWS, PAGE, TABLE).crop()
+    assert_true(compact.to_numpy().base is not None)
+    records = compact.to_records(names=['x', 'y', 'z'])
+    assert_equals(['a', 'c'], list(records.y))
+
+
+def test_crop_removes_the_first_empty_row_equal_to_a_trailing_one():
+    rows = [['a', ''], ['', ''], ['b', ''], ['', '']]
+    table = Table(rows, PAGE, TABLE)
+    compact = CompactTable(rows, PAGE, TABLE)
+    crop_table(table)
+    crop_table(compact)
+    assert_equals([['a', ''], ['b', ''], ['', '']], table)
+    assert_equals(table, compact)
@@ -0,0 +1,53 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Region of interest tests
+"""
+
+import sys
+sys.path.append('code')
+
+from pdftables import get_tables
+from pdftables.device import crop_for_page
+from pdftables.engines import ReferenceEngine
+from pdftables.session import Extractor
+
+from nose.tools import assert_equals, assert_raises
+
+SAMPLE = 'fixtures/sample_data/AnimalExampleTables.pdf'
+
+
+def test_crop_for_page_accepts_a_rectangle_dict_or_function():
+    rect = (0, 0, 100, 100)
+    assert_equals(None, crop_for_page(None, 1))
+    assert_equals(rect, crop_for_page(list(rect), 1))
+    assert_equals(rect, crop_for_page({2: rect}, 2))
+    assert_equals(None, crop_for_page({2: rect}, 1))
+    assert_equals(rect, crop_for_page(lambda page_number: rect, 3))
+
+
+def test_a_crop_covering_the_page_changes_nothing():
+    whole_page = (-1000, -1000, 10000, 10000)
+    assert_equals(get_tables(SAMPLE), get_tables(SAMPLE, crop=whole_page))
+
+
+def test_a_crop_outside_the_page_finds_no_tables():
+    assert_equals([], get_tables(SAMPLE, crop=(-100, -100, -50, -50)))
+
+
+class FailingEngine(ReferenceEngine):
+    """ An engine which fails on every page """
+    name = 'failing'
+
+    @staticmethod
+    def project_boxes(box_list, orientation, erosion=0):
+        raise RuntimeError("broken engine")
+
+
+def test_the_crop_is_taken_off_a_session_device_after_a_failure():
+    extractor = Extractor()
+    assert_raises(RuntimeError, extractor.get_tables, SAMPLE,
+                  crop=(-1000, -1000, 10000, 10000), engine=FailingEngine())
+    assert_equals(None, extractor.device.crop)
+    assert_equals(get_tables(SAMPLE), extractor.get_tables(SAMPLE))
@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Table diagnostics tests
+"""
+
+import sys
+sys.path.append('code')
+
+import json
+import os
+import shutil
+import tempfile
+
+from pdftables import (get_pdf_page, get_tables, page_to_tables,
+                       TableDiagnosticData)
+from pdftables.backends import JSONLayoutBackend
+from pdftables.diagnostics import (Figure, render, diagnose_batch,
+                                   projection_pairs)
+
+from nose.plugins.skip import SkipTest
+from nose.tools import assert_equals, assert_true, with_setup
+
+SAMPLE = 'fixtures/sample_data/AnimalExampleTables.pdf'
+ROOT = []
+
+
+def make_root():
+    ROOT[:] = [tempfile.mkdtemp()]
+
+
+def remove_root():
+    shutil.rmtree(ROOT.pop())
+
+
+def test_diagnostics_are_only_returned_when_asked_for():
+    page = get_pdf_page(SAMPLE, 1)
+    table, data = page_to_tables(page, diagnostics=True)
+    assert_equals(page_to_tables(page), table)
+    assert_true(isinstance(data, TableDiagnosticData))
+    assert_equals('projection', data.source)
+    assert_equals(len(table[0]) + 1, len(data.x_comb))
+    assert_equals(len(table) + 1, len(data.y_comb))
+    assert_true(data.top_plot and data.left_plot and data.box_list)
+    assert_equals((5, 3), (data.column_threshold, data.row_threshold))
+
+
+def test_a_page_without_tables_has_its_boxes():
+    page = JSONLayoutBackend.layout({"bbox": [0, 0, 600, 800], "boxes": [
+        {"bbox": [72, 700, 300, 710], "text": "Just a heading"}]})
+    table, data = page_to_tables(page, diagnostics=True)
+    assert_equals([], table)
+    assert_equals(([], []), (data.x_comb, data.y_comb))
+    assert_true(data.box_list)
+
+
+def test_diagnostics_round_trip_through_json():
+    _, data = page_to_tables(get_pdf_page(SAMPLE, 1), diagnostics=True)
+    again = TableDiagnosticData.from_json(data.to_json())
+    assert_equals(data.to_dict(), again.to_dict())
+
+
+def test_projections_are_the_same_from_every_engine():
+    page = get_pdf_page(SAMPLE, 1)
+    _, reference = page_to_tables(page, diagnostics=True)
+    _, fast = page_to_tables(page, diagnostics=True, engine='fast')
+    assert_equals(projection_pairs(reference.left_plot),
+                  projection_pairs(fast.left_plot))
+
+
+@with_setup(make_root, remove_root)
+def test_batch_writes_json_for_every_page():
+    written = diagnose_batch([SAMPLE], ROOT[0], processes=2, png=False)
+    names = sorted(os.listdir(ROOT[0]))
+    assert_equals(written, len(names))
+    assert_true(names[0].endswith('-p0001-t1.json'))
+
+
+@with_setup(make_root, remove_root)
+def test_batch_diagnostics_use_the_options_of_get_tables():
+    for atomise, classname in [(True, 'LTChar'), ('words', 'LTWord'),
+                               (False, 'LTTextLineHorizontal')]:
+        for name in os.listdir(ROOT[0]):
+            os.remove(os.path.join(ROOT[0], name))
+        diagnose_batch([SAMPLE], ROOT[0], processes=1, png=False,
+                       atomise=atomise, engine='fast')
+        name = sorted(os.listdir(ROOT[0]))[0]
+        with open(os.path.join(ROOT[0], name)) as file_ptr:
+            data = json.load(file_ptr)
+        assert_true(classname in set(box[1] for box in data['boxes']))
+        table = get_tables(SAMPLE, atomise=atomise)[0]
+        assert_equals(len(table[0]) + 1, len(data['x_comb']))
+
+
+@with_setup(make_root, remove_root)
+def test_render_writes_a_png():
+    if Figure is None:
+        raise SkipTest("matplotlib is not installed")
+    _, data = page_to_tables(get_pdf_page(SAMPLE, 1), diagnostics=True)
+    path = os.path.join(ROOT[0], 'page.png')
+    render(data, path)
+    with open(path, 'rb') as file_ptr:
+        assert_equals(b'\x89PNG', file_ptr.read(4))
@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Duplicate page detection tests
+"""
+
+import sys
+sys.path.append('code')
+
+from pdfminer.psparser import LIT
+from pdfminer.pdftypes import PDFObjRef, PDFStream
+
+from pdftables import get_tables
+from pdftables.pagescan import content_fingerprint
+from pdftables.stats import ExtractionStats
+
+from nose.tools import assert_equals, assert_true
+
+
+def test_a_repeated_document_is_served_from_the_page_cache():
+    stats = ExtractionStats()
+    page_cache = {}
+    with open('fixtures/sample_data/AnimalExampleTables.pdf', 'rb') as fh:
+        first = get_tables(fh, '', page_cache=page_cache, stats=stats)
+    assert_equals(0, stats.counts['duplicate_pages'])
+    with open('fixtures/sample_data/AnimalExampleTables.pdf', 'rb') as fh:
+        second = get_tables(fh, '', page_cache=page_cache, stats=stats)
+    assert_equals(first, second)
+    assert_equals(4, stats.counts['duplicate_pages'])
+    assert_equals(8, stats.counts['pages'])
+
+
+def form(content, resources=None):
+    attrs = {'Subtype': LIT('Form')}
+    if resources is not None:
+        attrs['Resources'] = resources
+    return PDFStream(attrs, content)
+
+
+class FormPage(object):
+    mediabox = cropbox = [0, 0, 612, 792]
+    rotate = 0
+
+    def __init__(self, form_content):
+        if not isinstance(form_content, PDFStream):
+            form_content = form(form_content)
+        self.contents = [PDFStream({}, b'/Fm0 Do')]
+        self.resources = {'XObject': {'Fm0': form_content}}
+
+
+def test_the_content_of_forms_is_part_of_the_fingerprint():
+    assert_equals(content_fingerprint(FormPage(b'(a) Tj')),
+                  content_fingerprint(FormPage(b'(a) Tj')))
+    assert_true(content_fingerprint(FormPage(b'(a) Tj')) !=
+                content_fingerprint(FormPage(b'(b) Tj')))
+    nested = [form(b'/Fm1 Do', {'XObject': {'Fm1': form(text)}})
+              for text in (b'(a) Tj', b'(b) Tj')]
+    assert_true(content_fingerprint(FormPage(nested[0])) !=
+                content_fingerprint(FormPage(nested[1])))
+
+
+class FontPage(FormPage):
+    def __init__(self, to_unicode):
+        self.contents = [PDFStream({}, b'BT /F1 9 Tf (a) Tj ET')]
+        self.resources = {'Font': {'F1': {
+            'Subtype': LIT('Type1'), 'BaseFont': LIT('Sans'),
+            'ToUnicode': PDFStream({}, to_unicode)}}}
+
+
+def test_the_text_maps_of_fonts_are_part_of_the_fingerprint():
+    cmap = b'1 beginbfchar <61> <%s> endbfchar'
+    assert_true(content_fingerprint(FontPage(cmap % b'0041')) !=
+                content_fingerprint(FontPage(cmap % b'0042')))
+
+
+class FontDocument(object):
+    """ A document holding one font, counting how often it is read """
+    def __init__(self, to_unicode):
+        self.reads = 0
+        self.font = {'Subtype': LIT('Type1'), 'BaseFont': LIT('Sans'),
+                     'ToUnicode': PDFStream({}, to_unicode)}
+
+    def getobj(self, objid):
+        self.reads += 1
+        return self.font
+
+
+def test_a_font_shared_by_pages_is_hashed_once():
+    doc = FontDocument(b'1 beginbfchar <61> <0041> endbfchar')
+    pages = [FontPage(b'') for _ in range(3)]
+    for page in pages:
+        page.resources['Font']['F1'] = PDFObjRef(doc, 7, 0)
+    font_digests = {}
+    fingerprints = [content_fingerprint(page, font_digests)
+                    for page in pages]
+    assert_equals(1, doc.reads)
+    assert_equals([7], list(font_digests))
+    assert_equals([content_fingerprint(pages[0])] * 3, fingerprints)
+
+
+def test_pages_are_only_duplicates_with_the_same_options():
+    sample = 'fixtures/sample_data/AnimalExampleTables.pdf'
+    stats = ExtractionStats()
+    page_cache = {}
+    get_tables(sample, page_cache=page_cache, stats=stats)
+    duplicates = stats.counts['duplicate_pages']
+    get_tables(sample, page_cache=page_cache, stats=stats, rulings=True)
+    get_tables(sample, page_cache=page_cache, stats=stats,
+               split_regions=True)
+    assert_equals(3 * duplicates, stats.counts['duplicate_pages'])
+
+
+def test_tables_from_the_page_cache_do_not_share_rows():
+    sample = 'fixtures/sample_data/AnimalExampleTables.pdf'
+    page_cache = {}
+    expected = get_tables(sample)
+    first = get_tables(sample, page_cache=page_cache)
+    first[0][0][0] = 'changed'
+    second = get_tables(sample, page_cache=page_cache)
+    second[0][1][0] = 'changed'
+    assert_equals(expected, get_tables(sample, page_cache=page_cache))
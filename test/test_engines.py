@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Engine tests: the fast engine against the reference, and verification
+"""
+
+import sys
+sys.path.append('code')
+
+from pdftables import get_tables, apply_combs
+from pdftables.engines import (FAST, REFERENCE, FastEngine, VerifyingEngine,
+                               EngineMismatch, comb_indices, get_engine)
+from pdftables.tree import Leaf, LeafList
+
+from nose.tools import assert_equals, assert_raises, assert_true
+
+SAMPLE = 'fixtures/sample_data/AnimalExampleTables.pdf'
+
+
+def test_fast_engine_finds_the_same_tables():
+    assert_equals(get_tables(SAMPLE), get_tables(SAMPLE, engine='fast'))
+
+
+def test_verifying_engine_times_both_engines():
+    engine = VerifyingEngine(on_diff='raise')
+    assert_equals(get_tables(SAMPLE), get_tables(SAMPLE, engine=engine))
+    report = engine.report()
+    assert_equals(0, report['mismatches'])
+    assert_equals(['project_boxes', 'comb_from_projection', 'apply_combs',
+                   'rounded_histogram'],
+                  [stage['stage'] for stage in report['stages']])
+    assert_true(all(stage['calls'] for stage in report['stages']))
+
+
+class SwappedCells(FastEngine):
+    """ A broken engine transposing the first two columns """
+    name = 'swapped'
+
+    @staticmethod
+    def apply_combs(box_list, x_comb, y_comb):
+        table = FastEngine.apply_combs(box_list, x_comb, y_comb)
+        return [row[1::-1] + row[2:] for row in table]
+
+
+def test_mismatches_raise_a_diff():
+    engine = VerifyingEngine(SwappedCells())
+    with assert_raises(EngineMismatch) as context:
+        get_tables(SAMPLE, engine=engine)
+    diff = context.exception.diff
+    assert_equals('apply_combs', diff['stage'])
+    assert_equals('swapped', diff['candidate_engine'])
+    assert_equals(diff['reference_shape'], diff['candidate_shape'])
+    assert_equals(set(['row', 'column', 'reference', 'candidate']),
+                  set(diff['cells'][0]))
+
+
+def test_mismatches_can_be_logged_with_the_reference_kept():
+    engine = VerifyingEngine(SwappedCells(), on_diff='log')
+    assert_equals(get_tables(SAMPLE), get_tables(SAMPLE, engine=engine))
+    assert_true(engine.diffs)
+
+
+def test_comb_indices_agree_with_comb():
+    ascending = [0, 10, 10, 20, 30]
+    values = [-1, 0, 5, 10, 25, 30, 31]
+    assert_equals([-1, 0, 0, 2, 3, 3, -1],
+                  comb_indices(ascending, values).tolist())
+    descending = ascending[::-1]
+    assert_equals([-1, 3, 3, 3, 0, 0, -1],
+                  comb_indices(descending, values).tolist())
+    assert_equals([-1, -1], comb_indices([5], [5, 6]).tolist())
+    assert_raises(Exception, comb_indices, [0, 20, 10], [5])
+
+
+def test_apply_combs_matches_the_reference():
+    boxes = LeafList(Leaf(((x, y, x + 4, y + 4), 'LTChar', char))
+                     for x, y, char in [(1, 21, 'a'), (11, 21, 'b'),
+                                        (1, 11, 'c'), (13, 1, 'd'),
+                                        (40, 40, 'e')])
+    x_comb, y_comb = [0, 10, 20], [30, 20, 10, 0]
+    assert_equals(apply_combs(boxes, x_comb, y_comb),
+                  FAST.apply_combs(boxes, x_comb, y_comb))
+
+
+def test_get_engine():
+    assert_true(get_engine('reference') is REFERENCE)
+    assert_true(isinstance(get_engine('verify'), VerifyingEngine))
+    assert_raises(ValueError, get_engine, 'quantum')
@@ -0,0 +1,32 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Tests for passing a path instead of a file handle
+"""
+
+import sys
+sys.path.append('code')
+
+from pdftables import get_tables, open_pdf
+
+from nose.tools import assert_equals
+
+SAMPLE = 'fixtures/sample_data/AnimalExampleTables.pdf'
+
+
+def test_a_path_gives_the_same_tables_as_a_file_handle():
+    with open(SAMPLE, 'rb') as fh:
+        from_handle = get_tables(fh)
+    assert_equals(from_handle, get_tables(SAMPLE))
+
+
+def test_open_pdf_maps_a_path_read_only():
+    with open_pdf(SAMPLE) as stream:
+        assert_equals(b'%PDF', stream.read(4))
+
+
+def test_open_pdf_passes_a_file_handle_through():
+    with open(SAMPLE, 'rb') as fh:
+        with open_pdf(fh) as stream:
+            assert_equals(fh, stream)
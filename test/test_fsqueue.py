@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Filesystem work queue tests
+"""
+
+import sys
+sys.path.append('code')
+
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+
+from pdftables import get_tables
+from pdftables.fsqueue import WorkQueue, extract_task
+
+from nose.tools import assert_equals, assert_false, assert_true, with_setup
+
+SAMPLE = 'fixtures/sample_data/AnimalExampleTables.pdf'
+ROOT = []
+
+
+def make_root():
+    ROOT[:] = [tempfile.mkdtemp()]
+
+
+def remove_root():
+    shutil.rmtree(ROOT.pop())
+
+
+def triple(task):
+    time.sleep(0.01)
+    return [task.start * 3, os.getpid()]
+
+
+def work(root):
+    WorkQueue(root).run(triple, poll=0.01)
+
+
+@with_setup(make_root, remove_root)
+def test_workers_in_several_processes_do_every_task_once():
+    queue = WorkQueue(ROOT[0])
+    for start in range(12):
+        queue.add('document.pdf', start, start + 1)
+    workers = [multiprocessing.Process(target=work, args=(ROOT[0],))
+               for _ in range(3)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    results = queue.results()
+    assert_equals(list(range(0, 36, 3)),
+                  sorted(result[0] for result in results.values()))
+    assert_true(queue.finished())
+    assert_equals([], os.listdir(os.path.join(ROOT[0], 'claims')))
+
+
+@with_setup(make_root, remove_root)
+def test_an_expired_claim_is_taken_over():
+    crashed = WorkQueue(ROOT[0], lease=5, node='crashed')
+    queue = WorkQueue(ROOT[0], lease=5, node='alive')
+    task_id = crashed.add('document.pdf')
+    lost = crashed.claim()
+    assert_equals(None, queue.claim())
+    past = time.time() - 10
+    os.utime(os.path.join(ROOT[0], 'claims', task_id + '.lease'),
+             (past, past))
+    task = queue.claim()
+    assert_equals(task_id, task.id)
+    assert_equals(False, crashed.renew(lost))
+    assert_equals(True, queue.renew(task))
+
+
+@with_setup(make_root, remove_root)
+def test_a_failed_task_is_recorded_and_not_retried():
+    queue = WorkQueue(ROOT[0])
+    queue.add('missing.pdf')
+    assert_equals(0, queue.run(poll=0.01))
+    assert_equals(1, len(queue.failures()))
+    assert_true(queue.finished())
+    assert_equals({}, queue.merge())
+
+
+@with_setup(make_root, remove_root)
+def test_merge_puts_page_ranges_back_together():
+    queue = WorkQueue(ROOT[0])
+    queue.add_document(SAMPLE, pages_per_task=1)
+    queue.run(poll=0.01)
+    assert_equals(get_tables(SAMPLE),
+                  queue.merge()[os.path.abspath(SAMPLE)])
+
+
+@with_setup(make_root, remove_root)
+def test_merge_leaves_out_documents_with_pages_still_to_do():
+    queue = WorkQueue(ROOT[0])
+    queue.add_document(SAMPLE, pages_per_task=1)
+    task = queue.claim()
+    queue.complete(task, extract_task(task))
+    assert_false(queue.finished())
+    assert_equals({}, queue.merge())
+
+
+@with_setup(make_root, remove_root)
+def test_merged_pages_are_numbered_from_their_shards():
+    queue = WorkQueue(ROOT[0])
+    queue.add_document(SAMPLE, pages_per_task=1)
+    queue.run(poll=0.01)
+    expected = get_tables(SAMPLE)
+    merged = queue.merge()[os.path.abspath(SAMPLE)]
+    assert_equals([(table.page_number, table.total_pages)
+                   for table in expected],
+                  [(table.page_number, table.total_pages)
+                   for table in merged])
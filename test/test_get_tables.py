@@ -17,7 +17,7 @@ from nose.tools import *
 def test_it_exits_gracefully_when_no_tables_found():
     fh = open('fixtures/sample_data/13_06_12_10_36_58_boletim_ingles_junho_2013.pdf', 'rb')
     pdf_page = get_pdf_page(fh, 5)
-    table, table_diagnostic_data = page_to_tables(pdf_page)
+    table, table_diagnostic_data = page_to_tables(pdf_page, diagnostics=True)
     
     assert_equals([],table)
     assert(isinstance(table_diagnostic_data, TableDiagnosticData))
@@ -25,13 +25,13 @@ def test_it_exits_gracefully_when_no_tables_found():
 def test_it_copes_with_CONAB_p8():
     fh = open('fixtures/sample_data/13_06_12_10_36_58_boletim_ingles_junho_2013.pdf', 'rb')
     pdf_page = get_pdf_page(fh, 8)
-    table, _ = page_to_tables(pdf_page, atomise=True)
+    table = page_to_tables(pdf_page, atomise=True)
     
     
 def test_it_can_use_hints_AlmondBoard_p1():
     fh = open('fixtures/sample_data/2012.01.PosRpt.pdf', 'rb')
     pdf_page = get_pdf_page(fh, 1)
-    table, _ = page_to_tables(pdf_page, hints=[u"% Change", u"Uncommited"])
+    table = page_to_tables(pdf_page, hints=[u"% Change", u"Uncommited"])
     assert_equals(
     [[u'', u'Million Lbs.', u'Kernel Wt.', u'Kernel Wt.', u'% Change'], 
      [u'1.  Carryin August 1, 2011', u'254.0', u'253,959,411', u'321,255,129', u'-20.95%'], 
@@ -54,7 +54,7 @@ def test_it_can_use_hints_AlmondBoard_p1():
 def test_it_can_use_one_hint_argentina_by_size():
     fh = open('fixtures/sample_data/argentina_diputados_voting_record.pdf', 'rb')
     pdf_page = get_pdf_page(fh, 1)
-    table1, _ = page_to_tables(pdf_page, hints=['Apellido',''])
+    table1 = page_to_tables(pdf_page, hints=['Apellido',''])
     #table1,_ = getTable(fh, 2)
     assert_equals(32, len(table1))
     assert_equals(4, len(table1[0]))
@@ -62,7 +62,7 @@ def test_it_can_use_one_hint_argentina_by_size():
 def test_it_returns_the_AlmondBoard_p2_table_by_size():
     fh = open('fixtures/sample_data/2012.01.PosRpt.pdf', 'rb')
     pdf_page = get_pdf_page(fh, 2)
-    table1, _ = page_to_tables(pdf_page)
+    table1 = page_to_tables(pdf_page)
     #table1, _ = getTable(fh, 2)
     assert_equals(78, len(table1))
     assert_equals(10, len(table1[0]))
@@ -70,7 +70,7 @@ def test_it_returns_the_AlmondBoard_p2_table_by_size():
 def test_the_atomise_option_works_on_coceral_p1_by_size():
     fh = open('fixtures/sample_data/1359397366Final_Coceral grain estimate_2012_December.pdf', 'rb')
     pdf_page = get_pdf_page(fh, 1)
-    table, _ = page_to_tables(pdf_page, atomise=True)
+    table = page_to_tables(pdf_page, atomise=True)
     #table1, _ = getTable(fh, 2)
     assert_equals(43, len(table))
     assert_equals(31, len(table[0]))
@@ -78,14 +78,14 @@ def test_the_atomise_option_works_on_coceral_p1_by_size():
 def test_it_does_not_crash_on_m30_p5():
     fh = open('fixtures/sample_data/m30-JDent36s15-20.pdf', 'rb')
     pdf_page = get_pdf_page(fh, 5)
-    table, _ = page_to_tables(pdf_page)
+    table = page_to_tables(pdf_page)
     """Put this in for more aggressive test"""
     #assert_equals([u'5\n', u'0.75\n', u'0.84\n', u'0.92\n', u'0.94\n', u'evaluation of a novel liquid whitening gel containing 18%\n'],
     #              table[4])
 def test_it_returns_the_AlmondBoard_p4_table():
     fh = open('fixtures/sample_data/2012.01.PosRpt.pdf', 'rb')
     pdf_page = get_pdf_page(fh, 4)
-    table, _ = page_to_tables(pdf_page, extend_y=False)
+    table = page_to_tables(pdf_page, extend_y=False)
     assert_equals(
     [[u'Variety Name', u'Total Receipts', u'Total Receipts', u'Total Inedibles', u'Receipts', u'% Rejects'], 
      [u'Aldrich', u'48,455,454', u'49,181,261', u'405,555', u'2.53%', u'0.82%'], 
@@ -0,0 +1,52 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+HintMatcher tests
+"""
+
+import sys
+sys.path.append('code')
+
+from pdftables import find_table_bounding_box
+from pdftables.hints import HintMatcher, first_matches
+from pdftables.tree import Leaf, LeafList
+
+from nose.tools import assert_equals
+
+BOXES = LeafList([
+    Leaf(((0, 0, 600, 800), 'LTPage', '')),
+    Leaf(((100, 700, 200, 710), 'LTTextLineHorizontal', 'Price % Change\n')),
+    Leaf(((100, 600, 200, 610), 'LTTextLineHorizontal', 'Total 15.67%\n')),
+    Leaf(((100, 500, 200, 510), 'LTTextLineHorizontal', '% Change again\n')),
+])
+
+
+def test_it_finds_overlapping_patterns():
+    matcher = HintMatcher(['she', 'he', 'hers', 'his'])
+    assert_equals([(1, 'she'), (2, 'he'), (2, 'hers')],
+                  matcher.search('ushers'))
+
+
+def test_it_finds_every_occurrence():
+    matcher = HintMatcher(['aa', 'a', ''])
+    assert_equals([(0, 'a'), (0, 'aa'), (1, 'a'), (1, 'aa'), (2, 'a')],
+                  matcher.search('aaa'))
+
+
+def test_scan_gives_the_box_of_each_match():
+    matcher = HintMatcher(['% Change', '15.67%', 'missing'])
+    matches = matcher.scan(BOXES)
+    assert_equals([('% Change', 700), ('15.67%', 600), ('% Change', 500)],
+                  [(match.pattern, match.box.bottom) for match in matches])
+    first = first_matches(matches)
+    assert_equals(6, first['% Change'].start)
+    assert_equals(710, first['% Change'].box.top)
+
+
+def test_the_bounding_box_uses_the_first_match_of_each_hint():
+    hints = ['% Change', '15.67%']
+    shared = HintMatcher(hints + ['another report'])
+    bbox = find_table_bounding_box(BOXES, hints=hints, matcher=shared)
+    assert_equals((0, 600, 600, 710), bbox)
+    assert_equals(bbox, find_table_bounding_box(BOXES, hints=hints))
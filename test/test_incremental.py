@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Incremental re-extraction tests
+"""
+
+import sys
+sys.path.append('code')
+
+import json
+import os
+import shutil
+import tempfile
+
+from pdftables import get_tables, open_pdf, initialize_pdf_miner
+from pdftables.incremental import RevisionStore, document_identity
+from pdftables.stats import ExtractionStats
+
+from nose.tools import assert_equals, assert_true, with_setup
+
+SAMPLE = 'fixtures/sample_data/AnimalExampleTables.pdf'
+ROOT = []
+
+
+def make_root():
+    ROOT[:] = [tempfile.mkdtemp()]
+
+
+def remove_root():
+    shutil.rmtree(ROOT.pop())
+
+
+def test_document_identity_comes_from_the_trailer():
+    with open_pdf(SAMPLE) as stream:
+        doc, _, _ = initialize_pdf_miner(stream)
+        assert_true(document_identity(doc))
+
+
+@with_setup(make_root, remove_root)
+def test_second_run_reuses_every_page():
+    store = RevisionStore(ROOT[0])
+    first = get_tables(SAMPLE, revisions=store)
+    stats = ExtractionStats()
+    second = get_tables(SAMPLE, revisions=store, stats=stats)
+    assert_equals(first, second)
+    assert_equals(stats.counts["reused_pages"], stats.counts["pages"])
+
+
+@with_setup(make_root, remove_root)
+def test_only_pages_not_stored_are_extracted():
+    store = RevisionStore(ROOT[0])
+    expected = get_tables(SAMPLE)
+    get_tables(SAMPLE, revisions=store)
+    [name] = os.listdir(ROOT[0])
+    path = os.path.join(ROOT[0], name)
+    with open(path) as file_ptr:
+        record = json.load(file_ptr)
+    # as if one page had been changed by an update
+    del record["pages"][sorted(record["pages"])[0]]
+    with open(path, 'w') as file_ptr:
+        json.dump(record, file_ptr)
+
+    stats = ExtractionStats()
+    assert_equals(expected, get_tables(SAMPLE, revisions=store, stats=stats))
+    assert_equals(stats.counts["reused_pages"], stats.counts["pages"] - 1)
+
+
+@with_setup(make_root, remove_root)
+def test_pages_are_stored_per_options():
+    store = RevisionStore(ROOT[0])
+    get_tables(SAMPLE, revisions=store)
+    stats = ExtractionStats()
+    get_tables(SAMPLE, revisions=store, stats=stats, rulings=True)
+    assert_equals(stats.counts["reused_pages"], 0)
+    get_tables(SAMPLE, revisions=store, stats=stats, engine='fast')
+    assert_equals(stats.counts["reused_pages"], 0)
+    get_tables(SAMPLE, revisions=store, stats=stats, engine='fast')
+    assert_true(stats.counts["reused_pages"] > 0)
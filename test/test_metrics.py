@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Metrics registry and exporter tests
+"""
+
+import sys
+sys.path.append('code')
+
+import os
+import shutil
+import socket
+import tempfile
+
+try:
+    from urllib.request import urlopen
+except ImportError:
+    from urllib2 import urlopen
+
+from pdftables import get_tables
+from pdftables.metrics import MetricsRegistry, TextfileExporter, serve
+from pdftables.session import Extractor
+from pdftables.stats import ExtractionStats
+
+from nose.tools import assert_equals, assert_in, assert_raises, with_setup
+
+SAMPLE = 'fixtures/sample_data/AnimalExampleTables.pdf'
+ROOT = []
+
+
+def make_root():
+    ROOT[:] = [tempfile.mkdtemp()]
+
+
+def remove_root():
+    shutil.rmtree(ROOT.pop())
+
+
+def samples(registry):
+    """ The samples of registry's text by name and labels """
+    values = {}
+    for line in registry.render().splitlines():
+        if not line.startswith('#'):
+            name, value = line.rsplit(' ', 1)
+            values[name] = float(value)
+    return values
+
+
+def test_counts_match_the_extraction_stats():
+    registry = MetricsRegistry()
+    stats = ExtractionStats()
+    get_tables(SAMPLE, metrics=registry, stats=stats)
+    values = samples(registry)
+    for name in ['documents', 'pages', 'tables']:
+        assert_equals(stats.counts[name],
+                      values['pdftables_{0}_total'.format(name)])
+    assert_equals(stats.counts['pages'],
+                  values['pdftables_page_seconds_count'])
+    assert_equals(values['pdftables_page_seconds_count'],
+                  values['pdftables_page_seconds_bucket{le="+Inf"}'])
+    assert_in('pdftables_stage_seconds_count{stage="inference"}', values)
+    assert_in('pdftables_resident_memory_bytes', values)
+
+
+def test_failures_are_counted_as_errors_and_timeouts():
+    registry = MetricsRegistry()
+    assert_raises(IOError, get_tables, 'no-such-file.pdf', metrics=registry)
+    registry.record_error(socket.timeout())
+    values = samples(registry)
+    assert_equals(2, values['pdftables_errors_total'])
+    assert_equals(1, values['pdftables_timeouts_total'])
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = MetricsRegistry(buckets=[0.1, 1])
+    for seconds in [0.05, 0.1, 0.5, 2]:
+        registry.observe('stage_seconds', seconds, stage='layout')
+    values = samples(registry)
+    assert_equals([2, 3, 4], [
+        values['pdftables_stage_seconds_bucket{stage="layout",le="%s"}' % le]
+        for le in ['0.1', '1.0', '+Inf']])
+    assert_equals(2.65, round(
+        values['pdftables_stage_seconds_sum{stage="layout"}'], 6))
+
+
+def test_extractor_reports_its_font_cache():
+    registry = MetricsRegistry()
+    extractor = Extractor()
+    extractor.get_tables(SAMPLE, metrics=registry)
+    assert_equals(len(extractor.font_cache),
+                  samples(registry)['pdftables_cache_entries{cache="fonts"}'])
+
+
+def test_metrics_are_served_over_http():
+    registry = MetricsRegistry()
+    registry.incr('documents')
+    server = serve(registry, port=0)
+    try:
+        body = urlopen('http://127.0.0.1:{0}/metrics'.format(
+            server.server_address[1])).read().decode('utf-8')
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert_in('pdftables_documents_total 1\n', body)
+
+
+@with_setup(make_root, remove_root)
+def test_textfile_is_written_when_stopped():
+    registry = MetricsRegistry()
+    path = os.path.join(ROOT[0], 'pdftables.prom')
+    with TextfileExporter(registry, path, interval=60):
+        registry.incr('pages', 3)
+    with open(path) as file_ptr:
+        assert_in('pdftables_pages_total 3\n', file_ptr.read())
+    assert_equals(['pdftables.prom'], os.listdir(ROOT[0]))
@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Pipeline tests
+"""
+
+import sys
+sys.path.append('code')
+
+from pdftables import get_tables
+from pdftables.metrics import MetricsRegistry
+from pdftables.pipeline import Pipeline, STAGES
+
+from nose.tools import assert_equals, assert_raises, assert_true, raises
+
+SAMPLE = 'fixtures/sample_data/AnimalExampleTables.pdf'
+
+
+def test_the_pipeline_gives_the_same_tables_in_order():
+    expected = get_tables(SAMPLE)
+    written = []
+    pipeline = Pipeline(interpret=2, inference=2, queue_size=1)
+    tables = pipeline.get_tables(SAMPLE, output=written.append)
+    assert_equals(expected, tables)
+    assert_equals(tables, written)
+    assert_equals([table.page_number for table in expected],
+                  [table.page_number for table in tables])
+
+
+def test_the_pipeline_takes_the_same_options():
+    for options in [dict(atomise='words'), dict(atomise=False),
+                    dict(engine='fast', split_regions=True)]:
+        assert_equals(get_tables(SAMPLE, **options),
+                      Pipeline(inference=2).get_tables(SAMPLE, **options))
+
+
+def test_options_which_need_pages_in_order_are_refused():
+    pipeline = Pipeline()
+    assert_raises(ValueError, pipeline.get_tables, SAMPLE, carry_comb=True)
+    assert_raises(ValueError, pipeline.get_tables, SAMPLE, threads=2)
+    assert_raises(TypeError, pipeline.get_tables, SAMPLE, colour=True)
+    assert_true(pipeline.get_tables(SAMPLE, carry_comb=False, threads=1))
+
+
+def test_the_pipeline_counts_pages_in_metrics():
+    registry = MetricsRegistry()
+    tables = Pipeline(layout=2).get_tables(SAMPLE, metrics=registry)
+    assert_equals(len(tables), registry.counters['tables'])
+    assert_equals(tables[0].total_pages, registry.counters['pages'])
+
+
+def test_every_stage_is_reported():
+    pipeline = Pipeline(layout=2)
+    pipeline.get_tables(SAMPLE)
+    report = pipeline.report()
+    assert_equals(STAGES, [stage['stage'] for stage in report])
+    assert_equals(2, report[1]['workers'])
+    for stage in report:
+        assert_true(0 <= stage['utilisation'] <= 1)
+        assert_true(stage['items'] > 0)
+
+
+@raises(ZeroDivisionError)
+def test_an_error_in_a_stage_is_raised():
+    def fail(table):
+        1 / 0
+    Pipeline().get_tables(SAMPLE, output=fail)
@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Content stream pre-scan tests
+"""
+
+import sys
+sys.path.append('code')
+
+from pdfminer.psparser import LIT
+from pdfminer.pdftypes import PDFStream
+
+from pdftables.pagescan import text_free_reason
+
+from nose.tools import assert_equals
+
+
+class FakePage(object):
+    def __init__(self, content, xobjects=None):
+        self.contents = [PDFStream({}, content)]
+        self.resources = {'XObject': xobjects or {}}
+
+
+def image():
+    return PDFStream({'Subtype': LIT('Image')}, b'\xff\xd8')
+
+
+def form(content):
+    return PDFStream({'Subtype': LIT('Form')}, content)
+
+
+def test_a_page_showing_text_is_kept():
+    page = FakePage(b'BT /F1 12 Tf 72 720 Td (Total)Tj ET')
+    assert_equals(None, text_free_reason(page))
+    assert_equals(None, text_free_reason(FakePage(b'[(a) -250 (b)]TJ')))
+
+
+def test_text_operators_can_be_followed_by_any_delimiter():
+    for content in [b'BT (x)Tj/F2 9 Tf ET', b'BT (x)Tj%comment\nET',
+                    b'[(x)]TJ]', b"(x)'{"]:
+        assert_equals(None, text_free_reason(FakePage(content)))
+
+
+def test_a_scanned_page_is_image_only():
+    page = FakePage(b'q 612 0 0 792 0 0 cm /Im0 Do Q', {'Im0': image()})
+    assert_equals('image_only', text_free_reason(page))
+
+
+def test_a_drawing_has_no_text():
+    page = FakePage(b'0 0 m 100 100 l S')
+    assert_equals('no_text', text_free_reason(page))
+    assert_equals('empty', text_free_reason(FakePage(b' \n')))
+
+
+def test_text_inside_a_form_is_found():
+    page = FakePage(b'/Fm0 Do', {'Fm0': form(b'BT (x) Tj ET')})
+    assert_equals(None, text_free_reason(page))
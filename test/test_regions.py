@@ -0,0 +1,50 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Table region tests
+"""
+
+import sys
+sys.path.append('code')
+
+from pdftables import find_table_regions, split_box_list
+from pdftables.tree import Leaf, LeafList
+
+from nose.tools import assert_equals
+
+
+def table_rows(top, rows):
+    """ rows of four text lines, 16 points apart """
+    boxes = []
+    for row in range(rows):
+        for column in range(4):
+            left = 100 * column + 10
+            bottom = top - 16 * row - 10
+            boxes.append(Leaf(((left, bottom, left + 50, bottom + 10),
+                               'LTTextLineHorizontal', 'x')))
+    return boxes
+
+
+PAGE = Leaf(((0, 0, 612, 792), 'LTPage', ''))
+
+
+def test_one_table_is_one_region():
+    box_list = LeafList([PAGE] + table_rows(700, 5))
+    assert_equals([(0, 612, 626, 700)], find_table_regions(box_list))
+
+
+def test_a_large_gap_between_table_rows_makes_two_regions():
+    box_list = LeafList([PAGE] + table_rows(700, 5) + table_rows(400, 5))
+    assert_equals([(0, 612, 626, 700), (0, 612, 326, 400)],
+                  find_table_regions(box_list))
+
+
+def test_boxes_are_split_half_way_between_regions():
+    box_list = LeafList([PAGE] + table_rows(700, 5) + table_rows(400, 5))
+    regions = find_table_regions(box_list)
+    top, bottom = split_box_list(box_list, regions)
+    assert_equals(21, len(top))
+    assert_equals(21, len(bottom))
+    assert_equals(PAGE, top[0])
+    assert_equals(True, all(box.midline > 500 for box in top[1:]))
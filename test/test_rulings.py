@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Ruling line grid tests
+"""
+
+import sys
+sys.path.append('code')
+
+from pdftables import apply_combs, page_to_tables
+from pdftables.backends import JSONLayoutBackend
+from pdftables.tree import Leaf, LeafList
+from pdftables.rulings import ruling_grid
+
+from nose.tools import assert_equals
+
+
+def line(left, bottom, right, top):
+    return Leaf(((left, bottom, right, top), 'LTLine', ''))
+
+
+def text(left, bottom, right, top, content):
+    return Leaf(((left, bottom, right, top), 'LTTextLineHorizontal', content))
+
+
+# a 2 x 2 grid from (0, 0) to (100, 40), with slightly ragged joins
+GRID = LeafList([line(0, 0, 0.5, 40), line(50, 0, 50.5, 40),
+                 line(99.5, 0, 100, 40),
+                 line(0, 0, 100, 0.5), line(0, 20, 100, 20.5),
+                 line(0, 39.5, 100, 40)])
+
+
+def test_ruling_lines_are_snapped_into_combs():
+    x_comb, y_comb = ruling_grid(GRID)
+    assert_equals([0.25, 50.25, 99.75], x_comb)
+    assert_equals([39.75, 20.25, 0.25], y_comb)
+
+
+def test_ruling_combs_allocate_text_to_cells():
+    x_comb, y_comb = ruling_grid(GRID)
+    box_list = LeafList([text(5, 25, 40, 35, 'a'), text(55, 5, 90, 15, 'd')])
+    assert_equals([['a', ''], ['', 'd']], apply_combs(box_list, x_comb, y_comb))
+
+
+def test_a_single_underline_is_not_a_grid():
+    assert_equals((None, None), ruling_grid(LeafList([line(0, 0, 100, 0.5)])))
+
+
+def test_rectangles_contribute_their_edges():
+    rects = LeafList([Leaf(((0, 0, 50, 40), 'LTRect', '')),
+                      Leaf(((50, 0, 100, 40), 'LTRect', ''))])
+    assert_equals(([0, 50, 100], [40, 0]), ruling_grid(rects))
+
+
+def test_a_lone_rectangle_falls_back_to_projections():
+    rows = [['Name', 'Qty', 'Price', 'Total']] + [
+        ['Item{0}'.format(i), str(i + 1), '{0}.00'.format(i), str(10 * i)]
+        for i in range(8)]
+    boxes = [{"bbox": [20, 20, 592, 772], "class": "LTRect"}]
+    for r, row in enumerate(rows):
+        for c, cell in enumerate(row):
+            left, bottom = 76 + 110 * c, 697 - 16 * r
+            boxes.append({"bbox": [left, bottom, left + 6 * len(cell),
+                                   bottom + 10], "text": cell})
+    page = JSONLayoutBackend.layout({"bbox": [0, 0, 612, 792],
+                                     "boxes": boxes})
+    border = LeafList([Leaf(((20, 20, 592, 772), 'LTRect', ''))])
+    assert_equals((None, None), ruling_grid(border))
+    assert_equals(rows, page_to_tables(page, atomise=True, rulings=True))
+
+
+def test_a_grid_must_hold_the_text():
+    box_list = LeafList([text(5, 25, 40, 35, 'a'), text(5, 105, 40, 115, 'b'),
+                         text(5, 125, 40, 135, 'c')])
+    assert_equals((None, None), ruling_grid(GRID, box_list))
+    assert_equals(ruling_grid(GRID), ruling_grid(GRID, box_list[:1]))
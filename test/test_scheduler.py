@@ -0,0 +1,50 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Batch scheduler tests
+"""
+
+import sys
+sys.path.append('code')
+
+import pickle
+
+from pdftables import get_tables
+from pdftables.scheduler import get_tables_batch, plan_units
+from pdftables.templates import TemplateStore
+
+from nose.tools import assert_equals
+
+SAMPLE = 'fixtures/sample_data/AnimalExampleTables.pdf'
+
+
+def test_a_long_document_is_split_into_units():
+    units = plan_units([[1] * 10, [3]], 4)
+    assert_equals([(0, 0, 4), (0, 4, 8), (1, 0, 1), (0, 8, 10)], units)
+
+
+def test_every_page_is_in_one_unit():
+    costs = [[7, 1, 1, 9, 2], [], [4, 4]]
+    for unit_cost in (1, 5, 100):
+        pages = sorted((document, i)
+                       for document, start, stop in plan_units(costs,
+                                                               unit_cost)
+                       for i in range(start, stop))
+        assert_equals([(0, 0), (0, 1), (0, 2), (0, 3), (0, 4),
+                       (2, 0), (2, 1)], pages)
+
+
+def test_a_batch_gives_the_tables_of_each_document_in_order():
+    expected = get_tables(SAMPLE)
+    batch = get_tables_batch([SAMPLE, SAMPLE], processes=2, unit_cost=1)
+    assert_equals([expected, expected], batch)
+    assert_equals([table.page_number for table in expected],
+                  [table.page_number for table in batch[1]])
+
+
+def test_a_template_store_can_be_sent_to_workers():
+    store = pickle.loads(pickle.dumps(TemplateStore(threshold=0.5)))
+    assert_equals(0.5, store.threshold)
+    store.match('missing', [])
+    assert_equals(1, store.misses)
@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Extractor session tests
+"""
+
+import sys
+sys.path.append('code')
+
+from pdfminer.cmapdb import CMapDB
+from pdfminer.psparser import LIT
+from pdfminer.pdftypes import PDFStream
+
+from pdftables import get_tables
+from pdftables.backends import JSONLayoutBackend
+from pdftables.pagescan import font_fingerprint
+from pdftables.session import CMAP_CACHE_SIZE, Extractor, FontCache
+
+from nose.tools import assert_equals, assert_raises, assert_true
+
+
+def test_the_font_cache_evicts_the_least_recently_used_font():
+    cache = FontCache(maxsize=2)
+    cache.store('a', 1)
+    cache.store('b', 2)
+    cache.lookup('a')
+    cache.store('c', 3)
+    assert_equals(['a', 'c'], list(cache))
+    assert_equals(1, cache.evictions)
+    assert_equals(None, cache.lookup('b'))
+
+
+def test_an_extractor_bounds_the_cmaps_pdfminer_keeps():
+    Extractor(max_cmaps=2)
+    try:
+        for name in ('a', 'b', 'c'):
+            CMapDB._cmap_cache[name] = name
+            CMapDB._umap_cache[name] = [name, name]
+        assert_equals(['b', 'c'], list(CMapDB._cmap_cache))
+        assert_equals(['b', 'c'], list(CMapDB._umap_cache))
+    finally:
+        CMapDB._cmap_cache.clear()
+        CMapDB._umap_cache.clear()
+        Extractor(max_cmaps=CMAP_CACHE_SIZE)
+
+
+def type0_font(program, widths):
+    return {'Subtype': LIT('Type0'), 'BaseFont': LIT('ABCDEF+Sans'),
+            'DescendantFonts': [{
+                'Subtype': LIT('CIDFontType2'), 'W': [1, widths],
+                'FontDescriptor': {'FontName': LIT('ABCDEF+Sans'),
+                                   'FontFile2': PDFStream({}, program)}}]}
+
+
+def test_the_fingerprint_of_a_font_covers_its_descendants():
+    font = font_fingerprint(type0_font(b'glyphs', [500, 600]))
+    assert_equals(font, font_fingerprint(type0_font(b'glyphs', [500, 600])))
+    assert_true(font != font_fingerprint(type0_font(b'others', [500, 600])))
+    assert_true(font != font_fingerprint(type0_font(b'glyphs', [500, 700])))
+
+
+def test_an_extractor_gives_the_same_tables_as_get_tables():
+    sample = 'fixtures/sample_data/AnimalExampleTables.pdf'
+    extractor = Extractor()
+    assert_equals(get_tables(sample), extractor.get_tables(sample))
+    assert_equals(get_tables(sample), extractor.get_tables(sample))
+    assert_true(extractor.font_cache.hits > 0)
+
+
+def test_an_extractor_takes_an_engine_name():
+    sample = 'fixtures/sample_data/AnimalExampleTables.pdf'
+    assert_equals(get_tables(sample),
+                  Extractor().get_tables(sample, engine='fast'))
+
+
+def test_an_extractor_refuses_threads_and_backends():
+    sample = 'fixtures/sample_data/AnimalExampleTables.pdf'
+    extractor = Extractor()
+    assert_raises(ValueError, extractor.get_tables, sample, threads=2)
+    assert_raises(ValueError, extractor.get_tables, sample,
+                  backend=JSONLayoutBackend())
+    assert_equals(get_tables(sample), extractor.get_tables(sample, threads=1))
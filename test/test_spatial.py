@@ -0,0 +1,59 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+GridIndex tests
+"""
+
+import sys
+sys.path.append('code')
+
+from pdftables.tree import Leaf, LeafList
+from pdftables.spatial import GridIndex
+
+from nose.tools import assert_equals, assert_true
+
+BOXES = LeafList([
+    Leaf(((100, 700, 140, 710), 'LTTextLineHorizontal', 'Name')),
+    Leaf(((200, 700, 240, 710), 'LTTextLineHorizontal', 'Total')),
+    Leaf(((100, 680, 140, 690), 'LTTextLineHorizontal', 'Cats')),
+    Leaf(((200, 680, 240, 690), 'LTTextLineHorizontal', '12')),
+    Leaf(((10, 20, 90, 30), 'LTTextLineHorizontal', 'Total pages')),
+])
+
+
+def test_query_keeps_the_original_order():
+    index = GridIndex(BOXES, cell_size=16)
+    found = index.query((0, 600, 300, 800))
+    assert_equals(['Name', 'Total', 'Cats', '12'],
+                  [box.text for box in found])
+
+
+def test_query_uses_the_centre_of_a_box():
+    index = GridIndex(BOXES)
+    assert_equals(['Cats'], [box.text for box in
+                             index.query((110, 684, 130, 686))])
+    assert_equals([], index.query((141, 0, 199, 800)))
+
+
+def test_an_unbounded_query_behaves_like_the_list_filter():
+    index = GridIndex(BOXES)
+    assert_equals(5, len(index.query((None, None, 1000, 1000))))
+    assert_equals([], index.query((0, 0, 1000, None)))
+
+
+def test_filtered_lists_share_the_index():
+    index = BOXES.spatial_index()
+    numbers = BOXES.filter(lambda box: box.text.isdigit())
+    lines = numbers.filterByType(['LTTextLineHorizontal'])
+    assert_true(lines.spatial_index().cells is index.cells)
+    assert_equals(['12'], [box.text for box in
+                           lines.spatial_index().query((0, 0, 1000, 1000))])
+
+
+def test_the_index_is_rebuilt_when_the_list_grows():
+    box_list = LeafList(BOXES)
+    index = box_list.spatial_index()
+    assert_true(index is box_list.spatial_index())
+    box_list.append(Leaf(((300, 680, 340, 690), 'LTChar', 'x')))
+    assert_equals(6, len(box_list.spatial_index().query((0, 0, 1000, 1000))))
@@ -0,0 +1,161 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Layout template tests
+"""
+
+import io
+import json
+import os
+import sys
+import tempfile
+sys.path.append('code')
+
+from pdftables import get_tables
+from pdftables.backends import JSONLayoutBackend
+from pdftables.engines import ReferenceEngine
+from pdftables.tree import Leaf, LeafList
+from pdftables.templates import (LayoutTemplate, TemplateStore,
+                                 column_comb_fit)
+
+from nose.tools import assert_equals, assert_false, assert_true
+
+TEMPLATE = LayoutTemplate((0, 200, 0, 40), [0, 100, 200], [40, 20, 0])
+
+
+def line(left, bottom, right, top, text='x'):
+    return Leaf(((left, bottom, right, top), 'LTTextLineHorizontal', text))
+
+
+def test_a_template_fits_boxes_inside_its_cells():
+    box_list = LeafList([line(10, 25, 50, 35), line(110, 25, 150, 35),
+                         line(10, 5, 50, 15), line(110, 5, 150, 15)])
+    assert_equals(1.0, TEMPLATE.fit(box_list))
+
+
+def test_boxes_straddling_a_column_do_not_fit():
+    box_list = LeafList([line(10, 25, 150, 35), line(10, 5, 50, 15)])
+    assert_equals(0.5, TEMPLATE.fit(box_list))
+
+
+def test_two_lines_in_one_row_do_not_fit():
+    box_list = LeafList([line(10, 25, 50, 31), line(10, 32, 50, 38),
+                         line(110, 25, 150, 31)])
+    assert_true(TEMPLATE.fit(box_list) < 1.0)
+
+
+def test_rows_beyond_the_template_do_not_fit():
+    box_list = LeafList([line(10, 25, 50, 35), line(110, 25, 150, 35),
+                         line(10, 45, 50, 55), line(110, 45, 150, 55)])
+    assert_equals(0.5, TEMPLATE.fit(box_list))
+    heading = LeafList([line(10, 25, 50, 35), line(110, 25, 150, 35),
+                        line(10, 45, 150, 55)])
+    assert_equals(1.0, TEMPLATE.fit(heading))
+
+
+def test_the_store_falls_back_when_the_fit_is_poor():
+    store = TemplateStore()
+    store.add('abc', TEMPLATE.bbox, TEMPLATE.x_comb, TEMPLATE.y_comb)
+    assert_true(store.match('abc', LeafList([line(10, 5, 50, 15)])))
+    assert_equals(None, store.match('abc', LeafList([line(10, 5, 150, 15)])))
+    assert_equals(None, store.match('xyz', LeafList([line(10, 5, 50, 15)])))
+    assert_equals((1, 2), (store.hits, store.misses))
+
+
+def test_the_store_round_trips_through_json():
+    store = TemplateStore()
+    store.add('abc', TEMPLATE.bbox, TEMPLATE.x_comb, TEMPLATE.y_comb)
+    handle, file_name = tempfile.mkstemp(suffix='.json')
+    os.close(handle)
+    try:
+        store.save(file_name)
+        loaded = TemplateStore.load(file_name)
+    finally:
+        os.remove(file_name)
+    assert_equals(TEMPLATE.x_comb, loaded['abc'].x_comb)
+    assert_equals(TEMPLATE.y_comb, loaded['abc'].y_comb)
+
+
+def test_a_carried_column_comb_fits_a_page_with_the_same_columns():
+    box_list = LeafList([line(10, 5, 50, 15), line(110, 5, 150, 15)])
+    assert_equals(1.0, column_comb_fit([0, 100, 200], box_list, 0, 40))
+
+
+def test_a_carried_column_comb_does_not_fit_welded_or_empty_columns():
+    welded = LeafList([line(10, 5, 150, 15), line(110, 25, 150, 35)])
+    assert_true(column_comb_fit([0, 100, 200], welded, 0, 40) < 1.0)
+    empty = LeafList([line(10, 5, 50, 15)])
+    assert_equals(0.0, column_comb_fit([0, 100, 200], empty, 0, 40))
+
+
+def test_a_carried_column_comb_does_not_fit_separate_runs_in_a_column():
+    box_list = LeafList([line(10, 5, 50, 15), line(110, 5, 130, 15),
+                         line(160, 5, 190, 15)])
+    assert_equals(0.0, column_comb_fit([0, 100, 200], box_list, 0, 40))
+
+
+def page_layout(rows):
+    boxes = []
+    for r, row in enumerate(rows):
+        for c, cell in enumerate(row):
+            left, bottom = 76 + 110 * c, 697 - 16 * r
+            boxes.append({"bbox": [left, bottom, left + 6 * len(cell),
+                                   bottom + 10], "text": cell})
+    return {"bbox": [0, 0, 612, 792], "boxes": boxes}
+
+
+def test_a_page_with_more_columns_is_not_given_the_carried_comb():
+    narrow = [['Name', 'Qty', 'Price', 'Total']] + [
+        ['Item{0}'.format(i), str(i + 1), '{0}.00'.format(i),
+         str(10 * i)] for i in range(8)]
+    wide = [row[:3] + ['{0}.50'.format(i)] + row[3:]
+            for i, row in enumerate(narrow)]
+    wide[0][3] = 'Tax'
+    stream = io.BytesIO(json.dumps(
+        {"pages": [page_layout(narrow), page_layout(wide)]}).encode('utf-8'))
+    first, second = get_tables(stream, backend=JSONLayoutBackend(),
+                               carry_comb=True)
+    assert_equals(narrow, first)
+    assert_equals(wide, second)
+    assert_false(second.continues_previous)
+
+
+def test_a_longer_page_of_the_same_layout_is_inferred_again():
+    rows = [['Name', 'Qty', 'Price', 'Total']] + [
+        ['Item{0}'.format(i), str(i + 1), '{0}.00'.format(i),
+         str(10 * i)] for i in range(14)]
+    store = TemplateStore()
+    stream = io.BytesIO(json.dumps(
+        {"pages": [page_layout(rows[:9]), page_layout(rows)]}).encode('utf-8'))
+    short, longer = get_tables(stream, backend=JSONLayoutBackend(),
+                             templates=store)
+    assert_equals(rows[:9], short)
+    assert_equals(rows, longer)
+    assert_equals((0, 2), (store.hits, store.misses))
+
+
+class CountingEngine(ReferenceEngine):
+    """ The reference engine, recording the projections it makes """
+    name = 'counting'
+
+    def __init__(self):
+        self.projections = []
+
+    def project_boxes(self, box_list, orientation, erosion=0):
+        self.projections.append(orientation)
+        return ReferenceEngine.project_boxes(box_list, orientation, erosion)
+
+
+def test_a_carried_comb_which_fits_saves_the_column_projection():
+    rows = [['Name', 'Qty', 'Price', 'Total']] + [
+        ['Item{0}'.format(i), str(i + 1), '{0}.00'.format(i),
+         str(10 * i)] for i in range(8)]
+    data = json.dumps({"pages": [page_layout(rows)] * 3}).encode('utf-8')
+    engine = CountingEngine()
+    tables = get_tables(io.BytesIO(data), backend=JSONLayoutBackend(),
+                        carry_comb=True, engine=engine)
+    assert_equals([rows] * 3, tables)
+    assert_equals([False, True, True],
+                  [table.continues_previous for table in tables])
+    assert_equals(1, engine.projections.count('column'))
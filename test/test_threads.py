@@ -0,0 +1,47 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Threaded extraction tests
+"""
+
+import sys
+sys.path.append('code')
+
+import threading
+
+from pdftables import get_tables
+from pdftables.stats import ExtractionStats
+
+from nose.tools import assert_equals, raises
+
+SAMPLE = 'fixtures/sample_data/AnimalExampleTables.pdf'
+
+
+def test_threads_give_the_same_tables():
+    expected = get_tables(SAMPLE)
+    tables = get_tables(SAMPLE, threads=4)
+    assert_equals(expected, tables)
+    assert_equals([table.page_number for table in expected],
+                  [table.page_number for table in tables])
+    with open(SAMPLE, 'rb') as fh:
+        assert_equals(expected, get_tables(fh, threads=2))
+
+
+def test_concurrent_calls_can_share_stats():
+    stats = ExtractionStats()
+    results = []
+    calls = [threading.Thread(
+        target=lambda: results.append(get_tables(SAMPLE, stats=stats)))
+        for _ in range(4)]
+    for call in calls:
+        call.start()
+    for call in calls:
+        call.join()
+    assert_equals(4, stats.counts['documents'])
+    assert_equals(1, len(set(repr(tables) for tables in results)))
+
+
+@raises(ValueError)
+def test_carry_comb_cannot_be_threaded():
+    get_tables(SAMPLE, carry_comb=True, threads=2)
@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Shared memory transfer tests
+"""
+
+import sys
+sys.path.append('code')
+
+import os
+
+from pdftables import get_tables
+from pdftables.scheduler import get_tables_batch
+from pdftables.transfer import (encode_tables, decode_tables, share_tables,
+                                receive_tables)
+
+from nose.tools import assert_equals, assert_raises
+
+SAMPLE = 'fixtures/sample_data/AnimalExampleTables.pdf'
+TABLES = [[[u'Animal', u'Legs'], [u'Bee', u'6'], [u'Caf\xe9 cat', u'']],
+          [],
+          [[u'☃']]]
+
+
+def test_tables_and_metadata_survive_encoding():
+    buffer = encode_tables(TABLES, {'page': [1, 2.5]})
+    assert_equals((TABLES, {'page': [1, 2.5]}), decode_tables(buffer))
+
+
+def test_metadata_which_is_not_json_is_refused():
+    assert_raises(TypeError, encode_tables, TABLES, {'page': object()})
+
+
+def test_views_decode_rows_on_demand():
+    tables, _ = decode_tables(bytes(encode_tables(TABLES)), views=True)
+    assert_equals((3, 2), tables[0].shape)
+    assert_equals([u'Caf\xe9 cat', u''], tables[0][-1])
+    assert_equals(u'Bee', tables[0].cell(1, 0))
+    assert_equals(TABLES, [table.to_list() for table in tables])
+
+
+def test_table_objects_come_back_with_their_metadata():
+    expected = get_tables(SAMPLE)
+    tables = receive_tables(share_tables(expected))
+    assert_equals(expected, tables)
+    assert_equals([(table.page_number, table.table_number_on_page)
+                   for table in expected],
+                  [(table.page_number, table.table_number_on_page)
+                   for table in tables])
+
+
+def test_a_batch_gives_the_same_tables_through_shared_memory():
+    batch = get_tables_batch([SAMPLE], processes=2, unit_cost=1, shared=True)
+    assert_equals(get_tables_batch([SAMPLE], processes=2, unit_cost=1,
+                                   shared=False), batch)
+
+
+def test_a_batch_leaves_no_shared_memory_behind():
+    if not os.path.isdir('/dev/shm'):
+        return
+    before = set(os.listdir('/dev/shm'))
+    get_tables_batch([SAMPLE], processes=2, unit_cost=1, shared=True)
+    assert_equals(set(), set(os.listdir('/dev/shm')) - before)
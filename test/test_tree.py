@@ -27,3 +27,8 @@ def test_basic_tree():
 def test_children():
     x = [1, [2, [[3, 4]]]]
     assert_equals(len(list(pdftables.tree.children(x))), 8)
+
+def test_leaf_is_inside_uses_the_centre():
+    leaf = pdftables.tree.Leaf(((10, 10, 30, 20), "LTChar", "x"))
+    assert_equals(True, leaf.is_inside((0, 0, 20, 20)))
+    assert_equals(False, leaf.is_inside((21, 0, 40, 20)))
@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Watch-folder daemon tests
+"""
+
+import sys
+sys.path.append('code')
+
+import json
+import os
+import shutil
+import tempfile
+
+from pdftables import get_tables
+from pdftables.transfer import table_metadata
+from pdftables.watch import FolderWatcher
+
+from nose.tools import assert_equals, assert_true, with_setup
+
+SAMPLE = 'fixtures/sample_data/AnimalExampleTables.pdf'
+ROOT = []
+
+
+def make_root():
+    ROOT[:] = [tempfile.mkdtemp()]
+
+
+def remove_root():
+    shutil.rmtree(ROOT.pop())
+
+
+@with_setup(make_root, remove_root)
+def test_a_dropped_file_is_extracted_and_moved_aside():
+    drop = os.path.join(ROOT[0], 'drop')
+    output = os.path.join(ROOT[0], 'out')
+    os.makedirs(drop)
+    with FolderWatcher(drop, output_directory=output, processes=1,
+                       poll=0.01, settle=0, use_inotify=False) as watcher:
+        shutil.copy(SAMPLE, os.path.join(drop, 'sample.pdf'))
+        assert_equals(1, watcher.run(files=1))
+
+    with open(os.path.join(output, 'sample.json')) as file_ptr:
+        written = json.load(file_ptr)
+    expected = [dict(rows=table, **table_metadata(table))
+                for table in get_tables(SAMPLE)]
+    assert_equals(json.loads(json.dumps(expected)), written)
+    assert_equals(['sample.pdf'],
+                  os.listdir(os.path.join(drop, 'done')))
+    assert_equals(['done', 'failed'], sorted(os.listdir(drop)))
+    [record] = watcher.metrics
+    assert_equals('done', record['status'])
+    assert_true(record['latency'] >= record['extract'])
+    assert_equals(1, watcher.latency_summary()['count'])
+
+
+@with_setup(make_root, remove_root)
+def test_a_file_which_fails_is_moved_to_failed():
+    drop = ROOT[0]
+    with FolderWatcher(drop, processes=1, poll=0.01, settle=0,
+                       use_inotify=False, output_format='csv') as watcher:
+        with open(os.path.join(drop, 'broken.pdf'), 'w') as file_ptr:
+            file_ptr.write('not a pdf')
+        watcher.run(files=1)
+    assert_equals(['broken.pdf', 'broken.pdf.error'],
+                  sorted(os.listdir(os.path.join(drop, 'failed'))))
+    assert_equals('failed', watcher.metrics[0]['status'])
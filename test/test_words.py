@@ -0,0 +1,54 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Word-level atomisation tests
+"""
+
+import sys
+sys.path.append('code')
+
+from pdftables import page_to_tables, word_boxes
+from pdftables.backends import JSONLayoutBackend
+from pdftables.tree import Leaf, LeafList
+
+from nose.tools import assert_equals
+
+
+def chars(text, left=0, bottom=0, width=5, gap=0):
+    return [Leaf(((left + k * (width + gap), bottom,
+                   left + k * (width + gap) + width, bottom + 10),
+                  'LTChar', char))
+            for k, char in enumerate(text)]
+
+
+def test_words_split_at_whitespace_and_wide_gaps():
+    boxes = LeafList(chars('ab cd') + chars('ef', left=40) +
+                     [Leaf(((0, 0, 60, 10), 'LTTextLineHorizontal', 'x'))] +
+                     chars('gh', bottom=-20))
+    words = word_boxes(boxes)
+    assert_equals(['ab ', 'cd', 'ef', 'x', 'gh'],
+                  [word.text for word in words])
+    assert_equals((0, 0, 15, 10), words[0].bbox)
+    assert_equals(['LTWord', 'LTWord', 'LTWord', 'LTTextLineHorizontal',
+                   'LTWord'], [word.classname for word in words])
+
+
+def test_small_gaps_do_not_split_words():
+    words = word_boxes(LeafList(chars('abc', gap=1)))
+    assert_equals(['abc'], [word.text for word in words])
+
+
+def test_words_give_the_table_of_a_page():
+    rows = [['Name', 'Qty', 'Price', 'Total']] + [
+        ['Item {0}'.format(i), str(3 * i + 1), '{0}.00'.format(i + 2),
+         str((3 * i + 1) * (i + 2))] for i in range(8)]
+    boxes = []
+    for r, row in enumerate(rows):
+        for c, cell in enumerate(row):
+            left, bottom = 76 + 110 * c, 697 - 16 * r
+            boxes.append({"bbox": [left, bottom, left + 6 * len(cell),
+                                   bottom + 10], "text": cell})
+    page = JSONLayoutBackend.layout({"bbox": [0, 0, 612, 792],
+                                     "boxes": boxes})
+    assert_equals(rows, page_to_tables(page, atomise='words'))